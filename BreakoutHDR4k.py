@@ -2,6 +2,7 @@ import pygame
 import sys
 import random
 import numpy as np
+from present import Presenter
 
 # Hide pygame welcome prompt
 import os
@@ -13,7 +14,8 @@ pygame.init()
 
 # Screen setup
 WIDTH, HEIGHT = 600, 400
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+display = Presenter.from_argv((WIDTH, HEIGHT))  # native target, integer-scaled to the display
+screen = display.target
 pygame.display.set_caption("Breakout - Raw Vibe Mode")
 
 # Colors
@@ -74,6 +76,8 @@ while running:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F2:
+            display.post.cycle()  # swap HDR grade at runtime
 
     keys = pygame.key.get_pressed()
     if keys[pygame.K_LEFT] and paddle_x > 0:
@@ -135,7 +139,7 @@ while running:
     score_surface = font.render(f"Score: {score}", True, WHITE)
     screen.blit(score_surface, (10, 10))
 
-    pygame.display.flip()
+    display.flip()
 
 pygame.quit()
 sys.exit()
@@ -1,6 +1,10 @@
 import pygame
 import sys
 import random
+from fixphys import FIX, to_fix, px, fall, collide_y
+from latency import LatencyProbe
+from gcpause import GCControl
+from allocbudget import AllocBudget
 
 pygame.init()
 
@@ -15,7 +19,10 @@ TILES_Y     = HEIGHT // TILE
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("NES Mario – Python PPU 90s Vibes")
 clock  = pygame.time.Clock()
+probe  = LatencyProbe.from_argv()  # --low-latency / --latency / --latency-probe
 FPS    = 60
+gcctl  = GCControl.from_argv(FPS)  # --gc-freeze / --gc-manual / --gc-log
+budget = AllocBudget.from_argv()   # --alloc: per-phase allocation accounting
 
 # -----------------------------------------------------------------------------
 # NES‑style palette
@@ -42,19 +49,25 @@ LEVEL_COUNT = 32  # simple menu cycles through 32 autogenerated levels
 # Helper & drawing routines
 # -----------------------------------------------------------------------------
 
+SCANLINES = [((0, y), (WIDTH, y)) for y in range(0, HEIGHT, 2)]  # endpoints, built once
+
 def scanlines():
     """Overlay light, semi‑transparent horizontal lines for CRT nostalgia."""
-    for y in range(0, HEIGHT, 2):
-        pygame.draw.line(screen, (0, 0, 0, 40), (0, y), (WIDTH, y), 1)
+    for a, b in SCANLINES:
+        pygame.draw.line(screen, (0, 0, 0, 40), a, b, 1)
+
+HUD = [None] * 5  # lives, coins, level, time, rendered line: re-rendered only when a value changes
 
 def nes_hud(lives: int, coins: int, levelnum: int, t: int) -> None:
     """Tiny HUD similar to the original NES layout."""
-    hud = font.render(
-        f"MARIO   x{lives}   COIN:{coins:02}   WORLD:{levelnum+1:02}   TIME:{t:03}",
-        True,
-        WHITE,
-    )
-    screen.blit(hud, (16, 4))
+    h = HUD
+    if h[0] != lives or h[1] != coins or h[2] != levelnum or h[3] != t:
+        h[:] = lives, coins, levelnum, t, font.render(
+            f"MARIO   x{lives}   COIN:{coins:02}   WORLD:{levelnum+1:02}   TIME:{t:03}",
+            True,
+            WHITE,
+        )
+    screen.blit(h[4], (16, 4))
 
 def make_level(level_idx: int):
     """Create a *pseudo‑random* 3‑screen‑wide level that is deterministic per index."""
@@ -90,31 +103,36 @@ def make_level(level_idx: int):
     level[3][TILES_X * 3 - 3] = 6
     return level
 
+# Per tile id: (colour, rect, dx, dy, border) parts. draw_level moves these rects
+# into place instead of building a rect tuple for every tile every frame.
+TILE_PARTS = {
+    1: ((GROUND, pygame.Rect(0, 0, TILE, TILE), 0, 0, 0),),
+    2: ((BRICK, pygame.Rect(0, 0, TILE, TILE), 0, 0, 0),
+        (BLACK, pygame.Rect(0, 0, TILE - 4, TILE - 4), 2, 2, 1)),
+    3: ((BLOCK, pygame.Rect(0, 0, TILE, TILE), 0, 0, 0),
+        (WHITE, pygame.Rect(0, 0, 6, 6), 5, 5, 0)),
+    4: ((PIPE, pygame.Rect(0, 0, TILE, TILE * 2), 0, 0, 0),
+        (WHITE, pygame.Rect(0, 0, TILE, 3), 0, 0, 0)),
+    6: ((FLAG, pygame.Rect(0, 0, 3, TILE * 7), TILE // 2 - 1, 0, 0),
+        (WHITE, pygame.Rect(0, 0, 10, 10), TILE // 2 + 3, 0, 0)),
+}
+COIN_AT = [0, 0]  # coin centre, moved per coin
+
 def draw_level(level, camera_x: int) -> None:
-    """Blit only the visible columns of tiles (simple brute‑force)."""
+    """Draw only the visible columns of tiles."""
+    cols = range(max(0, -((TILE - camera_x) // TILE)), min(len(level[0]), (camera_x + WIDTH) // TILE + 1))
     for y, row in enumerate(level):
-        for x, tile in enumerate(row):
-            sx = x * TILE - camera_x
-            sy = y * TILE
-            if sx < -TILE or sx > WIDTH:
-                continue  # off‑screen
-
-            if tile == 1:      # ground
-                pygame.draw.rect(screen, GROUND, (sx, sy, TILE, TILE))
-            elif tile == 2:    # brick
-                pygame.draw.rect(screen, BRICK, (sx, sy, TILE, TILE))
-                pygame.draw.rect(screen, BLACK, (sx + 2, sy + 2, TILE - 4, TILE - 4), 1)
-            elif tile == 3:    # block
-                pygame.draw.rect(screen, BLOCK, (sx, sy, TILE, TILE))
-                pygame.draw.rect(screen, WHITE, (sx + 5, sy + 5, 6, 6))
-            elif tile == 4:    # pipe
-                pygame.draw.rect(screen, PIPE, (sx, sy, TILE, TILE * 2))
-                pygame.draw.rect(screen, WHITE, (sx, sy, TILE, 3))
-            elif tile == 5:    # coin
-                pygame.draw.circle(screen, COIN, (sx + TILE // 2, sy + TILE // 2), TILE // 4)
-            elif tile == 6:    # flagpole
-                pygame.draw.rect(screen, FLAG,  (sx + TILE // 2 - 1, sy, 3, TILE * 7))
-                pygame.draw.rect(screen, WHITE, (sx + TILE // 2 + 3, sy, 10, 10))
+        sy = y * TILE
+        for x in cols:
+            tile = row[x]
+            if tile == 5:    # coin
+                COIN_AT[0], COIN_AT[1] = x * TILE - camera_x + TILE // 2, sy + TILE // 2
+                pygame.draw.circle(screen, COIN, COIN_AT, TILE // 4)
+            elif tile:
+                sx = x * TILE - camera_x
+                for color, r, dx, dy, border in TILE_PARTS[tile]:
+                    r.x, r.y = sx + dx, sy + dy
+                    pygame.draw.rect(screen, color, r, border)
 
 def draw_mario(mx: int, my: int, flicker: int = 0) -> None:
     """2×2‑tile micro‑Mario sprite."""
@@ -185,11 +203,12 @@ def main():
         level = make_level(selected_level)
 
         # Mario state
-        mx, my = 40, HEIGHT - 3 * TILE
+        mx, fy = 40, (HEIGHT - 3 * TILE) * FIX   # fy/vy are fixed-point (fixphys), my = px(fy)
+        my = px(fy)
         vx, vy = 0, 0
         SPEED    = 3
-        JUMP_V   = 8.5
-        GRAVITY  = 0.5
+        JUMP_V   = to_fix(8.5)
+        GRAVITY  = to_fix(0.5)
         on_ground = False
         coins      = 0
 
@@ -204,13 +223,18 @@ def main():
         flicker_frame  = 0
 
         # ---------------- Gameplay loop ----------------
+        gcctl.loaded()  # level built: freeze it out of later collections
         while True:
             clock.tick(FPS)
+            gcctl.frame()
+            probe.poll()  # --low-latency: pump input just before it is sampled
+            budget.phase("input")
             flicker_frame += 1
             screen.fill(SKY)
 
             # --- Input handling ---
             keys = pygame.key.get_pressed()
+            probe.sampled()
             vx = 0
             if keys[pygame.K_LEFT]:
                 vx = -SPEED
@@ -221,9 +245,11 @@ def main():
                 on_ground = False
 
             # --- Apply physics ---
-            vy += GRAVITY
+            budget.phase("update")
+            vy = fall(vy, GRAVITY)
             mx += vx
-            my += vy
+            fy += vy
+            my = px(fy)
 
             # --- Camera tracking (simple) ---
             camera_x = max(0, min(mx - WIDTH // 3, level_px_w - WIDTH))
@@ -237,7 +263,7 @@ def main():
                     break  # back to menu
                 else:
                     level_start_screen(selected_level)
-                    mx, my, vx, vy = 40, HEIGHT - 3 * TILE, 0, 0
+                    mx, fy, vx, vy = 40, (HEIGHT - 3 * TILE) * FIX, 0, 0
                     continue
 
             # --- Collision detection ---
@@ -247,14 +273,10 @@ def main():
                 for x, t in enumerate(row):
                     if t in (1, 2, 3, 4):  # solid
                         block = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
-                        if mario_rect.colliderect(block):
-                            if vy > 0:  # falling onto
-                                my = block.top - TILE
-                                vy = 0
-                                on_ground = True
-                            elif vy < 0:  # head bump
-                                my = block.bottom
-                                vy = 1
+                        if mario_rect.colliderect(block):  # land on top / bump head
+                            fy, vy, landed = collide_y(fy, vy, TILE, block.top, block.bottom, bonk_vy=FIX)
+                            if landed: on_ground = True
+            my = px(fy)
 
             # --- Collectibles & goal ---
             for y, row in enumerate(level):
@@ -282,10 +304,11 @@ def main():
                         break
                     else:
                         level_start_screen(selected_level)
-                        mx, my, vx, vy, timer = 40, HEIGHT - 3 * TILE, 0, 0, 999
+                        mx, fy, vx, vy, timer = 40, (HEIGHT - 3 * TILE) * FIX, 0, 0, 999
                         continue
 
             # --- Rendering order ---
+            budget.phase("draw")
             draw_level(level, camera_x)
             draw_mario(mx - camera_x, my, flicker_frame)
             nes_hud(lives, coins, selected_level, timer)
@@ -295,13 +318,17 @@ def main():
                 msg = bigfont.render("LEVEL CLEAR!", True, COIN)
                 screen.blit(msg, (WIDTH // 2 - msg.get_width() // 2, 140))
                 pygame.display.flip()
+                probe.presented()
                 pygame.time.wait(1200)
                 break  # return to menu
 
+            budget.phase("present")
             pygame.display.flip()
+            probe.presented()
+            gcctl.idle()  # --gc-manual: collect young gens in the frame's slack
 
             # --- Event polling (includes pause/quit) ---
-            for event in pygame.event.get():
+            for event in probe.events():
                 if event.type == pygame.QUIT:
                     pygame.quit(); sys.exit()
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
@@ -309,6 +336,7 @@ def main():
             else:
                 continue
             break  # escape pressed – back to menu
+        gcctl.transition()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,12 @@
 import pygame
 import sys
-import random
+import neslevel
+from rewind import Rewind
+from spritecache import SpriteCache
+from ppu import PPU, SPR_PAL
+from latency import LatencyProbe
+from gcpause import GCControl
+from allocbudget import AllocBudget
 
 pygame.init()
 
@@ -12,7 +18,10 @@ TILES_Y = HEIGHT // TILE
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("NES Mario - Python PPU 90s Vibes")
 clock = pygame.time.Clock()
+probe = LatencyProbe.from_argv()  # --low-latency / --latency / --latency-probe
+budget = AllocBudget.from_argv()  # --alloc: per-phase allocation accounting
 FPS = 60
+gcctl = GCControl.from_argv(FPS)  # --gc-freeze / --gc-manual / --gc-log
 
 # NES palette
 SKY = (92, 148, 252)
@@ -32,42 +41,21 @@ font = pygame.font.SysFont("Courier New", 16, bold=True)
 bigfont = pygame.font.SysFont("Courier New", 32, bold=True)
 
 LEVEL_COUNT = 32
+USE_PPU = "--ppu" in sys.argv  # palette-indexed PPU backend instead of immediate-mode rects
 
 def scanlines():
     # Draw CRT scanlines for extra nostalgia
     for y in range(0, HEIGHT, 2):
         pygame.draw.line(screen, (0,0,0,40), (0, y), (WIDTH, y), 1)
 
-def nes_hud(lives, coins, levelnum, time):
-    hud = font.render(f"MARIO   x{lives}   COIN:{coins:02}   WORLD:{levelnum+1:02}   TIME:{time:03}", True, WHITE)
-    screen.blit(hud, (16, 4))
+HUD = [None] * 5  # lives, coins, level, time, rendered line: re-rendered only when a value changes
 
-def make_level(level_idx):
-    random.seed(level_idx)
-    level = [[0 for _ in range(TILES_X * 3)] for _ in range(TILES_Y)]  # 3 screens wide
-    # Ground
-    for x in range(TILES_X * 3):
-        for y in range(TILES_Y - 2, TILES_Y):
-            level[y][x] = 1
-    # Pipes
-    for _ in range(random.randint(1, 4)):
-        px = random.randint(6, TILES_X * 3 - 7)
-        for py in range(TILES_Y - 5, TILES_Y - 2):
-            level[py][px] = 4
-            level[py - 1][px] = 4
-    # Bricks and blocks
-    for _ in range(18):
-        bx = random.randint(4, TILES_X * 3 - 6)
-        by = random.randint(4, TILES_Y - 7)
-        level[by][bx] = random.choice([2, 3])
-    # Coins
-    for _ in range(18):
-        cx = random.randint(4, TILES_X * 3 - 6)
-        cy = random.randint(2, TILES_Y - 10)
-        level[cy][cx] = 5
-    # Flag at far right
-    level[3][TILES_X * 3 - 3] = 6
-    return level
+def nes_hud(lives, coins, levelnum, time):
+    h = HUD
+    if h[0] != lives or h[1] != coins or h[2] != levelnum or h[3] != time:
+        h[:] = lives, coins, levelnum, time, font.render(
+            f"MARIO   x{lives}   COIN:{coins:02}   WORLD:{levelnum+1:02}   TIME:{time:03}", True, WHITE)
+    screen.blit(h[4], (16, 4))
 
 def draw_level(level, camera_x):
     for y, row in enumerate(level):
@@ -92,13 +80,72 @@ def draw_level(level, camera_x):
                 pygame.draw.rect(screen, FLAG, (sx+TILE//2-1, sy, 3, TILE*7))
                 pygame.draw.rect(screen, WHITE, (sx+TILE//2+3, sy, 10, 10))
 
+def paint_mario(surf, dim):
+    # Blocky Mario: body/head/hat/eye, anchored 7px below the hat
+    color = (180,30,30) if dim else MARIO
+    pygame.draw.rect(surf, color, (0, 7, TILE, TILE))  # Body
+    pygame.draw.rect(surf, SKIN, (3, 0, 10, 7))  # Head
+    pygame.draw.rect(surf, BLACK, (9, 3, 2, 2))  # Eye
+    pygame.draw.rect(surf, color, (3, 0, 10, 3))  # Hat
+
+SPRITES = SpriteCache()
+SPRITES.register("mario", paint_mario, (TILE, TILE + 7), anchor=(0, 7))
+
 def draw_mario(mx, my, flicker=0):
-    # Blocky Mario: body/head/hat/eye
-    color = MARIO if flicker % 8 < 5 else (180,30,30)  # Simple flicker every ~.13s
-    pygame.draw.rect(screen, color, (mx, my, TILE, TILE))  # Body
-    pygame.draw.rect(screen, SKIN, (mx+3, my-7, 10, 7))  # Head
-    pygame.draw.rect(screen, BLACK, (mx+9, my-4, 2, 2))  # Eye
-    pygame.draw.rect(screen, color, (mx+3, my-7, 10, 3))  # Hat
+    # Simple flicker every ~.13s: two pre-baked frames, one blit
+    SPRITES.draw(screen, "mario", mx, my, flicker % 8 >= 5)
+
+# PPU backend: palette indices, 16x16 patterns, nametable from the level grid
+BG_PAL = (SKY, GROUND, BRICK, BLOCK, PIPE, COIN, FLAG, WHITE, BLACK)
+I_SKY, I_GROUND, I_BRICK, I_BLOCK, I_PIPE, I_COIN, I_FLAG, I_WHITE, I_BLACK = range(9)
+T_FLAGCLOTH, T_POLE = 7, 8  # derived tiles for the parts of the flag outside its cell
+
+def paint_bg_tiles():
+    def sky(s): pass
+    def ground(s): s.fill(I_GROUND)
+    def brick(s):
+        s.fill(I_BRICK); pygame.draw.rect(s, I_BLACK, (2, 2, TILE-4, TILE-4), 1)
+    def block(s):
+        s.fill(I_BLOCK); pygame.draw.rect(s, I_WHITE, (5, 5, 6, 6))
+    def pipe(s):
+        s.fill(I_PIPE); pygame.draw.rect(s, I_WHITE, (0, 0, TILE, 3))
+    def coin(s): pygame.draw.circle(s, I_COIN, (TILE//2, TILE//2), TILE//4)
+    def pole(s): pygame.draw.rect(s, I_FLAG, (TILE//2-1, 0, 3, TILE))
+    def flag(s):
+        pole(s); pygame.draw.rect(s, I_WHITE, (TILE//2+3, 0, 10, 10))
+    def cloth(s): pygame.draw.rect(s, I_WHITE, (0, 0, 5, 10))  # 5px of the cloth spill right
+    return (sky, ground, brick, block, pipe, coin, flag, cloth, pole)
+
+def paint_mario_pattern(s):
+    pygame.draw.rect(s, 1, (0, 7, TILE, TILE))  # Body
+    pygame.draw.rect(s, 2, (3, 0, 10, 7))  # Head
+    pygame.draw.rect(s, 3, (9, 3, 2, 2))  # Eye
+    pygame.draw.rect(s, 1, (3, 0, 10, 3))  # Hat
+
+def ppu_nametable(level):
+    rows = [row[:] for row in level]
+    for y, row in enumerate(level):
+        for x, t in enumerate(row):
+            if t == 6:
+                if x + 1 < len(row) and rows[y][x+1] == 0: rows[y][x+1] = T_FLAGCLOTH
+                for py in range(y + 1, min(y + 7, len(rows))):
+                    if rows[py][x] == 0: rows[py][x] = T_POLE
+    return rows
+
+def make_ppu():
+    ppu = PPU(WIDTH, HEIGHT, TILE, BG_PAL)
+    ppu.load_bg_patterns(paint_bg_tiles())
+    ppu.add_sprite_pattern(paint_mario_pattern, (TILE, TILE + 7))
+    ppu.set_sprite_palette(0, (MARIO, SKIN, BLACK))
+    return ppu
+
+def ppu_frame(ppu, camera_x, mx, my, flicker):
+    ppu.scroll_x = int(camera_x)
+    # Flicker is a palette swap, not a redraw
+    ppu.set_color(SPR_PAL + 1, MARIO if flicker % 8 < 5 else (180,30,30))
+    ppu.clear_oam()
+    ppu.push_sprite(int(mx - camera_x), int(my) - 7, 0)
+    ppu.render(screen)
 
 def menu_screen(selected_level):
     screen.fill(SKY)
@@ -130,6 +177,7 @@ def game_over_screen():
 def main():
     selected_level = 0
     lives = 3
+    rewind = Rewind(1 << 20, FPS)  # ~1 MB: minutes of play, reused for every level
     while True:
         # --- Main Menu ---
         menu = True
@@ -150,117 +198,77 @@ def main():
 
         # --- Start Level ---
         level_start_screen(selected_level)
-        level = make_level(selected_level)
-        mx, my = 40, HEIGHT - 3 * TILE
-        vx, vy = 0, 0
-        speed = 3
-        jump = 8.5
-        gravity = 0.5
-        on_ground = False
-        coins = 0
-        camera_x = 0
-        level_w_px = len(level[0]) * TILE
-        win = False
-        timer = 999
-        timer_counter = 0
-        flicker = 0
+        run = neslevel.NesRun(selected_level, TILES_X * 3, TILES_Y, TILE, lives)
+        on_take = on_set = None
+        if USE_PPU:
+            ppu = make_ppu()
+            ppu.load_nametable(ppu_nametable(run.level))
+            on_take = lambda x, y: ppu.set_tile(x, y, 0)
+            on_set = ppu.set_tile
+        level_w_px = len(run.level[0]) * TILE
+        saved = None
+        rewind.clear()
+        gcctl.loaded()  # level built: freeze it out of later collections
         while True:
             clock.tick(FPS)
-            flicker += 1
+            gcctl.frame()
+            probe.poll()  # --low-latency: pump input just before it is sampled
+            budget.phase("input")
             screen.fill(SKY)
-            # Input
             keys = pygame.key.get_pressed()
-            vx = 0
-            if keys[pygame.K_LEFT]: vx = -speed
-            if keys[pygame.K_RIGHT]: vx = speed
-            if keys[pygame.K_SPACE] and on_ground:
-                vy = -jump
-                on_ground = False
-            vy += gravity
-            mx += vx
-            my += vy
-            # Camera
+            probe.sampled()
+            budget.phase("update")
+            if keys[pygame.K_r]:       # hold R to rewind, one recorded frame per frame
+                state = rewind.pop()
+                if state is not None:
+                    run.load(state, on_set)
+                outcome = None
+            else:
+                outcome = run.step(keys[pygame.K_LEFT], keys[pygame.K_RIGHT], keys[pygame.K_SPACE], FPS, on_take)
+                rewind.push(run.save())
+            lives = run.lives
+            if outcome == "gameover":
+                game_over_screen()
+                break
+            if outcome == "dead":
+                level_start_screen(selected_level)
+                continue
+            mx, my = run.mx, run.my
             camera_x = max(0, min(mx - WIDTH // 3, level_w_px - WIDTH))
-            # Bounds
-            if mx < 0: mx = 0
-            if mx > level_w_px - TILE: mx = level_w_px - TILE
-            if my > HEIGHT:
-                lives -= 1
-                if lives == 0:
-                    game_over_screen()
-                    lives = 3
-                    break
-                else:
-                    level_start_screen(selected_level)
-                    mx, my, vx, vy = 40, HEIGHT - 3 * TILE, 0, 0
-                    continue
-            # Collisions
-            on_ground = False
-            mario_rect = pygame.Rect(mx, my, TILE, TILE)
-            for y, row in enumerate(level):
-                for x, t in enumerate(row):
-                    if t in [1, 2, 3, 4]:
-                        block = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
-                        if mario_rect.colliderect(block):
-                            if vy > 0:
-                                my = block.top - TILE
-                                vy = 0
-                                on_ground = True
-                            elif vy < 0:
-                                my = block.bottom
-                                vy = 1
-            # Coin
-            for y, row in enumerate(level):
-                for x, t in enumerate(row):
-                    if t == 5:
-                        coin_rect = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
-                        if mario_rect.colliderect(coin_rect):
-                            level[y][x] = 0
-                            coins += 1
-            # Flag
-            for y, row in enumerate(level):
-                for x, t in enumerate(row):
-                    if t == 6:
-                        flag_rect = pygame.Rect(x * TILE, y * TILE, TILE, TILE * 7)
-                        if mario_rect.colliderect(flag_rect):
-                            win = True
-            # Timer
-            timer_counter += 1
-            if timer_counter >= FPS:
-                timer -= 1
-                timer_counter = 0
-                if timer == 0:
-                    lives -= 1
-                    if lives == 0:
-                        game_over_screen()
-                        lives = 3
-                        break
-                    else:
-                        level_start_screen(selected_level)
-                        mx, my, vx, vy, timer = 40, HEIGHT - 3 * TILE, 0, 0, 999
-                        continue
-
             # Draw
-            draw_level(level, camera_x)
-            draw_mario(mx - camera_x, my, flicker)
-            nes_hud(lives, coins, selected_level, timer)
+            budget.phase("draw")
+            if USE_PPU:
+                ppu_frame(ppu, camera_x, mx, my, run.flicker)
+            else:
+                draw_level(run.level, camera_x)
+                draw_mario(mx - camera_x, my, run.flicker)
+            nes_hud(lives, run.coins, selected_level, run.timer)
             scanlines()
-            if win:
+            if outcome == "win":
                 msg = bigfont.render("LEVEL CLEAR!", True, COIN)
                 screen.blit(msg, (WIDTH // 2 - msg.get_width() // 2, 140))
                 pygame.display.flip()
+                probe.presented()
                 pygame.time.wait(1200)
                 break
+            budget.phase("present")
             pygame.display.flip()
-            for event in pygame.event.get():
+            probe.presented()
+            gcctl.idle()  # --gc-manual: collect young gens in the frame's slack
+            for event in probe.events():
                 if event.type == pygame.QUIT:
                     pygame.quit(); sys.exit()
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         break
+                    if event.key == pygame.K_F5:    # quick save / load
+                        saved = run.save()
+                    elif event.key == pygame.K_F9 and saved:
+                        run.load(saved, on_set)
             else:
                 continue
             break
+        gcctl.transition()
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,12 @@
 import pygame
 import sys
 import random
+from neslevel import Collectibles
+from present import Presenter
+from fixphys import FIX, to_fix, px, fall, collide_y
+from latency import LatencyProbe
+from gcpause import GCControl
+from allocbudget import AllocBudget
 
 pygame.init()
 
@@ -9,10 +15,14 @@ TILE = 16
 TILES_X = WIDTH // TILE
 TILES_Y = HEIGHT // TILE
 
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+display = Presenter.from_argv((WIDTH, HEIGHT))  # native target, integer-scaled to the display
+screen = display.target
 pygame.display.set_caption("Fake NES Mario Engine - 32 Levels")
 clock = pygame.time.Clock()
+probe = LatencyProbe.from_argv()  # --low-latency / --latency / --latency-probe
 FPS = 60
+gcctl = GCControl.from_argv(FPS)  # --gc-freeze / --gc-manual / --gc-log
+budget = AllocBudget.from_argv()  # --alloc: per-phase allocation accounting
 
 # NES-style palette
 SKY = (92, 148, 252)
@@ -58,30 +68,39 @@ def make_level(level_idx):
         level[cy][cx] = 5
     # Flag
     level[2][TILES_X * 3 - 3] = 6
-    return level
+    return level, Collectibles(level, TILE, 6)
+
+# Per tile id: (colour, rect, dx, dy, border) parts. draw_level moves these rects
+# into place instead of building a rect tuple for every tile every frame.
+TILE_PARTS = {
+    1: ((GROUND, pygame.Rect(0, 0, TILE, TILE), 0, 0, 0),),
+    2: ((BRICK, pygame.Rect(0, 0, TILE, TILE), 0, 0, 0),
+        (BLACK, pygame.Rect(0, 0, TILE - 4, TILE - 4), 2, 2, 1)),
+    3: ((BLOCK, pygame.Rect(0, 0, TILE, TILE), 0, 0, 0),
+        (WHITE, pygame.Rect(0, 0, 6, 6), 5, 5, 0)),
+    4: ((PIPE, pygame.Rect(0, 0, TILE, TILE * 2), 0, 0, 0),
+        (WHITE, pygame.Rect(0, 0, TILE, 3), 0, 0, 0)),
+    6: ((FLAG, pygame.Rect(0, 0, 3, TILE * 6), TILE // 2 - 1, 0, 0),
+        (WHITE, pygame.Rect(0, 0, 10, 10), TILE // 2 + 3, 0, 0)),
+}
+COIN_AT = [0, 0]  # coin centre, moved per coin
 
 def draw_level(level, camera_x):
+    cols = range(max(0, -((TILE - camera_x) // TILE)), min(len(level[0]), (camera_x + WIDTH) // TILE + 1))
     for y, row in enumerate(level):
-        for x, tile in enumerate(row):
-            sx = x * TILE - camera_x
-            sy = y * TILE
-            if sx < -TILE or sx > WIDTH: continue
-            if tile == 1:  # Ground
-                pygame.draw.rect(screen, GROUND, (sx, sy, TILE, TILE))
-            elif tile == 2:  # Brick
-                pygame.draw.rect(screen, BRICK, (sx, sy, TILE, TILE))
-                pygame.draw.rect(screen, BLACK, (sx + 2, sy + 2, TILE - 4, TILE - 4), 1)
-            elif tile == 3:  # Block
-                pygame.draw.rect(screen, BLOCK, (sx, sy, TILE, TILE))
-                pygame.draw.rect(screen, WHITE, (sx + 5, sy + 5, 6, 6))
-            elif tile == 4:  # Pipe
-                pygame.draw.rect(screen, PIPE, (sx, sy, TILE, TILE * 2))
-                pygame.draw.rect(screen, WHITE, (sx, sy, TILE, 3))
-            elif tile == 5:  # Coin
-                pygame.draw.circle(screen, COIN, (sx + TILE // 2, sy + TILE // 2), TILE // 4)
-            elif tile == 6:  # Flag
-                pygame.draw.rect(screen, FLAG, (sx + TILE // 2 - 1, sy, 3, TILE * 6))
-                pygame.draw.rect(screen, WHITE, (sx + TILE // 2 + 3, sy, 10, 10))
+        sy = y * TILE
+        for x in cols:
+            tile = row[x]
+            if tile == 5:  # Coin
+                COIN_AT[0], COIN_AT[1] = x * TILE - camera_x + TILE // 2, sy + TILE // 2
+                pygame.draw.circle(screen, COIN, COIN_AT, TILE // 4)
+            elif tile:
+                sx = x * TILE - camera_x
+                for color, r, dx, dy, border in TILE_PARTS[tile]:
+                    r.x, r.y = sx + dx, sy + dy
+                    pygame.draw.rect(screen, color, r, border)
+
+HUD = [None] * 3  # coins, level, rendered line: re-rendered only when a value changes
 
 def draw_mario(mx, my):
     pygame.draw.rect(screen, MARIO, (mx, my, TILE, TILE))  # Body
@@ -96,7 +115,7 @@ def menu_screen(selected_level):
     screen.blit(info, (WIDTH // 2 - info.get_width() // 2, 120))
     levtxt = font.render(f"Level {selected_level + 1}/32", True, COIN)
     screen.blit(levtxt, (WIDTH // 2 - levtxt.get_width() // 2, 180))
-    pygame.display.flip()
+    display.flip()
 
 def main():
     selected_level = 0
@@ -118,37 +137,45 @@ def main():
                     elif event.key == pygame.K_RETURN:
                         menu = False
         # --- Load Level ---
-        level = make_level(selected_level)
-        mx, my = 40, HEIGHT - 3 * TILE
+        level, items = make_level(selected_level)
+        mx, fy = 40, (HEIGHT - 3 * TILE) * FIX   # fy/vy are fixed-point (fixphys), my = px(fy)
+        my = px(fy)
         vx, vy = 0, 0
         speed = 3
-        jump = 8.5
-        gravity = 0.5
+        jump = to_fix(8.5)
+        gravity = to_fix(0.5)
         on_ground = False
         coins = 0
         camera_x = 0
         level_w_px = len(level[0]) * TILE
         win = False
+        gcctl.loaded()  # level built: freeze it out of later collections
         while True:
             clock.tick(FPS)
+            gcctl.frame()
+            probe.poll()  # --low-latency: pump input just before it is sampled
+            budget.phase("input")
             screen.fill(SKY)
             # Handle input
             keys = pygame.key.get_pressed()
+            probe.sampled()
+            budget.phase("update")
             vx = 0
             if keys[pygame.K_LEFT]: vx = -speed
             if keys[pygame.K_RIGHT]: vx = speed
             if keys[pygame.K_SPACE] and on_ground:
                 vy = -jump
                 on_ground = False
-            vy += gravity
+            vy = fall(vy, gravity)
             mx += vx
-            my += vy
+            fy += vy
+            my = px(fy)
             # Camera follow
             camera_x = max(0, min(mx - WIDTH // 3, level_w_px - WIDTH))
             # Keep Mario in bounds
             if mx < 0: mx = 0
             if mx > level_w_px - TILE: mx = level_w_px - TILE
-            if my > HEIGHT: my = HEIGHT - 3 * TILE  # Reset if fall
+            if my > HEIGHT: my = HEIGHT - 3 * TILE; fy = my * FIX  # Reset if fall
             # Collisions (solid tiles)
             on_ground = False
             mario_rect = pygame.Rect(mx, my, TILE, TILE)
@@ -157,49 +184,43 @@ def main():
                     if t in [1, 2, 3, 4]:
                         block = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
                         if mario_rect.colliderect(block):
-                            if vy > 0:
-                                my = block.top - TILE
-                                vy = 0
-                                on_ground = True
-                            elif vy < 0:
-                                my = block.bottom
-                                vy = 1
-            # Coin collision
-            for y, row in enumerate(level):
-                for x, t in enumerate(row):
-                    if t == 5:
-                        coin_rect = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
-                        if mario_rect.colliderect(coin_rect):
-                            level[y][x] = 0
-                            coins += 1
-            # Flag collision
-            for y, row in enumerate(level):
-                for x, t in enumerate(row):
-                    if t == 6:
-                        flag_rect = pygame.Rect(x * TILE, y * TILE, TILE, TILE * 6)
-                        if mario_rect.colliderect(flag_rect):
-                            win = True
+                            fy, vy, landed = collide_y(fy, vy, TILE, block.top, block.bottom, bonk_vy=FIX)
+                            if landed: on_ground = True
+            my = px(fy)
+            # Coin & flag collision: only the tiles under Mario
+            coins += items.take_coins(level, mario_rect)
+            if items.at_flag(mario_rect):
+                win = True
             # Draw everything
+            budget.phase("draw")
             draw_level(level, camera_x)
             draw_mario(mx - camera_x, my)
-            hud = font.render(f"Coins: {coins} | Esc: Menu | Level {selected_level + 1}/32", True, WHITE)
-            screen.blit(hud, (8, 8))
+            if HUD[0] != coins or HUD[1] != selected_level:
+                HUD[:] = coins, selected_level, font.render(f"Coins: {coins} | Esc: Menu | Level {selected_level + 1}/32", True, WHITE)
+            screen.blit(HUD[2], (8, 8))
             if win:
                 wintext = bigfont.render("LEVEL CLEAR!", True, COIN)
                 screen.blit(wintext, (WIDTH // 2 - wintext.get_width() // 2, 150))
-                pygame.display.flip()
+                display.flip()
+                probe.presented()
                 pygame.time.wait(1200)
                 break
-            pygame.display.flip()
-            for event in pygame.event.get():
+            budget.phase("present")
+            display.flip()
+            probe.presented()
+            gcctl.idle()  # --gc-manual: collect young gens in the frame's slack
+            for event in probe.events():
                 if event.type == pygame.QUIT:
                     pygame.quit(); sys.exit()
                 if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_F2:
+                        display.post.cycle()  # swap HDR grade at runtime
                     if event.key == pygame.K_ESCAPE:
                         break
             else:
                 continue
             break  # If Esc, go back to menu
+        gcctl.transition()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,167 @@
+import gc
+import os
+import sys
+import tracemalloc
+
+# -------------------------------------------------------------
+#  PER-FRAME ALLOCATION BUDGET (--alloc)
+#  tracemalloc accounting split by frame phase. The game marks the
+#  phases in its loop:
+#
+#    tick; budget.phase("input"); keys = ...; budget.phase("update")
+#    ... simulate ...; budget.phase("draw"); ... draw ...
+#    budget.phase("present"); flip; events
+#
+#  For each phase: bytes still held when it ends (retained), the
+#  high-water of short-lived allocations inside it (transient), and
+#  the net change in GC-tracked objects -- gen 0 only collects when
+#  that net count crosses its threshold, so gameplay that retains
+#  nothing frame over frame never triggers a GC pause. (The cyclic
+#  GC is off while measuring so that count only moves with
+#  allocations.) Every SAMPLE frames a snapshot diff names the lines
+#  in this repo that retained memory since the last sample.
+#
+#  python allocbudget.py check [ENGINE ...]   (golden.py engine names)
+#    plays WARMUP frames under golden.py's scripted driver, then
+#    fails if the measured frames retain memory or GC objects overall,
+#    or a phase's transient high-water goes over its BUDGETS entry.
+# -------------------------------------------------------------
+PHASES = ("input", "update", "draw", "present")
+WARMUP = 120
+MEASURE = 360
+SAMPLE = 60
+BUDGETS = {                    # engine -> transient bytes allowed per phase
+    "smb-ppu": {"input": 256, "update": 512, "draw": 1024, "present": 1024},
+    "smb-gpt415": {"input": 256, "update": 512, "draw": 1024, "present": 1024},
+    "smb-gpt41": {"input": 256, "update": 512, "draw": 1024, "present": 1024},
+    "smb4k2": {"input": 256, "update": 512, "draw": 1024, "present": 1024},
+    "deltamario": {"input": 256, "update": 512, "draw": 1024, "present": 1024},
+    "smw-build1": {"input": 256, "update": 512, "draw": 1024, "present": 1024},
+    # ECS systems run on NumPy: every vectorized call holds a ~3 KB work buffer while it runs
+    "smw-1.0a": {"input": 256, "update": 4096, "draw": 4096, "present": 1024},
+}
+current = None                 # the budget the running game made with --alloc
+REPO = tracemalloc.Filter(True, os.path.join(os.path.dirname(os.path.abspath(__file__)), "*"))
+
+
+class PhaseStats:
+    __slots__ = ("retained", "transient", "objects")
+
+    def __init__(s):
+        s.retained = s.transient = s.objects = 0
+
+
+class AllocBudget:
+    __slots__ = ("on", "warmup", "frame", "name", "base", "gc0", "stats", "held", "objects",
+                 "retaining", "worst", "snap", "lines")
+
+    def __init__(s, on=False, warmup=WARMUP):
+        s.on, s.warmup = on, warmup
+        s.frame, s.name, s.base, s.gc0 = 0, None, 0, 0
+        s.stats = {p: PhaseStats() for p in PHASES}
+        s.held = s.objects = 0                     # this frame's net bytes / GC objects so far
+        s.retaining = s.worst = 0                  # frames that ended up holding more; most held
+        s.snap, s.lines = None, {}
+        if on:
+            global current
+            current = s
+            tracemalloc.start(1)
+            gc.disable()                           # so gen 0's count only moves with allocations
+
+    @classmethod
+    def from_argv(cls, argv=None):
+        argv = sys.argv if argv is None else argv
+        return cls("--alloc" in argv)
+
+    def phase(s, name):
+        """End the running phase and start `name`; "input" also starts a frame."""
+        if not s.on:
+            return
+        cur, peak = tracemalloc.get_traced_memory()
+        gc0 = gc.get_count()[0]
+        if s.name is not None and s.frame > s.warmup:
+            st = s.stats[s.name]
+            st.retained += cur - s.base
+            st.transient = max(st.transient, peak - s.base)
+            st.objects += gc0 - s.gc0
+            s.held += cur - s.base
+            s.objects += gc0 - s.gc0
+        if name == PHASES[0] and s._frame_done():
+            cur, gc0 = tracemalloc.get_traced_memory()[0], gc.get_count()[0]   # skip the snapshot
+        tracemalloc.reset_peak()
+        s.name, s.base, s.gc0 = name, cur, gc0     # one reading per boundary: the probe's own
+                                                   # temporaries cancel out instead of drifting
+
+    def _frame_done(s):
+        if s.frame > s.warmup:
+            if s.held > 0 or s.objects > 0:
+                s.retaining += 1
+            s.worst = max(s.worst, s.held)
+            s.held = s.objects = 0
+        s.frame += 1
+        if s.frame <= s.warmup or s.frame % SAMPLE:
+            return False
+        snap = tracemalloc.take_snapshot().filter_traces((REPO, tracemalloc.Filter(False, __file__)))
+        if s.snap is not None:
+            for d in snap.compare_to(s.snap, "lineno"):
+                if d.size_diff > 0:
+                    key = str(d.traceback)
+                    s.lines[key] = s.lines.get(key, 0) + d.size_diff
+        s.snap = snap
+        return True
+
+    # ---------------------------------------------------------
+    def measured(s):
+        return max(0, s.frame - s.warmup - 1)
+
+    def report(s):
+        n = s.measured()
+        lines = ["allocations over %d frames (after %d warm-up): %d frames held more at the end,"
+                 " worst +%d B" % (n, s.warmup, s.retaining, s.worst),
+                 "  phase      retained B/frame  transient max B  GC objects/frame"]
+        for p in PHASES:
+            st = s.stats[p]
+            lines.append("  %-9s %16.1f %16d %17.2f" % (
+                p, st.retained / max(n, 1), st.transient, st.objects / max(n, 1)))
+        top = sorted(s.lines.items(), key=lambda kv: -kv[1])[:8]
+        if top:
+            lines.append("  retained by line (sampled every %d frames):" % SAMPLE)
+            lines += ["    %8d B  %s" % (size, where) for where, size in top]
+        return "\n".join(lines)
+
+    def violations(s, budget):
+        out = []
+        held = sum(st.retained for st in s.stats.values())
+        objects = sum(st.objects for st in s.stats.values())
+        if held > 0 or objects > 0:
+            out.append("gameplay retains %d B and %d GC objects over %d frames" % (held, objects, s.measured()))
+        for p in PHASES:
+            st = s.stats[p]
+            if st.transient > budget[p]:
+                out.append("%s transient high-water %d B > budget %d B" % (p, st.transient, budget[p]))
+        return out
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] != "check":
+        print("usage: allocbudget.py check [ENGINE ...]   engines: " + " ".join(BUDGETS))
+        return 2
+    import golden
+    import pygame
+    pygame.init()
+    ok = True
+    for name in argv[2:] or list(BUDGETS):
+        golden.run(name, WARMUP + MEASURE + 1, lambda n, surf: None, argv=["--alloc"])
+        budget = sys.modules["allocbudget"].current    # the game imported this file as a module
+        tracemalloc.stop()
+        bad = budget.violations(BUDGETS[name])
+        print("%s: %s" % (name, "ok" if not bad else "FAILED"))
+        print(budget.report())
+        for b in bad:
+            print("  over budget: " + b)
+        ok &= not bad
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,50 @@
+import numpy as np
+
+# -------------------------------------------------------------
+#  SCROLLING CAMERA + VIEW CULLING
+#  Camera maps world space to screen space and follows a target,
+#  clamped to the level bounds. XIndex keeps boxes sorted by left
+#  edge so the ones inside a view span are found with two binary
+#  searches -- draw cost tracks what is on screen, not level size.
+# -------------------------------------------------------------
+class Camera:
+    __slots__ = ("w", "h", "x", "y", "world_w", "world_h")
+
+    def __init__(s, view, world=None):
+        s.w, s.h = view
+        s.x = s.y = 0
+        s.world_w, s.world_h = world or view
+
+    def set_world(s, w, h):
+        s.world_w, s.world_h = max(w, s.w), max(h, s.h)
+        s.x = s.y = 0
+
+    def follow(s, x, y):
+        """Centre on world point (x, y), clamped so the view stays inside the level."""
+        s.x = min(max(int(x) - s.w // 2, 0), s.world_w - s.w)
+        s.y = min(max(int(y) - s.h // 2, 0), s.world_h - s.h)
+
+    def to_screen(s, x, y): return x - s.x, y - s.y
+    def to_world(s, x, y): return x + s.x, y + s.y
+
+    @property
+    def view(s): return (s.x, s.y, s.w, s.h)
+
+
+class XIndex:
+    """Static boxes sorted by left edge; visible() answers an x-span query."""
+    __slots__ = ("left", "right", "keys", "reach")
+
+    def __init__(s, keys, xs, ws):
+        xs = np.asarray(xs, np.int64)
+        order = np.argsort(xs, kind="stable")
+        s.left = xs[order]
+        s.right = s.left + np.asarray(ws, np.int64)[order]
+        s.keys = np.asarray(keys, np.int64)[order]
+        s.reach = int((s.right - s.left).max()) if len(order) else 0   # widest box
+
+    def visible(s, x0, x1):
+        """Keys whose [left, right) overlaps [x0, x1), in left-edge order."""
+        lo = np.searchsorted(s.left, x0 - s.reach, "right")
+        hi = np.searchsorted(s.left, x1, "left")
+        return s.keys[lo:hi][s.right[lo:hi] > x0]
@@ -0,0 +1,163 @@
+import os
+import sys
+import zlib
+import struct
+import subprocess
+import numpy as np
+from multiprocessing import shared_memory
+
+# -------------------------------------------------------------
+#  GAMEPLAY CAPTURE ON A BACKGROUND PROCESS
+#  Each frame is one memcpy of the surface into a slot of a
+#  shared-memory ring plus an 8-byte note down a pipe; a separate
+#  writer process compresses and writes it. If the writer falls
+#  behind and the next slot is still full, the frame is dropped --
+#  the game never waits on the disk.
+#
+#    shm: slots flag bytes (1 = full), then slots frames of h*pitch bytes
+#    pipe: "<II" slot, frame number per frame; EOF = finish
+#
+#  Formats: "zlib" -- one .cap file (header, then per frame "<II"
+#  frame number, length and zlib level-1 raw pixels); "png" -- a
+#  directory of frame_NNNNNN.png.
+#
+#  python capture.py png session.cap OUTDIR    (.cap -> PNG sequence)
+# -------------------------------------------------------------
+MAGIC = b"CAP1"
+HEADER = struct.Struct("<4sHHH4I4B")   # magic, w, h, pitch, RGBA masks, RGBA shifts
+NOTE = struct.Struct("<II")
+FRAME = struct.Struct("<II")
+
+
+class Capture:
+    __slots__ = ("surf", "slots", "size", "shm", "proc", "next", "frames", "dropped", "_head")
+
+    def __init__(s, surf, path, fmt="zlib", slots=8):
+        if surf.get_bytesize() != 4:
+            raise ValueError("capture needs a 32-bit surface")
+        w, h = surf.get_size()
+        s.surf, s.slots, s.size = surf, slots, h * surf.get_pitch()
+        s._head = HEADER.pack(MAGIC, w, h, surf.get_pitch(), *surf.get_masks(), *surf.get_shifts())
+        s.shm = shared_memory.SharedMemory(create=True, size=slots + slots * s.size)
+        s.shm.buf[:slots] = bytes(slots)
+        s.proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "_writer", s.shm.name,
+                                   str(slots), s._head.hex(), fmt, path], stdin=subprocess.PIPE)
+        s.next = s.frames = s.dropped = 0
+
+    def grab(s):
+        """Call after display.flip(): one copy into the ring, or a dropped frame."""
+        s.frames += 1
+        buf, i = s.shm.buf, s.next
+        if buf[i]:
+            s.dropped += 1
+            return
+        off = s.slots + i * s.size
+        view = s.surf.get_buffer()             # raw pixel bytes; locks the surface until released
+        buf[off:off + s.size] = view
+        del view
+        buf[i] = 1
+        os.write(s.proc.stdin.fileno(), NOTE.pack(i, s.frames))
+        s.next = (i + 1) % s.slots
+
+    def close(s):
+        if s.proc is None:
+            return "capture: closed"
+        s.proc.stdin.close()
+        s.proc.wait()
+        s.shm.close()
+        s.shm.unlink()
+        s.proc = None
+        return "capture: %d frames, %d dropped" % (s.frames, s.dropped)
+
+
+# -------------------------------------------------------------
+#  WRITER PROCESS
+# -------------------------------------------------------------
+def to_rgb(raw, head):
+    _, w, h, pitch, rm, gm, bm, _, rs, gs, bs, _ = HEADER.unpack(head)
+    px = np.frombuffer(raw, np.uint32, h * pitch // 4).reshape(h, pitch // 4)[:, :w]
+    rgb = np.empty((h, w, 3), np.uint8)
+    for c, (m, sh) in enumerate(((rm, rs), (gm, gs), (bm, bs))):
+        rgb[..., c] = (px & m) >> sh
+    return rgb
+
+
+def png_bytes(rgb, level=1):
+    h, w, _ = rgb.shape
+    rows = np.zeros((h, w * 3 + 1), np.uint8)  # filter byte 0 per row
+    rows[:, 1:] = rgb.reshape(h, w * 3)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(rows.tobytes(), level)) + chunk(b"IEND", b""))
+
+
+def _writer(shm_name, slots, head, fmt, path):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:                                       # the game owns (and unlinks) the segment
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    _, w, h, pitch = HEADER.unpack(head)[:4]
+    size = h * pitch
+    out = None
+    if fmt == "png":
+        os.makedirs(path, exist_ok=True)
+    else:
+        out = open(path, "wb")
+        out.write(head)
+    pipe = sys.stdin.buffer
+    while True:
+        note = pipe.read(NOTE.size)
+        if len(note) < NOTE.size:
+            break
+        i, frame = NOTE.unpack(note)
+        off = slots + i * size
+        raw = bytes(shm.buf[off:off + size])
+        shm.buf[i] = 0                         # slot is free as soon as it is copied out
+        if out is not None:
+            data = zlib.compress(raw, 1)
+            out.write(FRAME.pack(frame, len(data)) + data)
+        else:
+            with open(os.path.join(path, "frame_%06d.png" % frame), "wb") as f:
+                f.write(png_bytes(to_rgb(raw, head)))
+    if out is not None:
+        out.close()
+    shm.close()
+
+
+def read_frames(path):
+    """Yield (frame number, (h, w, 3) RGB array) from a .cap file."""
+    with open(path, "rb") as f:
+        head = f.read(HEADER.size)
+        if HEADER.unpack(head)[0] != MAGIC:
+            raise ValueError("%s: not a capture file" % path)
+        while True:
+            rec = f.read(FRAME.size)
+            if len(rec) < FRAME.size:
+                return
+            frame, n = FRAME.unpack(rec)
+            yield frame, to_rgb(zlib.decompress(f.read(n)), head)
+
+
+def main(argv):
+    if len(argv) == 7 and argv[1] == "_writer":
+        _writer(argv[2], int(argv[3]), bytes.fromhex(argv[4]), argv[5], argv[6])
+    elif len(argv) == 4 and argv[1] == "png":
+        os.makedirs(argv[3], exist_ok=True)
+        n = 0
+        for frame, rgb in read_frames(argv[2]):
+            with open(os.path.join(argv[3], "frame_%06d.png" % frame), "wb") as f:
+                f.write(png_bytes(rgb, 6))
+            n += 1
+        print("%s: %d frames -> %s" % (argv[2], n, argv[3]))
+    else:
+        print("usage: capture.py png CAPFILE OUTDIR")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
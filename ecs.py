@@ -0,0 +1,177 @@
+import struct
+import numpy as np
+
+# -------------------------------------------------------------
+#  ENTITY-COMPONENT-SYSTEM CORE
+#  Components are parallel NumPy arrays indexed by entity id; a
+#  bitmask per entity says which ones it has. Systems ask for a
+#  mask and get back a cached id array, so they only ever touch
+#  entities that have every component they need and do it in a
+#  handful of vectorized operations.
+# -------------------------------------------------------------
+POS, VEL, COLLIDER, RENDER, AI, SOLID, TRIGGER = (1 << i for i in range(7))
+
+AI_NONE, AI_WALK_LEFT, AI_WALK_RIGHT = range(3)
+AI_SPEED = np.array([0.0, -1.0, 1.0])  # x velocity each AI kind drives
+
+
+class World:
+    def __init__(s, capacity=256):
+        # Re-running __init__ on a pooled World keeps its arrays and just empties them
+        if getattr(s, "capacity", -1) < capacity:
+            s.capacity = capacity
+            s.mask = np.zeros(capacity, np.uint16)
+            s.pos = np.zeros((capacity, 2))
+            s.vel = np.zeros((capacity, 2))
+            s.size = np.zeros((capacity, 2))
+            s.ai = np.zeros(capacity, np.int8)
+            s._snap = (s.mask.copy(), s.pos.copy(), s.vel.copy(), s.ai.copy())
+            s.sprite = [None] * capacity   # renderable: any per-entity draw handle
+            s.kind = [None] * capacity     # free-form tag (e.g. "goomba")
+            s.blit = [[None, [0, 0]] for _ in range(capacity)]   # render_system's reused blit entries
+        else:
+            n = s.count                    # drop the previous level's draw handles and tags
+            s.sprite[:n] = s.kind[:n] = [None] * n
+            for b in s.blit[:n]:
+                b[0] = None
+        s.mask[:] = 0
+        s._snap[0][:] = 0                  # reset() before any snapshot() empties the world
+        s.count = 0
+        s._free = []
+        s._free_snap, s._count_snap = [], 0
+        s._queries = {}
+
+    def spawn(s, mask, pos=(0, 0), vel=(0, 0), size=(0, 0), sprite=None, ai=AI_NONE, kind=None):
+        if s._free:
+            e = s._free.pop()
+        else:
+            e = s.count
+            if e >= s.capacity:
+                s._grow(2 * s.capacity)
+            s.count += 1
+        s.mask[e] = mask
+        s.pos[e] = pos; s.vel[e] = vel; s.size[e] = size
+        s.ai[e] = ai
+        s.sprite[e], s.kind[e] = sprite, kind
+        s._queries.clear()
+        return e
+
+    def _grow(s, capacity):
+        """Reallocate every per-entity array at the new capacity, keeping the live
+        and snapshot contents; ids and the free lists stay valid."""
+        capacity = max(capacity, 1)
+        def grown(a):
+            b = np.zeros((capacity,) + a.shape[1:], a.dtype)
+            b[:len(a)] = a
+            return b
+        s.mask, s.pos, s.vel, s.size, s.ai = map(grown, (s.mask, s.pos, s.vel, s.size, s.ai))
+        s._snap = tuple(map(grown, s._snap))
+        s.sprite += [None] * (capacity - s.capacity)
+        s.kind += [None] * (capacity - s.capacity)
+        s.blit += [[None, [0, 0]] for _ in range(capacity - s.capacity)]
+        s.capacity = capacity
+
+    def kill(s, e):
+        s.mask[e] = 0
+        s._free.append(e)
+        s._queries.clear()
+
+    def query(s, m):
+        ids = s._queries.get(m)
+        if ids is None:
+            ids = s._queries[m] = np.flatnonzero((s.mask[:s.count] & m) == m)
+        return ids
+
+    # ---------------------------------------------------------
+    #  SPAWN SNAPSHOT: reset() puts every entity back in place
+    # ---------------------------------------------------------
+    def snapshot(s):
+        for dst, src in zip(s._snap, (s.mask, s.pos, s.vel, s.ai)):
+            np.copyto(dst, src)
+        s._free_snap, s._count_snap = list(s._free), s.count
+
+    def reset(s):
+        for src, dst in zip(s._snap, (s.mask, s.pos, s.vel, s.ai)):
+            np.copyto(dst, src)
+        s._free[:] = s._free_snap
+        s.count = s._count_snap
+        s._queries.clear()
+
+    def unspawn(s, e):
+        """Remove e live and from the spawn snapshot (a level edit, not a death)."""
+        s.kill(e)
+        s._snap[0][e] = 0
+        s._free_snap.append(e)
+
+    def keep(s, e):
+        """Make e's live components its spawn state, so reset() keeps a level edit.
+        unspawn(e) then spawn() reuses e, so an edited entity keeps its id."""
+        for dst, src in zip(s._snap, (s.mask, s.pos, s.vel, s.ai)):
+            dst[e] = src[e]
+        if e in s._free_snap:
+            s._free_snap.remove(e)
+        s._count_snap = max(s._count_snap, s.count)
+
+    def spawn_pos(s, ids):
+        """Where ids start from on reset() (the snapshot's positions)."""
+        return s._snap[1][ids]
+
+    # ---------------------------------------------------------
+    #  SAVE STATES: the mutable components of the live ids as bytes
+    #  (size/sprite/kind are fixed at spawn and rebuilt with the level)
+    # ---------------------------------------------------------
+    def save(s):
+        n = s.count
+        return b"".join((struct.pack("<HH%dH" % len(s._free), n, len(s._free), *s._free),
+                         s.mask[:n].tobytes(), s.pos[:n].tobytes(), s.vel[:n].tobytes(), s.ai[:n].tobytes()))
+
+    def load(s, buf, off=0):
+        """Restore a save() blob found at buf[off:]; returns the offset just past it."""
+        n, nfree = struct.unpack_from("<HH", buf, off)
+        if n > s.capacity:
+            s._grow(n)
+        s._free[:] = struct.unpack_from("<%dH" % nfree, buf, off + 4)
+        off += 4 + 2 * nfree
+        for arr in (s.mask, s.pos, s.vel, s.ai):
+            part = arr[:n]
+            part[...] = np.frombuffer(buf, arr.dtype, part.size, off).reshape(part.shape)
+            off += part.nbytes
+        s.mask[n:] = 0
+        s.count = n
+        s._queries.clear()
+        return off
+
+    def overlaps(s, m, rect):
+        """Ids with mask m whose (int-truncated) box overlaps rect (x, y, w, h)."""
+        ids = s.query(m)
+        x, y, w, h = rect
+        p = s.pos[ids].astype(np.int64)
+        z = s.size[ids].astype(np.int64)
+        hit = (x < p[:, 0] + z[:, 0]) & (p[:, 0] < x + w) & (y < p[:, 1] + z[:, 1]) & (p[:, 1] < y + h)
+        return ids[hit]
+
+
+# -------------------------------------------------------------
+#  SYSTEMS
+# -------------------------------------------------------------
+def ai_system(w):
+    ids = w.query(AI | VEL)
+    w.vel[ids, 0] = AI_SPEED[w.ai[ids]]
+
+
+def movement_system(w):
+    ids = w.query(POS | VEL)
+    w.pos[ids] += w.vel[ids]
+
+
+def render_system(w, surf, ids=None, ox=0, oy=0):
+    if ids is None:
+        ids = w.query(POS | RENDER)
+    pos, sprite, blit = w.pos, w.sprite, w.blit
+    ids = ids.tolist()
+    for e in ids:                      # fill the entities' own entries: no tuples per frame
+        b = blit[e]
+        b[0] = sprite[e]
+        d = b[1]
+        d[0], d[1] = int(pos[e, 0]) - ox, int(pos[e, 1]) - oy
+    surf.blits([blit[e] for e in ids], False)
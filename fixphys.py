@@ -0,0 +1,83 @@
+import numpy as np
+
+# -------------------------------------------------------------
+#  INTEGER FIXED-POINT PHYSICS KERNEL
+#  Positions and velocities are ints in 1/FIX pixel units, so every
+#  step is plain integer arithmetic and comes out bit-identical on
+#  every machine -- the base for replays and batch simulation.
+#  Each step has a scalar form for one actor and an _n form that
+#  does the same thing in place over NumPy int arrays.
+# -------------------------------------------------------------
+FIX = 256                              # 1px = 256 units
+NEVER = 1 << 30                        # tolerance that always passes
+
+
+def to_fix(v):
+    """Tuning constant in pixels -> fixed-point (truncated, as the engines always did)."""
+    return int(v * FIX)
+
+
+def px(v):
+    """Fixed-point -> whole pixels (floors, like v // FIX)."""
+    return v // FIX
+
+
+# -------------------------------------------------------------
+#  SCALAR
+# -------------------------------------------------------------
+def accelerate(vx, ax, fric, max_vx):
+    """Add ax; with no input, bleed fric toward 0 without crossing it; clamp to +-max_vx."""
+    vx += ax
+    if ax == 0:
+        if vx > 0: vx = max(0, vx - fric)
+        elif vx < 0: vx = min(0, vx + fric)
+    return max(-max_vx, min(max_vx, vx))
+
+
+def fall(vy, grav, max_vy=NEVER):
+    return min(vy + grav, max_vy)
+
+
+def collide_y(y, vy, h, top, bottom, tol=NEVER, bonk_vy=0):
+    """Resolve an overlap with a solid spanning pixel rows [top, bottom).
+
+    Falling onto it within tol px of its top lands (returns on_ground True);
+    rising into it within tol px of its bottom snaps under it with vy = bonk_vy.
+    Returns (y, vy, on_ground).
+    """
+    yp = y // FIX
+    if vy > 0 and yp + h - top < tol:
+        return (top - h) * FIX, 0, True
+    if vy < 0 and bottom - yp < tol:
+        return bottom * FIX, bonk_vy, False
+    return y, vy, False
+
+
+# -------------------------------------------------------------
+#  BATCHED (in place over int arrays; same results as the scalar forms)
+# -------------------------------------------------------------
+def accelerate_n(vx, ax, fric, max_vx):
+    vx += ax
+    idle = ax == 0
+    np.copyto(vx, np.maximum(vx - fric, 0), where=idle & (vx > 0))
+    np.copyto(vx, np.minimum(vx + fric, 0), where=idle & (vx < 0))
+    np.clip(vx, -max_vx, max_vx, out=vx)
+    return vx
+
+
+def fall_n(vy, grav, max_vy=NEVER):
+    vy += grav
+    np.minimum(vy, max_vy, out=vy)
+    return vy
+
+
+def collide_y_n(y, vy, h, top, bottom, hit, tol=NEVER, bonk_vy=0):
+    """collide_y for every actor where hit is True; returns the on_ground mask."""
+    yp = y // FIX
+    land = hit & (vy > 0) & (yp + h - top < tol)
+    bonk = hit & ~land & (vy < 0) & (bottom - yp < tol)
+    np.copyto(y, (top - h) * FIX, where=land)
+    np.copyto(y, bottom * FIX, where=bonk)
+    vy[land] = 0
+    vy[bonk] = bonk_vy
+    return land
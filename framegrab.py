@@ -0,0 +1,101 @@
+import sys
+import numpy as np
+import pygame
+
+# -------------------------------------------------------------
+#  FRAME EXPORT (for agents / video analytics)
+#  The back buffer is read through a surfarray view -- no full
+#  RGB copy. Downsampling is a strided view of that view, and
+#  grayscale is integer maths into preallocated buffers, so a grab
+#  writes only the small output frame. FrameStack keeps the last
+#  n outputs in one ring array.
+#
+#  Views lock the surface and SDL refuses to blit onto a locked
+#  surface, so a view never outlives the call that made it.
+#
+#  python framegrab.py   self-check: blits straight after view()
+#                        and grab(), which fails if either left
+#                        the surface locked
+# -------------------------------------------------------------
+W_R, W_G, W_B = np.uint16(77), np.uint16(150), np.uint16(29)   # BT.601 luma, /256
+
+
+class FrameStack:
+    __slots__ = ("ring", "head", "count", "_order")
+
+    def __init__(s, n, shape, dtype=np.uint8):
+        s.ring = np.zeros((n,) + tuple(shape), dtype)
+        s.head = s.count = 0
+        s._order = [(h + np.arange(n)) % n for h in range(n)]   # oldest -> newest, per head
+
+    def push(s, frame):
+        np.copyto(s.ring[s.head], frame)
+        s.head = (s.head + 1) % len(s.ring)
+        s.count = min(s.count + 1, len(s.ring))
+
+    def stacked(s, out=None):
+        """Frames oldest first as one (n, ...) array; pass out to reuse a buffer."""
+        return np.take(s.ring, s._order[s.head], axis=0, out=out)
+
+
+class FrameExport:
+    __slots__ = ("surf", "factor", "gray", "out", "stack", "_acc", "_tmp")
+
+    def __init__(s, surf, factor=1, gray=False, stack=0):
+        w, h = surf.get_size()
+        s.surf, s.factor, s.gray = surf, factor, gray
+        size = (w // factor, h // factor)      # surfarray order: x, y
+        s.out = np.zeros(size if gray else size + (3,), np.uint8)
+        s._acc = np.zeros(size, np.uint16) if gray else None
+        s._tmp = np.zeros(size, np.uint16) if gray else None
+        s.stack = FrameStack(stack, s.out.shape[1::-1] + s.out.shape[2:]) if stack else None
+
+    def view(s, fn):
+        """Return fn(v) for a zero-copy (w, h, 3) view v of the surface. The view is
+        dropped before view() returns, so fn must not keep or return it (copy out)."""
+        v = pygame.surfarray.pixels3d(s.surf)
+        try:
+            return fn(v)
+        finally:
+            del v
+            if s.surf.get_locked():
+                raise RuntimeError("surface view outlived FrameExport.view()")
+
+    def grab(s):
+        """Downsample (nearest) and optionally grayscale the current frame into the
+        reused output buffer; returns it as an (h, w[, 3]) view."""
+        f = s.factor
+        ow, oh = s.out.shape[:2]
+        v = pygame.surfarray.pixels3d(s.surf)
+        src = v[:ow * f:f, :oh * f:f]
+        if s.gray:
+            acc, tmp = s._acc, s._tmp
+            np.multiply(src[..., 0], W_R, out=acc)
+            np.multiply(src[..., 1], W_G, out=tmp); acc += tmp
+            np.multiply(src[..., 2], W_B, out=tmp); acc += tmp
+            np.right_shift(acc, 8, out=s.out, casting="unsafe")
+        else:
+            np.copyto(s.out, src)
+        del v, src                             # unlock before anyone blits again
+        frame = s.out.swapaxes(0, 1)
+        if s.stack is not None:
+            s.stack.push(frame)
+        return frame
+
+
+def main(argv):
+    surf = pygame.Surface((64, 48))
+    surf.fill((200, 100, 50))
+    sprite = pygame.Surface((8, 8))
+    ex = FrameExport(surf, 2, gray=True, stack=2)
+    top = ex.view(lambda v: v[0, 0].copy())
+    surf.blit(sprite, (0, 0))                  # raises if view() left the surface locked
+    frame = ex.grab()
+    surf.blit(sprite, (8, 8))
+    assert tuple(top) == (200, 100, 50) and frame.shape == (24, 32), (top, frame.shape)
+    print("framegrab: view/grab unlock ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
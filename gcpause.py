@@ -0,0 +1,146 @@
+import gc
+import sys
+import time
+import atexit
+
+# -------------------------------------------------------------
+#  GC PAUSE CONTROL / STUTTER LOG
+#  The cyclic collector runs whenever gen 0's net allocation count
+#  crosses its threshold -- mid-frame, and every few hundred young
+#  collections a full one walks the whole heap, level tables
+#  included.
+#
+#    --gc-freeze  after a level is built, collect once and gc.freeze()
+#                 it: the level's objects move to the permanent
+#                 generation and no later collection walks them
+#    --gc-manual  freeze, and keep the collector off during gameplay;
+#                 young generations are collected after the flip only
+#                 when the frame has slack left (or gen 0 has gone
+#                 FORCE times over its threshold), full collections
+#                 at scene transitions
+#    --gc-log     time every collection (gc.callbacks) and log it with
+#                 the time of the frame it landed in; summary at exit
+#
+#  Frame loop:  loaded() after building the level;
+#               tick; frame(); ... simulate, draw, flip ...; idle();
+#               transition() when gameplay ends (menu, game over)
+# -------------------------------------------------------------
+SPIKE = 1.5         # a frame longer than this many periods is a spike
+SLACK_MS = 2.0      # idle(): collect only with this much of the frame left
+FORCE = 8           # ... or once gen 0 is this many times over its threshold
+LOG_LINES = 40
+
+
+class GCControl:
+    __slots__ = ("freeze", "manual", "log", "period", "playing", "t_frame", "t_gc", "why",
+                 "frame_no", "frames", "spikes", "gc_spikes", "pending", "events", "gen_n",
+                 "gen_ms", "gen_max")
+
+    def __init__(s, fps=60, freeze=False, manual=False, log=False):
+        s.freeze, s.manual, s.log = freeze or manual, manual, log
+        s.period = 1.0 / fps
+        s.playing, s.t_frame, s.t_gc, s.why = False, None, 0.0, "auto"
+        s.frame_no = s.frames = s.spikes = s.gc_spikes = 0
+        s.pending = []                 # (gen, pause ms, collected, why) since the frame began
+        s.events = []                  # (frame, frame ms or None between frames, gen, pause ms, collected, why)
+        s.gen_n, s.gen_ms, s.gen_max = [0] * 3, [0.0] * 3, [0.0] * 3
+        if log:
+            gc.callbacks.append(s._gc)
+            atexit.register(lambda: print(s.report()))
+
+    @classmethod
+    def from_argv(cls, fps=60, argv=None):
+        argv = sys.argv if argv is None else argv
+        return cls(fps, "--gc-freeze" in argv, "--gc-manual" in argv, "--gc-log" in argv)
+
+    def _gc(s, phase, info):
+        if phase == "start":
+            s.t_gc = time.perf_counter()
+            return
+        ms = (time.perf_counter() - s.t_gc) * 1000.0
+        g = info["generation"]
+        s.gen_n[g] += 1; s.gen_ms[g] += ms
+        s.gen_max[g] = max(s.gen_max[g], ms)
+        s.pending.append((g, ms, info["collected"], s.why))
+
+    def _collect(s, gen, why):
+        s.why = why
+        gc.collect(gen)
+        s.why = "auto"
+
+    def _between(s):
+        """Outside gameplay: log what collected since the last frame, restart frame timing."""
+        if s.pending:
+            s.events += [(s.frame_no, None) + p for p in s.pending]
+            s.pending.clear()
+        s.t_frame = None
+
+    # ---------------------------------------------------------
+    def loaded(s):
+        """A level was just built: freeze it out of every later collection."""
+        if s.freeze:
+            gc.unfreeze()                  # the previous level's objects are garbage now
+            s._collect(2, "load")
+            gc.freeze()
+        if s.manual:
+            gc.disable()
+        s.playing = True
+        s._between()
+
+    def transition(s):
+        """Gameplay ended (menu, game over, level clear): collect while nothing is moving."""
+        if s.manual and s.playing:
+            gc.enable()
+            s._collect(2, "scene")
+        s.playing = False
+        s._between()
+
+    def frame(s):
+        """Top of the frame, right after the clock tick."""
+        now = time.perf_counter()
+        if s.log and s.t_frame is not None:
+            ms = (now - s.t_frame) * 1000.0
+            spike = ms > SPIKE * s.period * 1000.0
+            s.frames += 1
+            s.spikes += spike
+            if s.pending:
+                s.gc_spikes += spike
+                s.events += [(s.frame_no, ms) + p for p in s.pending]
+                s.pending.clear()
+        s.t_frame = now
+        s.frame_no += 1
+
+    def idle(s):
+        """After the flip: in manual mode, collect the young generations in the slack."""
+        if not (s.manual and s.playing):
+            return
+        count, limit = gc.get_count(), gc.get_threshold()
+        if count[0] < limit[0]:
+            return
+        left = s.period - (time.perf_counter() - s.t_frame) if s.t_frame is not None else 0.0
+        if left * 1000.0 >= SLACK_MS:
+            s._collect(1 if count[1] >= limit[1] else 0, "idle")
+        elif count[0] >= FORCE * limit[0]:
+            s._collect(0, "forced")
+
+    # ---------------------------------------------------------
+    def report(s):
+        mode = "manual" if s.manual else "freeze" if s.freeze else "automatic"
+        spike = SPIKE * s.period * 1000.0
+        lines = ["gc (%s): %d frames, %d over %.1f ms, %d of those with a collection in them" % (
+            mode, s.frames, s.spikes, spike, s.gc_spikes)]
+        for g in range(3):
+            if s.gen_n[g]:
+                lines.append("  gen %d  %5d collections  %8.2f ms total  %6.2f ms max" % (
+                    g, s.gen_n[g], s.gen_ms[g], s.gen_max[g]))
+        if not s.events:
+            lines.append("  no collections")
+            return "\n".join(lines)
+        shown = sorted(sorted(range(len(s.events)), key=lambda i: -s.events[i][3])[:LOG_LINES])
+        lines.append("  longest pauses:  frame  frame ms  gen  pause ms  collected  why")
+        for i in shown:
+            frame, ms, g, pause, collected, why = s.events[i]
+            lines.append("  %15d  %8s  %3d  %8.2f  %9d  %s%s" % (
+                frame, "between" if ms is None else "%.1f" % ms, g, pause, collected, why,
+                "  SPIKE" if ms is not None and ms > spike else ""))
+        return "\n".join(lines)
@@ -0,0 +1,376 @@
+import os
+import sys
+import zlib
+import random
+import struct
+import importlib.util
+import multiprocessing
+from contextlib import contextmanager
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import numpy as np
+import pygame
+from capture import png_bytes
+
+# -------------------------------------------------------------
+#  GOLDEN-FRAME REGRESSION HARNESS
+#  Runs each engine's own main loop headless, with pygame's input,
+#  clock and flip swapped for a scripted driver: a fixed 60 Hz tick,
+#  a key track indexed by frame and a seeded random, so every run
+#  draws the same frames. Each flip is shrunk to a 32x32 luma
+#  thumbnail; after the run all thumbnails are DCT-hashed in one
+#  batch (64-bit pHash) and compared with the goldens by Hamming
+#  distance. Only frames whose hash moved are rendered again and
+#  pixel-diffed against the stored golden frame -- the verdict -- with
+#  a golden | current | diff PNG written for each failure.
+#
+#  goldens/NAME.gld: HEAD, n hashes (u64), n + 1 record offsets
+#  (u32), then per frame zlib'd RGB: a keyframe every KEY frames,
+#  the XOR against the previous frame in between.
+#
+#  python golden.py record [ENGINE ...] [--frames N]
+#  python golden.py check  [ENGINE ...] [--bits B] [--area A] [--out DIR]
+#  (-j JOBS spreads the engines over processes; default one per CPU)
+# -------------------------------------------------------------
+ENGINES = {                    # name -> script; every one runs the same default track
+    "smb14k": "SMB14K.py",
+    "smb-gpt415": "GPT4.15.14.25SMB.py",
+    "smb-gpt41": "GPT4.1.SMB14K5.14.25_A.py",
+    "smb4k2": "SMB4K2.0.py",
+    "smb-ppu": "SMB1FAKEPPU5.14.25.py",
+    "deltamario": "deltamario4k.py",
+    "breakout": "BreakoutHDR4k.py",
+    "smw-v0": "smw4k5.14.25.-v0.py",
+    "smw-build1": "smw4kv0.build1.py",
+    "smw-snes": "smwsnes514251.0buildav0.py",
+    "smw-hdr": "testhdr14.25.py-smw-a.py",
+    "smw-1.0a": "smw4k1.0a..x.x.build0.py",
+    "smw-debug": "smw-overworld-debug-v0.py",
+}
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDENS = os.path.join(HERE, "goldens")
+FRAMES = 600
+KEY = 60
+THUMB = 32
+HEAD = struct.Struct("<4sHHHI")            # magic, w, h, KEY, frame count
+MAGIC = b"GLD1"
+
+
+def default_track(f):
+    """Enter on frames 2-3 of every 4 s (menus, overworld), run right from
+    half a second in, jump for 12 of every 45 frames."""
+    keys = set()
+    if f % 240 in (2, 3):
+        keys.add(pygame.K_RETURN)
+    if f >= 30:
+        keys.add(pygame.K_RIGHT)
+        if f % 45 < 12:
+            keys.add(pygame.K_SPACE)
+    return frozenset(keys)
+
+
+# -------------------------------------------------------------
+#  SCRIPTED DRIVER
+# -------------------------------------------------------------
+class Stop(Exception):
+    pass
+
+
+class Keys(frozenset):
+    __slots__ = ()
+    __getitem__ = frozenset.__contains__   # stands in for get_pressed()'s ScancodeWrapper
+
+
+class FixedClock:
+    def __init__(s):
+        s.fps = 60
+
+    def tick(s, fps=0):
+        s.fps = fps or 60
+        return 1000 // s.fps
+
+    tick_busy_loop = tick
+
+    def get_fps(s):
+        return float(s.fps)
+
+    def get_time(s):
+        return 1000 // s.fps
+
+    get_rawtime = get_time
+
+
+class Driver:
+    def __init__(s, frames, track, on_frame):
+        s.frames, s.track, s.on_frame = frames, track, on_frame
+        s.n, s.held, s.queue = 0, frozenset(), []
+        s._keys(0)
+
+    def _keys(s, f):
+        keys = s.track(f)
+        s.queue += [pygame.event.Event(pygame.KEYUP, key=k, mod=0, scancode=0) for k in s.held - keys]
+        s.queue += [pygame.event.Event(pygame.KEYDOWN, key=k, mod=0, scancode=0, unicode="")
+                    for k in keys - s.held]
+        s.held = Keys(keys)
+
+    def get(s, *args, **kw):
+        q, s.queue = s.queue, []
+        return q
+
+    def pressed(s):
+        return s.held
+
+    def flip(s, *args):
+        s.on_frame(s.n, pygame.display.get_surface())
+        s.n += 1
+        if s.n >= s.frames:
+            raise Stop
+        s._keys(s.n)
+
+    def ticks(s):
+        return s.n * 1000 // 60
+
+
+@contextmanager
+def scripted(driver, argv):
+    patches = ((pygame.event, "get", driver.get), (pygame.event, "pump", lambda: None),
+               (pygame.key, "get_pressed", driver.pressed), (pygame.display, "flip", driver.flip),
+               (pygame.display, "update", driver.flip), (pygame.time, "Clock", FixedClock),
+               (pygame.time, "wait", lambda ms: 0), (pygame.time, "delay", lambda ms: 0),
+               (pygame.time, "get_ticks", driver.ticks), (sys, "argv", argv))
+    saved = [(obj, name, getattr(obj, name)) for obj, name, _ in patches]
+    for obj, name, value in patches:
+        setattr(obj, name, value)
+    state = random.getstate()
+    random.seed(0)
+    try:
+        yield
+    finally:
+        for obj, name, value in saved:
+            setattr(obj, name, value)
+        random.setstate(state)
+
+
+def run(name, frames, on_frame, track=default_track, argv=()):
+    """Play `frames` flips of an engine; on_frame(n, display surface) sees each one."""
+    path = os.path.join(HERE, ENGINES[name])
+    driver = Driver(frames, track, on_frame)
+    with scripted(driver, [path] + list(argv)):
+        try:
+            spec = importlib.util.spec_from_file_location("golden_" + name.replace("-", "_"), path)
+            mod = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(mod)   # engines with a module-level loop stop in here
+            mod.main()
+        except Stop:
+            pass
+        except SystemExit:
+            raise RuntimeError("%s exited after %d frames" % (name, driver.n))
+    if driver.n < frames:
+        raise RuntimeError("%s returned after %d frames" % (name, driver.n))
+
+
+# -------------------------------------------------------------
+#  PERCEPTUAL HASH (batched)
+# -------------------------------------------------------------
+class Thumbs:
+    """Per-flip 32x32 luma thumbnails into one preallocated stack."""
+
+    def __init__(s, frames):
+        s.stack = np.zeros((frames, THUMB, THUMB), np.float32)
+        s.small = None
+
+    def __call__(s, n, surf):
+        if s.small is None:
+            s.small = pygame.Surface((THUMB, THUMB), 0, surf)
+        pygame.transform.smoothscale(surf, (THUMB, THUMB), s.small)
+        px = pygame.surfarray.pixels3d(s.small)
+        s.stack[n] = (px[..., 0] * 0.299 + px[..., 1] * 0.587 + px[..., 2] * 0.114).T
+        del px
+
+
+def _dct_matrix(n):
+    k, i = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+    d = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    d[0] /= np.sqrt(2.0)
+    return d.astype(np.float32)
+
+
+DCT = _dct_matrix(THUMB)
+
+
+def phash(stack):
+    """(n, 32, 32) luma -> (n,) uint64: the 8x8 lowest DCT terms above/below their median."""
+    low = (DCT[:8] @ stack @ DCT[:8].T).reshape(len(stack), 64)
+    bits = low > np.median(low[:, 1:], axis=1, keepdims=True)
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def hamming(a, b):
+    x = np.bitwise_xor(a, b).view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(x, axis=1).sum(axis=1)
+
+
+# -------------------------------------------------------------
+#  GOLDEN FILES
+# -------------------------------------------------------------
+def rgb_of(surf):
+    v = pygame.surfarray.pixels3d(surf)
+    rgb = np.ascontiguousarray(v.swapaxes(0, 1))
+    del v
+    return rgb
+
+
+class Recorder(Thumbs):
+    def __init__(s, frames):
+        Thumbs.__init__(s, frames)
+        s.records, s.prev, s.size = [], None, None
+
+    def __call__(s, n, surf):
+        Thumbs.__call__(s, n, surf)
+        rgb = rgb_of(surf)
+        s.size = surf.get_size()
+        raw = rgb if n % KEY == 0 else np.bitwise_xor(rgb, s.prev)
+        s.records.append(zlib.compress(raw.tobytes(), 6))
+        s.prev = rgb
+
+    def save(s, path):
+        n = len(s.records)
+        offs = np.zeros(n + 1, np.uint32)
+        np.cumsum([len(r) for r in s.records], out=offs[1:])
+        with open(path, "wb") as f:
+            f.write(HEAD.pack(MAGIC, s.size[0], s.size[1], KEY, n))
+            f.write(phash(s.stack[:n]).astype("<u8").tobytes())
+            f.write(offs.astype("<u4").tobytes())
+            for r in s.records:
+                f.write(r)
+
+
+class Golden:
+    def __init__(s, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, w, h, s.key, n = HEAD.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("%s: not a golden file" % path)
+        s.size, s.frames = (w, h), n
+        o = HEAD.size
+        s.hashes = np.frombuffer(data, "<u8", n, o).astype(np.uint64)
+        o += 8 * n
+        s.offs = np.frombuffer(data, "<u4", n + 1, o).astype(np.int64) + o + 4 * (n + 1)
+        s.data = data
+
+    def frame(s, i):
+        """Decode frame i: its keyframe, then the XOR deltas up to it."""
+        w, h = s.size
+        rgb = None
+        for j in range(i - i % s.key, i + 1):
+            raw = np.frombuffer(zlib.decompress(s.data[s.offs[j]:s.offs[j + 1]]), np.uint8).reshape(h, w, 3)
+            rgb = raw.copy() if rgb is None else np.bitwise_xor(rgb, raw, out=rgb)
+        return rgb
+
+
+def pixel_diff(gold, cur, tol=8):
+    """Mask of pixels where any channel moved more than tol."""
+    return (np.abs(gold.astype(np.int16) - cur).max(axis=2) > tol)
+
+
+def diff_png(gold, cur, mask):
+    marked = gold // 3
+    marked[mask] = (255, 0, 0)
+    return png_bytes(np.concatenate((gold, cur, marked), axis=1), 6)
+
+
+# -------------------------------------------------------------
+#  COMMANDS
+# -------------------------------------------------------------
+def record(name, frames=FRAMES):
+    rec = Recorder(frames)
+    run(name, frames, rec)
+    os.makedirs(GOLDENS, exist_ok=True)
+    path = os.path.join(GOLDENS, name + ".gld")
+    rec.save(path)
+    return "%s: %d frames -> %s (%d KB)" % (name, frames, path, os.path.getsize(path) // 1024)
+
+
+def check(name, bits=0, area=16, out=None):
+    """Returns (ok, report line). Hash pass over every frame; pixel pass only
+    over the frames whose hash is more than `bits` away from the golden."""
+    gold = Golden(os.path.join(GOLDENS, name + ".gld"))
+    thumbs = Thumbs(gold.frames)
+    run(name, gold.frames, thumbs)
+    dist = hamming(phash(thumbs.stack), gold.hashes)
+    suspect = np.flatnonzero(dist > bits)
+    if not len(suspect):
+        return True, "%s: %d frames ok" % (name, gold.frames)
+    want, cur = set(suspect.tolist()), {}
+
+    def grab(n, surf):
+        if n in want:
+            cur[n] = rgb_of(surf)
+    run(name, int(suspect[-1]) + 1, grab)
+    failed = []
+    for i in suspect:
+        g = gold.frame(i)
+        mask = pixel_diff(g, cur[i])
+        changed = int(mask.sum())
+        if changed <= area:
+            continue
+        ys, xs = np.nonzero(mask)
+        failed.append("  frame %d: hash distance %d, %d px changed in (%d,%d)-(%d,%d)" % (
+            i, dist[i], changed, xs.min(), ys.min(), xs.max(), ys.max()))
+        if out is not None:
+            os.makedirs(out, exist_ok=True)
+            with open(os.path.join(out, "%s_%06d.png" % (name, i)), "wb") as f:
+                f.write(diff_png(g, cur[i], mask))
+    head = "%s: %d frames, %d hash mismatches, %d failed" % (name, gold.frames, len(suspect), len(failed))
+    return not failed, "\n".join([head] + failed[:10] + (["  ..."] if len(failed) > 10 else []))
+
+
+def _job(cmd, name, opts):
+    pygame.init()
+    try:
+        if cmd == "record":
+            return True, record(name, int(opts.get("--frames", FRAMES)))
+        return check(name, int(opts.get("--bits", 0)), int(opts.get("--area", 16)), opts.get("--out"))
+    except Exception as e:             # a crash is a failure of that engine, not of the run
+        return False, "%s: %s: %s" % (name, type(e).__name__, e)
+
+
+def main(argv):
+    args = argv[1:]
+    opts = {}
+    for flag in ("--frames", "--bits", "--area", "--out", "-j"):
+        if flag in args:
+            i = args.index(flag)
+            opts[flag] = args[i + 1]
+            del args[i:i + 2]
+    if not args or args[0] not in ("record", "check"):
+        print("usage: golden.py record [ENGINE ...] [--frames N] [-j JOBS]\n"
+              "       golden.py check [ENGINE ...] [--bits B] [--area A] [--out DIR] [-j JOBS]\n"
+              "engines: " + " ".join(ENGINES))
+        return 2
+    names = args[1:] or list(ENGINES)
+    for n in names:
+        if n not in ENGINES:
+            print("unknown engine %r" % n)
+            return 2
+    jobs = int(opts.get("-j", os.cpu_count() or 1))
+    work = [(args[0], n, opts) for n in names]
+    ok = True
+    if jobs > 1:                       # one engine per process; spawn so no SDL state is shared
+        pool = multiprocessing.get_context("spawn").Pool(min(jobs, len(work)))
+        results = pool.starmap(_job, work)
+        pool.close()
+        pool.join()
+    else:
+        results = (_job(*w) for w in work)
+    for good, line in results:
+        ok &= good
+        print(line)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
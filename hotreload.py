@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+from levelpack import load_source, validate, KEYS
+
+# -------------------------------------------------------------
+#  LEVEL HOT-RELOAD (dev mode, --hot [SRC.json])
+#  Plays the JSON level source instead of the packed levels and
+#  stat()s it a few times a second. A save that parses and passes
+#  levelpack.validate() is diffed against the loaded definition and
+#  handed to the game, which patches the live level in place
+#  (Level.patch) -- the player, camera and everything else that
+#  didn't change keep running. A broken save is reported and
+#  ignored until the next one.
+#
+#  Overworld map edits are detected but still need a restart.
+# -------------------------------------------------------------
+POLL = 0.25                            # seconds between stat() calls
+
+
+class LevelWatcher:
+    __slots__ = ("path", "mtime", "due", "map", "levels")
+
+    def __init__(s, path):
+        s.path = path
+        s.mtime = os.stat(path).st_mtime_ns
+        s.map, s.levels = load_source(path)
+        s.due = 0.0
+
+    @classmethod
+    def from_argv(cls, default, argv=None):
+        """A watcher when --hot is given (optionally followed by the source path), else None."""
+        argv = sys.argv if argv is None else argv
+        if "--hot" not in argv:
+            return None
+        i = argv.index("--hot") + 1
+        return cls(argv[i] if i < len(argv) and not argv[i].startswith("--") else default)
+
+    def poll(s):
+        """The new {(w, n): level} when the source changed and loads cleanly, else None."""
+        now = time.monotonic()
+        if now < s.due:
+            return None
+        s.due = now + POLL
+        try:
+            mtime = os.stat(s.path).st_mtime_ns
+        except OSError:
+            return None                # mid-save (editors that rename over the file)
+        if mtime == s.mtime:
+            return None
+        s.mtime = mtime
+        try:
+            smw_map, levels = load_source(s.path)
+            for key, data in levels.items():
+                validate(key, data)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print("hot-reload: %s: %s -- keeping the loaded levels" % (s.path, e))
+            return None
+        changes = diff(s.levels, levels)
+        if smw_map != s.map:
+            print("hot-reload: overworld map changed; restart to apply it")
+        for key in sorted(changes):
+            print("hot-reload: level %d-%d: %s" % (key + (", ".join(changes[key]),)))
+        s.levels = levels
+        return levels if changes else None
+
+
+def diff(old, new):
+    """{(w, n): [what changed]} for every level added, removed or edited."""
+    out = {}
+    for key in old.keys() | new.keys():
+        if key not in new:
+            out[key] = ["removed"]
+        elif key not in old:
+            out[key] = ["added"]
+        else:
+            fields = [k for k in KEYS if old[key][k] != new[key][k]]
+            if fields:
+                out[key] = fields
+    return out
@@ -0,0 +1,132 @@
+import sys
+import time
+import atexit
+import random
+import threading
+import pygame
+
+# -------------------------------------------------------------
+#  INPUT LATENCY PROBE / LOW-LATENCY LOOP
+#  The NES mains tick (sleep) at the top of the frame, sample
+#  get_pressed(), simulate, flip, and only then pump events -- so a
+#  key that lands during the frame waits for the flip, the pump and
+#  the next sleep before it is simulated.
+#
+#    --low-latency    poll() pumps right after the sleep, just before
+#                     the keys are sampled; the events it takes are
+#                     handed back by events() after the flip as usual
+#    --latency        time every key event from the poll that first
+#                     sees it to the flip that first shows a frame
+#                     simulated with it; percentile histogram at exit
+#    --latency-probe  also post a synthetic input from a thread every
+#                     50-150 ms, timed from the moment it is posted
+#                     (so the wait in SDL's queue is included)
+#
+#  Frame loop:  tick; poll(); keys = get_pressed(); sampled();
+#               ... simulate, draw ...; flip; presented();
+#               for event in events(): ...
+# -------------------------------------------------------------
+BINS = 100                             # 1 ms buckets; the last one holds everything slower
+KEY, SYNTH = 0, 1
+PROBE = pygame.event.custom_type()
+
+
+class LatencyProbe:
+    __slots__ = ("low_latency", "on", "buf", "pending", "flight", "hist", "_stop")
+
+    def __init__(s, low_latency=False, measure=False, synthetic=False):
+        s.low_latency, s.on = low_latency, measure or synthetic
+        s.buf, s.pending, s.flight = [], [], []
+        s.hist = ([0] * BINS, [0] * BINS)
+        s._stop = threading.Event()
+        if synthetic:
+            threading.Thread(target=s._post, daemon=True).start()
+        if s.on:
+            atexit.register(lambda: print(s.report()))
+
+    @classmethod
+    def from_argv(cls, argv=None):
+        argv = sys.argv if argv is None else argv
+        return cls("--low-latency" in argv, "--latency" in argv, "--latency-probe" in argv)
+
+    def _post(s):
+        rng = random.Random()
+        while not s._stop.wait(rng.uniform(0.05, 0.15)):
+            if pygame.display.get_init():
+                pygame.event.post(pygame.event.Event(PROBE, t=time.perf_counter()))
+
+    def _take(s):
+        evs = pygame.event.get()
+        if not s.on:
+            return evs
+        now, out = time.perf_counter(), []
+        for e in evs:
+            if e.type == PROBE:
+                s.pending.append((e.t, SYNTH))
+                continue
+            if e.type == pygame.KEYDOWN or e.type == pygame.KEYUP:
+                s.pending.append((now, KEY))
+            out.append(e)
+        return out
+
+    # ---------------------------------------------------------
+    def poll(s):
+        """Low-latency mode: pump input now (after the sleep, before sampling)."""
+        if s.low_latency:
+            s.buf += s._take()
+
+    def sampled(s):
+        """The keys were just read for this frame's simulation."""
+        if s.on and s.pending:
+            s.flight += s.pending
+            s.pending.clear()
+
+    def presented(s):
+        """A frame simulated with the sampled input is now on screen."""
+        if s.on and s.flight:
+            now = time.perf_counter()
+            for t, kind in s.flight:
+                s.hist[kind][min(int((now - t) * 1000.0), BINS - 1)] += 1
+            s.flight.clear()
+
+    def events(s):
+        """This frame's events: the ones poll() took plus anything newer."""
+        if s.buf:
+            evs, s.buf = s.buf, []
+            return evs + s._take()
+        return s._take()
+
+    def close(s):
+        s._stop.set()
+
+    # ---------------------------------------------------------
+    def percentile(s, kind, q):
+        h = s.hist[kind]
+        n = sum(h)
+        if not n:
+            return None
+        rank, acc = q * n, 0
+        for ms, c in enumerate(h):
+            acc += c
+            if acc >= rank:
+                return ms + 1
+        return BINS
+
+    def report(s):
+        mode = "low-latency" if s.low_latency else "classic"
+        lines = ["input latency (%s loop), ms, input -> flip:" % mode]
+        for kind, name in ((KEY, "keys"), (SYNTH, "probe")):
+            h = s.hist[kind]
+            n = sum(h)
+            if not n:
+                continue
+            lines.append("  %-5s n=%-6d p50 <%d  p90 <%d  p99 <%d  max <%d%s" % (
+                name, n, s.percentile(kind, 0.5), s.percentile(kind, 0.9), s.percentile(kind, 0.99),
+                max(i for i, c in enumerate(h) if c) + 1, "+" if h[-1] else ""))
+            groups = [(lo, sum(h[lo:lo + 4])) for lo in range(0, max(i for i, c in enumerate(h) if c) + 1, 4)]
+            top = max(c for _, c in groups)
+            for lo, c in groups:
+                lines.append("   %3d-%-3d %-40s %d" % (lo, lo + 4, "#" * (c * 40 // top), c))
+        if len(lines) == 1:
+            lines.append("  no input seen")
+        return "\n".join(lines)
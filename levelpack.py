@@ -0,0 +1,258 @@
+import sys
+import json
+import mmap
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+# -------------------------------------------------------------
+#  SMW LEVEL PACK (.lvp)
+#  Compact little-endian file: header, sorted index, a string
+#  table, the overworld map and one columnar record per level.
+#  Records are only decoded when a level is first looked up, and
+#  decoded levels sit in a small LRU, so a pack of hundreds of
+#  levels costs almost nothing at import time.
+#
+#    header   "<4sHHII"  magic, version, level count, strtab offset, map offset
+#    index    "<BBII"    world, level, record offset, record length (per level)
+#    record   per FIELD: u16 count, then one packed column per value
+#             flag "<hh", yoshi "<Bhh" (present, x, y)
+#    strtab   u16 count, then u8 length + utf-8 bytes per string
+#    map      u8 worlds; per world: u16 name, u16 nodes, x/y int16,
+#             world/level u8 and label u16 columns (NO_LABEL: none),
+#             u16 edges, a/b u16 columns
+#
+#  One pack per game variant, each built from its JSON source:
+#    smw.lvp        smw-overworld-debug-v0, smw4k1.0a
+#    smw-build1.lvp smw4kv0.build1
+#    smw-snes.lvp   smwsnes 1.0 build a, testhdr (labelled nodes)
+#    smw-v0.lvp     smw4k5 v0 (one layout, played for every node)
+#
+#  python levelpack.py build levels/smw.json levels/smw.lvp
+#  python levelpack.py check levels/smw.lvp
+# -------------------------------------------------------------
+MAGIC, VERSION = b"SMWL", 2
+NO_LABEL = 0xFFFF
+HEADER, INDEX = struct.Struct("<4sHHII"), struct.Struct("<BBII")
+# column codes: h = int16, S = string-table id, ? = bool
+FIELDS = (("platforms", "hhhh"), ("enemies", "hhS"), ("items", "hhS"),
+          ("pipes", "hh?"), ("switches", "hhS"), ("powerups", "hhS"))
+KEYS = ("platforms", "enemies", "items", "flag", "pipes", "switches", "powerups", "yoshi")
+_CODE = {"h": "h", "S": "H", "?": "B"}
+
+
+# -------------------------------------------------------------
+#  SCHEMA
+# -------------------------------------------------------------
+def _int16(v):
+    return isinstance(v, int) and not isinstance(v, bool) and -32768 <= v <= 32767
+
+
+def validate(key, data):
+    """Raise ValueError describing the first schema violation in one level."""
+    where = "level %r" % (key,)
+    if not (isinstance(key, tuple) and len(key) == 2 and all(isinstance(k, int) and 0 <= k < 256 for k in key)):
+        raise ValueError("%s: key must be (world, level) in 0..255" % where)
+    missing = [k for k in KEYS if k not in data]
+    extra = [k for k in data if k not in KEYS]
+    if missing or extra:
+        raise ValueError("%s: missing %s, unknown %s" % (where, missing, extra))
+    for name, cols in FIELDS:
+        for i, rec in enumerate(data[name]):
+            if len(rec) != len(cols):
+                raise ValueError("%s: %s[%d] needs %d values, got %r" % (where, name, i, len(cols), rec))
+            for c, v in zip(cols, rec):
+                ok = _int16(v) if c == "h" else isinstance(v, str) if c == "S" else isinstance(v, bool)
+                if not ok:
+                    raise ValueError("%s: %s[%d] bad value %r" % (where, name, i, v))
+    if not (len(data["flag"]) == 2 and all(map(_int16, data["flag"]))):
+        raise ValueError("%s: flag must be (x, y)" % where)
+    y = data["yoshi"]
+    if y is not None and not (len(y) == 2 and all(map(_int16, y))):
+        raise ValueError("%s: yoshi must be None or (x, y)" % where)
+
+
+# -------------------------------------------------------------
+#  WRITER
+# -------------------------------------------------------------
+def load_source(path):
+    """JSON source -> (smw_map, {(w, n): level}) with the tuples the games expect."""
+    with open(path, encoding="utf-8") as f:
+        src = json.load(f)
+    smw_map = [{"name": w["name"],
+                "nodes": [{"pos": tuple(n["pos"]), "level": tuple(n["level"]),
+                           **({"label": n["label"]} if "label" in n else {})} for n in w["nodes"]],
+                **({"edges": [tuple(e) for e in w["edges"]]} if "edges" in w else {})}
+               for w in src["map"]]
+    levels = {}
+    for k, d in src["levels"].items():
+        w, n = map(int, k.split("-"))
+        lvl = {f: [tuple(r) for r in d[f]] for f, _ in FIELDS}
+        lvl["flag"] = tuple(d["flag"])
+        lvl["yoshi"] = tuple(d["yoshi"]) if d["yoshi"] else None
+        levels[(w, n)] = {k: lvl[k] for k in KEYS}
+    return smw_map, levels
+
+
+def write_pack(path, smw_map, levels):
+    strings, sid = [], {}
+
+    def intern(v):
+        if v not in sid:
+            sid[v] = len(strings); strings.append(v)
+        return sid[v]
+
+    records = []
+    for key in sorted(levels):
+        data = levels[key]
+        validate(key, data)
+        out = bytearray()
+        for name, cols in FIELDS:
+            rows = data[name]
+            out += struct.pack("<H", len(rows))
+            for ci, c in enumerate(cols):
+                col = [intern(r[ci]) if c == "S" else r[ci] for r in rows]
+                out += struct.pack("<%d%s" % (len(col), _CODE[c]), *col)
+        out += struct.pack("<hh", *data["flag"])
+        out += struct.pack("<Bhh", 1, *data["yoshi"]) if data["yoshi"] else struct.pack("<Bhh", 0, 0, 0)
+        records.append((key, bytes(out)))
+
+    mp = bytearray(struct.pack("<B", len(smw_map)))
+    for w in smw_map:
+        nodes = w["nodes"]
+        edges = w.get("edges") or []
+        n = len(nodes)
+        mp += struct.pack("<HH", intern(w["name"]), n)
+        mp += struct.pack("<%dh" % n, *[nd["pos"][0] for nd in nodes])
+        mp += struct.pack("<%dh" % n, *[nd["pos"][1] for nd in nodes])
+        mp += struct.pack("<%dB" % n, *[nd["level"][0] for nd in nodes])
+        mp += struct.pack("<%dB" % n, *[nd["level"][1] for nd in nodes])
+        mp += struct.pack("<%dH" % n, *[intern(nd["label"]) if "label" in nd else NO_LABEL for nd in nodes])
+        mp += struct.pack("<H", len(edges))
+        mp += struct.pack("<%dH" % len(edges), *[a for a, _ in edges])
+        mp += struct.pack("<%dH" % len(edges), *[b for _, b in edges])
+
+    st = bytearray(struct.pack("<H", len(strings)))
+    for v in strings:
+        b = v.encode("utf-8")
+        st += struct.pack("<B", len(b)) + b
+
+    off = HEADER.size + INDEX.size * len(records)
+    index, body = bytearray(), bytearray()
+    for (w, n), rec in records:
+        index += INDEX.pack(w, n, off + len(body), len(rec))
+        body += rec
+    strtab_off = off + len(body)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), strtab_off, strtab_off + len(st)))
+        f.write(index); f.write(body); f.write(st); f.write(mp)
+
+
+# -------------------------------------------------------------
+#  READER
+# -------------------------------------------------------------
+class LevelPack(Mapping):
+    """Read-only {(world, level): level dict} over a memory-mapped .lvp file."""
+
+    def __init__(s, path, cache=32):
+        with open(path, "rb") as f:
+            s._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, strtab_off, map_off = HEADER.unpack_from(s._buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s: not a v%d level pack" % (path, VERSION))
+        s._index = {}
+        for i in range(count):
+            w, n, off, ln = INDEX.unpack_from(s._buf, HEADER.size + i * INDEX.size)
+            s._index[(w, n)] = (off, ln)
+        (nstr,), pos = struct.unpack_from("<H", s._buf, strtab_off), strtab_off + 2
+        s._strings = []
+        for _ in range(nstr):
+            ln = s._buf[pos]
+            s._strings.append(s._buf[pos + 1:pos + 1 + ln].decode("utf-8"))
+            pos += 1 + ln
+        s.map = s._read_map(map_off)
+        s._cache, s._cache_size = OrderedDict(), cache
+        s._lock = threading.Lock()     # levels may be decoded from a prefetch thread
+
+    def _read_map(s, pos):
+        buf, out = s._buf, []
+        worlds, pos = buf[pos], pos + 1
+        for _ in range(worlds):
+            name, n = struct.unpack_from("<HH", buf, pos)
+            pos += 4
+            xs = struct.unpack_from("<%dh" % n, buf, pos); pos += 2 * n
+            ys = struct.unpack_from("<%dh" % n, buf, pos); pos += 2 * n
+            ws = buf[pos:pos + n]; pos += n
+            ls = buf[pos:pos + n]; pos += n
+            lb = struct.unpack_from("<%dH" % n, buf, pos); pos += 2 * n
+            (ne,) = struct.unpack_from("<H", buf, pos); pos += 2
+            a = struct.unpack_from("<%dH" % ne, buf, pos); pos += 2 * ne
+            b = struct.unpack_from("<%dH" % ne, buf, pos); pos += 2 * ne
+            world = {"name": s._strings[name],
+                     "nodes": [{"pos": (xs[i], ys[i]), "level": (ws[i], ls[i]),
+                                **({"label": s._strings[lb[i]]} if lb[i] != NO_LABEL else {})}
+                               for i in range(n)]}
+            if ne:
+                world["edges"] = list(zip(a, b))
+            out.append(world)
+        return out
+
+    def _decode(s, off):
+        buf, strings, data = s._buf, s._strings, {}
+        for name, cols in FIELDS:
+            (n,) = struct.unpack_from("<H", buf, off); off += 2
+            columns = []
+            for c in cols:
+                col = struct.unpack_from("<%d%s" % (n, _CODE[c]), buf, off)
+                off += struct.calcsize("<" + _CODE[c]) * n
+                columns.append([strings[v] for v in col] if c == "S" else
+                               [bool(v) for v in col] if c == "?" else col)
+            data[name] = list(zip(*columns))
+        data["flag"] = struct.unpack_from("<hh", buf, off)
+        has_yoshi, yx, yy = struct.unpack_from("<Bhh", buf, off + 4)
+        data["yoshi"] = (yx, yy) if has_yoshi else None
+        return {k: data[k] for k in KEYS}
+
+    def __getitem__(s, key):
+        with s._lock:
+            hit = s._cache.get(key)
+            if hit is not None:
+                s._cache.move_to_end(key)
+                return hit
+            hit = s._cache[key] = s._decode(s._index[key][0])
+            if len(s._cache) > s._cache_size:
+                s._cache.popitem(last=False)
+            return hit
+
+    def __iter__(s):
+        return iter(s._index)
+
+    def __len__(s):
+        return len(s._index)
+
+    def __contains__(s, key):
+        return key in s._index
+
+    def close(s):
+        s._buf.close()
+
+
+def main(argv):
+    if len(argv) == 4 and argv[1] == "build":
+        smw_map, levels = load_source(argv[2])
+        write_pack(argv[3], smw_map, levels)
+        print("%s: %d levels, %d worlds" % (argv[3], len(levels), len(smw_map)))
+    elif len(argv) == 3 and argv[1] == "check":
+        pack = LevelPack(argv[2])
+        for key in pack:
+            validate(key, pack[key])
+        print("%s: %d levels ok" % (argv[2], len(pack)))
+    else:
+        print("usage: levelpack.py build SRC.json OUT.lvp | check PACK.lvp")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,231 @@
+import sys
+import time
+import multiprocessing as mp
+import numpy as np
+from neslevel import make_level, SOLID, COIN
+from fixphys import FIX, to_fix, fall_n, collide_y_n
+
+# -------------------------------------------------------------
+#  HEADLESS VECTORIZED NES ENV (Gymnasium-style, no pygame)
+#  K copies of SMB1FAKEPPU5.14.25.py's level loop stepped in
+#  lockstep on NumPy state arrays: same levels (neslevel), same
+#  fixed-point physics (fixphys), same tile collision order.
+#  Observations are the tile window the camera shows plus the
+#  player state -- no pixels. Finished envs reset on the spot.
+#
+#    env = NesVecEnv(1024); obs, info = env.reset(seed=0)
+#    obs, reward, terminated, truncated, info = env.step(actions)
+#
+#  Actions are bitmasks: A_LEFT | A_RIGHT | A_JUMP (0..7).
+#  python nesenv.py [ENVS] [STEPS] [WORKERS] benchmarks steps/s.
+# -------------------------------------------------------------
+WIDTH, HEIGHT, TILE = 600, 400, 16     # SMB1FAKEPPU geometry
+ROWS, COLS = HEIGHT // TILE, WIDTH // TILE * 3
+VIEW = WIDTH // TILE + 1               # tile columns a camera position can show
+LEVEL_COUNT, FLAG_H = 32, 7
+START_X, START_Y = 40, HEIGHT - 3 * TILE
+SPEED, JUMP, GRAVITY = 3, to_fix(8.5), to_fix(0.5)
+TIME_LIMIT = 999 * 60                  # the HUD timer, in frames
+
+A_LEFT, A_RIGHT, A_JUMP = 1, 2, 4
+NUM_ACTIONS = 8
+R_COIN, R_FLAG, R_DEATH = 1.0, 100.0, -10.0   # plus +1 per tile of progress right
+
+_SOLID = np.zeros(256, bool)
+_SOLID[list(SOLID)] = True
+_LEVELS = None
+
+
+def level_templates():
+    """(tiles[LEVEL_COUNT, ROWS, COLS] uint8, flags[LEVEL_COUNT, 4]), built once."""
+    global _LEVELS
+    if _LEVELS is None:
+        tiles = np.zeros((LEVEL_COUNT, ROWS, COLS), np.uint8)
+        flags = np.zeros((LEVEL_COUNT, 4), np.int64)
+        for i in range(LEVEL_COUNT):
+            level, items = make_level(i, COLS, ROWS, TILE, FLAG_H)
+            tiles[i] = level
+            flags[i] = items.flag
+        _LEVELS = tiles, flags
+    return _LEVELS
+
+
+class NesVecEnv:
+    def __init__(s, num_envs, levels=None):
+        K = s.num_envs = num_envs
+        s.levels = np.arange(LEVEL_COUNT) if levels is None else np.asarray(levels)
+        s.rng = np.random.default_rng()
+        s.tiles = np.zeros((K, ROWS, COLS), np.uint8)
+        s.level = np.zeros(K, np.int64)
+        s.x = np.zeros(K, np.int64)
+        s.fy = np.zeros(K, np.int64)                   # fixed-point, like the game
+        s.vy = np.zeros(K, np.int64)
+        s.on_ground = np.zeros(K, bool)
+        s.coins = np.zeros(K, np.int64)
+        s.t = np.zeros(K, np.int64)
+        s._k = np.arange(K)
+        # observation buffers, overwritten in place by every reset()/step()
+        s._flat = s.tiles.reshape(-1)
+        s._base = (s._k[:, None, None] * (ROWS * COLS) + np.arange(ROWS)[None, :, None] * COLS
+                   + np.arange(VIEW)[None, None, :])
+        s._idx = np.empty_like(s._base)
+        s.obs = {"tiles": np.zeros((K, ROWS, VIEW), np.uint8),
+                 "player": np.zeros((K, 5), np.int32)}  # x, y, vy (fixed), on_ground, coins
+
+    # ---------------------------------------------------------
+    def reset(s, seed=None, options=None):
+        if seed is not None:
+            s.rng = np.random.default_rng(seed)
+        if options and "levels" in options:
+            s.levels = np.asarray(options["levels"])
+        s._reset(np.ones(s.num_envs, bool))
+        return s._observe(), {}
+
+    def _reset(s, mask):
+        tiles, _ = level_templates()
+        lv = s.rng.choice(s.levels, int(mask.sum()))
+        s.tiles[mask] = tiles[lv]
+        s.level[mask] = lv
+        s.x[mask], s.fy[mask], s.vy[mask] = START_X, START_Y * FIX, 0
+        s.on_ground[mask] = False
+        s.coins[mask] = s.t[mask] = 0
+
+    def _observe(s):
+        cam = np.clip(s.x - WIDTH // 3, 0, COLS * TILE - WIDTH) // TILE
+        np.add(s._base, cam[:, None, None], out=s._idx)
+        np.take(s._flat, s._idx, out=s.obs["tiles"])
+        p = s.obs["player"]
+        p[:, 0], p[:, 1], p[:, 2] = s.x, s.fy // FIX, s.vy
+        p[:, 3], p[:, 4] = s.on_ground, s.coins
+        return s.obs
+
+    # ---------------------------------------------------------
+    def step(s, actions):
+        a = np.asarray(actions)
+        k, x, fy, vy = s._k, s.x, s.fy, s.vy
+        prev = x.copy()
+        # input -> velocity, exactly as the game's loop (RIGHT wins over LEFT)
+        vx = np.where(a & A_RIGHT, SPEED, np.where(a & A_LEFT, -SPEED, 0))
+        jump = ((a & A_JUMP) != 0) & s.on_ground
+        vy[jump] = -JUMP
+        fall_n(vy, GRAVITY)
+        x += vx
+        fy += vy
+        np.clip(x, 0, COLS * TILE - TILE, out=x)
+        y = fy // FIX
+        dead = y > HEIGHT
+        alive = ~dead
+        # Mario's box covers at most 2x2 tiles; visit them row-major like the game
+        s.on_ground[:] = False
+        reward = (x - prev) / TILE
+        tx0, ty0 = x // TILE, y // TILE
+        tx1, ty1 = (x + TILE - 1) // TILE, (y + TILE - 1) // TILE
+        for ty, new_row in ((ty0, alive), (ty1, alive & (ty1 != ty0))):
+            row_ok = new_row & (ty >= 0) & (ty < ROWS)
+            tyc = np.clip(ty, 0, ROWS - 1)
+            for tx, new_col in ((tx0, row_ok), (tx1, row_ok & (tx1 != tx0))):
+                t = s.tiles[k, tyc, tx]
+                hit = new_col & _SOLID[t]
+                if hit.any():
+                    s.on_ground |= collide_y_n(fy, vy, TILE, tyc * TILE, tyc * TILE + TILE, hit, bonk_vy=FIX)
+                coin = new_col & (t == COIN)
+                if coin.any():
+                    s.tiles[k[coin], tyc[coin], tx[coin]] = 0
+                    s.coins += coin
+                    reward += coin * R_COIN
+        # flag trigger, tested against the pre-collision box as the game does
+        _, flags = level_templates()
+        f = flags[s.level]
+        win = alive & (x < f[:, 0] + f[:, 2]) & (f[:, 0] < x + TILE) & (y < f[:, 1] + f[:, 3]) & (f[:, 1] < y + TILE)
+        reward += win * R_FLAG + dead * R_DEATH
+        s.t += 1
+        terminated, truncated = dead | win, (s.t >= TIME_LIMIT) & ~(dead | win)
+        info = {"win": win, "coins": s.coins.copy(), "level": s.level.copy()}
+        done = terminated | truncated
+        if done.any():
+            s._reset(done)
+        return s._observe(), reward, terminated, truncated, info
+
+    def close(s):
+        pass
+
+
+# -------------------------------------------------------------
+#  SUBPROCESS POOL: the same API, envs split across worker processes
+# -------------------------------------------------------------
+def _worker(conn, num_envs, levels):
+    env = NesVecEnv(num_envs, levels)
+    while True:
+        cmd, arg = conn.recv()
+        if cmd == "step":
+            conn.send(env.step(arg))
+        elif cmd == "reset":
+            conn.send(env.reset(*arg))
+        else:
+            conn.close()
+            return
+
+
+class SubprocNesVecEnv:
+    def __init__(s, num_envs, workers=None, levels=None):
+        s.num_envs = num_envs
+        workers = max(1, min(workers or mp.cpu_count(), num_envs))
+        s.splits = np.cumsum([len(c) for c in np.array_split(np.arange(num_envs), workers)])[:-1]
+        s.conns, s.procs = [], []
+        for n in np.diff(np.concatenate(([0], s.splits, [num_envs]))):
+            parent, child = mp.Pipe()
+            p = mp.Process(target=_worker, args=(child, int(n), levels), daemon=True)
+            p.start()
+            child.close()
+            s.conns.append(parent); s.procs.append(p)
+
+    def _gather(s, results):
+        obs = {key: np.concatenate([r[0][key] for r in results]) for key in results[0][0]}
+        if len(results[0]) == 2:
+            return obs, {}
+        out = [obs] + [np.concatenate([r[i] for r in results]) for i in (1, 2, 3)]
+        out.append({key: np.concatenate([r[4][key] for r in results]) for key in results[0][4]})
+        return tuple(out)
+
+    def reset(s, seed=None, options=None):
+        for i, c in enumerate(s.conns):
+            c.send(("reset", (None if seed is None else seed + i, options)))
+        return s._gather([c.recv() for c in s.conns])
+
+    def step(s, actions):
+        for c, part in zip(s.conns, np.split(np.asarray(actions), s.splits)):
+            c.send(("step", part))
+        return s._gather([c.recv() for c in s.conns])
+
+    def close(s):
+        for c, p in zip(s.conns, s.procs):
+            c.send(("close", None))
+            p.join()
+
+
+def make_vec_env(num_envs, workers=0, levels=None):
+    """workers=0 steps every env in this process; >0 spreads them over a process pool."""
+    if workers:
+        return SubprocNesVecEnv(num_envs, workers, levels)
+    return NesVecEnv(num_envs, levels)
+
+
+def main(argv):
+    envs = int(argv[1]) if len(argv) > 1 else 1024
+    steps = int(argv[2]) if len(argv) > 2 else 1000
+    workers = int(argv[3]) if len(argv) > 3 else 0
+    env = make_vec_env(envs, workers)
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, NUM_ACTIONS, (steps, envs))
+    t0 = time.perf_counter()
+    for a in actions:
+        env.step(a)
+    dt = time.perf_counter() - t0
+    env.close()
+    print("%d envs x %d steps: %.0f steps/s" % (envs, steps, envs * steps / dt))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,209 @@
+import random
+import struct
+from fixphys import FIX, to_fix, px, fall, collide_y
+
+# -------------------------------------------------------------
+#  NES TILE-LEVEL HELPERS (pure Python, no pygame needed)
+#  Tile ids: 0=sky, 1=ground, 2=brick, 3=block, 4=pipe, 5=coin, 6=flag
+# -------------------------------------------------------------
+GROUND, BRICK, BLOCK, PIPE, COIN, FLAG = range(1, 7)
+SOLID = (GROUND, BRICK, BLOCK, PIPE)
+
+
+def make_level(level_idx, cols, rows, tile, flag_h=7):
+    """SMB1FAKEPPU's level generator: the same grid for the same level_idx,
+    whether the game or the headless env (nesenv.py) asks for it."""
+    rng = random.Random(level_idx)
+    level = [[0 for _ in range(cols)] for _ in range(rows)]
+    # Ground
+    for x in range(cols):
+        for y in range(rows - 2, rows):
+            level[y][x] = GROUND
+    # Pipes
+    for _ in range(rng.randint(1, 4)):
+        px = rng.randint(6, cols - 7)
+        for py in range(rows - 5, rows - 2):
+            level[py][px] = PIPE
+            level[py - 1][px] = PIPE
+    # Bricks and blocks
+    for _ in range(18):
+        bx = rng.randint(4, cols - 6)
+        by = rng.randint(4, rows - 7)
+        level[by][bx] = rng.choice([BRICK, BLOCK])
+    # Coins
+    for _ in range(18):
+        cx = rng.randint(4, cols - 6)
+        cy = rng.randint(2, rows - 10)
+        level[cy][cx] = COIN
+    # Flag at far right
+    level[3][cols - 3] = FLAG
+    return level, Collectibles(level, tile, flag_h)
+
+
+class Collectibles:
+    """Coin bitset keyed by tile coordinate plus the flag's trigger volume,
+    built once per level so pickups only look at the tiles under Mario."""
+    __slots__ = ("tile", "cols", "rows", "coins", "coins_left", "flag")
+
+    def __init__(s, level, tile, flag_h):
+        s.tile, s.rows, s.cols = tile, len(level), len(level[0])
+        s.coins = bytearray(s.rows * s.cols)   # 1 = coin at y * cols + x
+        s.coins_left = 0
+        s.flag = None                          # (x, y, w, h) in pixels
+        for y, row in enumerate(level):
+            for x, t in enumerate(row):
+                if t == COIN:
+                    s.coins[y * s.cols + x] = 1
+                    s.coins_left += 1
+                elif t == FLAG:
+                    s.flag = (x * tile, y * tile, tile, tile * flag_h)
+
+    def take_coins(s, level, rect, on_take=None):
+        """Clear every coin overlapping rect (x, y, w, h); returns how many were taken."""
+        rx, ry, rw, rh = rect
+        t, cols, rows, coins = s.tile, s.cols, s.rows, s.coins
+        taken = 0
+        for ty in range(max(0, ry // t), min(rows, (ry + rh - 1) // t + 1)):
+            base = ty * cols
+            for tx in range(max(0, rx // t), min(cols, (rx + rw - 1) // t + 1)):
+                if coins[base + tx]:
+                    coins[base + tx] = 0
+                    level[ty][tx] = 0
+                    taken += 1
+                    if on_take is not None:
+                        on_take(tx, ty)
+        s.coins_left -= taken
+        return taken
+
+    def at_flag(s, rect):
+        if s.flag is None:
+            return False
+        rx, ry, rw, rh = rect
+        fx, fy, fw, fh = s.flag
+        return rx < fx + fw and fx < rx + rw and ry < fy + fh and fy < ry + rh
+
+
+# -------------------------------------------------------------
+#  ONE LEVEL ATTEMPT (SMB1FAKEPPU's main-loop state)
+#  Everything the loop used to keep in locals, stepped without
+#  pygame and saved/restored as a few dozen bytes: the scalars in
+#  one struct plus one bit per coin the level started with (the
+#  grid is rebuilt from level_idx, coins are the only tiles that
+#  ever change).
+# -------------------------------------------------------------
+SPEED, JUMP, GRAVITY = 3, to_fix(8.5), to_fix(0.5)
+TIME = 999
+STATE_MAGIC, STATE_VERSION = b"NESS", 1
+# magic, version, level, mx, fy, vx, vy, on_ground, coins, lives, timer, timer_counter, flicker, win
+STATE = struct.Struct("<4sBBiiiiBHBHBIB")
+
+
+class NesRun:
+    __slots__ = ("cols", "rows", "tile", "level_idx", "level", "items", "coin_tiles", "mx", "fy", "vx",
+                 "vy", "on_ground", "coins", "lives", "timer", "timer_counter", "flicker", "win")
+
+    def __init__(s, level_idx, cols, rows, tile, lives=3, shared=None):
+        """shared: a (grid, items) pair to play instead of building the level
+        (tournament.py hands every player a view of one shared grid)."""
+        s.cols, s.rows, s.tile = cols, rows, tile
+        s.level_idx = level_idx
+        s.level, s.items = shared or make_level(level_idx, cols, rows, tile)
+        s.coin_tiles = [i for i, c in enumerate(s.items.coins) if c]
+        s.lives, s.coins, s.win = lives, 0, False
+        s.vx = s.vy = 0
+        s.on_ground = False
+        s.timer, s.timer_counter, s.flicker = TIME, 0, 0
+        s.respawn()
+
+    def respawn(s):
+        s.mx, s.fy = 40, (s.rows - 3) * s.tile * FIX
+        s.vx = s.vy = 0
+
+    @property
+    def my(s): return px(s.fy)
+
+    def step(s, left, right, jump, fps=60, on_take=None):
+        """One frame of the game loop. Returns None, "win", "dead" (respawned),
+        or "gameover" (lives refilled; the caller goes back to the menu)."""
+        t = s.tile
+        s.flicker += 1
+        s.vx = 0
+        if left: s.vx = -SPEED
+        if right: s.vx = SPEED
+        if jump and s.on_ground:
+            s.vy = -JUMP
+            s.on_ground = False
+        s.vy = fall(s.vy, GRAVITY)
+        s.mx += s.vx
+        s.fy += s.vy
+        s.mx = max(0, min(s.mx, s.cols * t - t))
+        my = px(s.fy)
+        if my > s.rows * t:
+            return s._lose(False)
+        # Collisions: only the solid tiles under Mario, row-major like the old full scan
+        s.on_ground = False
+        level = s.level
+        for ty in range(max(0, my // t), min(s.rows, (my + t - 1) // t + 1)):
+            row = level[ty]
+            for tx in range(s.mx // t, min(s.cols, (s.mx + t - 1) // t + 1)):
+                if row[tx] in SOLID:
+                    s.fy, s.vy, landed = collide_y(s.fy, s.vy, t, ty * t, ty * t + t, bonk_vy=FIX)
+                    if landed: s.on_ground = True
+        rect = (s.mx, my, t, t)
+        s.coins += s.items.take_coins(level, rect, on_take)
+        if s.items.at_flag(rect):
+            s.win = True
+        s.timer_counter += 1
+        if s.timer_counter >= fps:
+            s.timer -= 1
+            s.timer_counter = 0
+            if s.timer == 0:
+                return s._lose(True)
+        return "win" if s.win else None
+
+    def _lose(s, timeout):
+        s.lives -= 1
+        if s.lives == 0:
+            s.lives = 3
+            return "gameover"
+        s.respawn()
+        if timeout:
+            s.timer = TIME
+        return "dead"
+
+    # ---------------------------------------------------------
+    #  SAVE STATES
+    # ---------------------------------------------------------
+    def save(s):
+        coins, bits = s.items.coins, 0
+        for i, c in enumerate(s.coin_tiles):
+            if coins[c]:
+                bits |= 1 << i
+        return STATE.pack(STATE_MAGIC, STATE_VERSION, s.level_idx, s.mx, s.fy, s.vx, s.vy, s.on_ground,
+                          s.coins, s.lives, s.timer, s.timer_counter, s.flicker, s.win) + \
+            bits.to_bytes((len(s.coin_tiles) + 7) // 8, "little")
+
+    def load(s, blob, on_set=None):
+        """Restore a save() blob in place. on_set(x, y, tile) hears about every
+        grid cell that changes (e.g. to patch a PPU nametable)."""
+        (magic, version, level_idx, s.mx, s.fy, s.vx, s.vy, on_ground, s.coins, s.lives,
+         s.timer, s.timer_counter, s.flicker, win) = STATE.unpack_from(blob)
+        if magic != STATE_MAGIC or version != STATE_VERSION:
+            raise ValueError("not a v%d NES save state" % STATE_VERSION)
+        s.on_ground, s.win = bool(on_ground), bool(win)
+        if level_idx != s.level_idx:           # slow path: another level's grid
+            s.level_idx = level_idx
+            s.level, s.items = make_level(level_idx, s.cols, s.rows, s.tile)
+            s.coin_tiles = [i for i, c in enumerate(s.items.coins) if c]
+        bits = int.from_bytes(blob[STATE.size:], "little")
+        coins, cols, level, left = s.items.coins, s.cols, s.level, 0
+        for i, c in enumerate(s.coin_tiles):
+            bit = (bits >> i) & 1
+            left += bit
+            if coins[c] != bit:
+                coins[c] = bit
+                y, x = divmod(c, cols)
+                level[y][x] = COIN if bit else 0
+                if on_set is not None:
+                    on_set(x, y, level[y][x])
+        s.items.coins_left = left
@@ -0,0 +1,169 @@
+import heapq
+import math
+from array import array
+import pygame
+
+# -------------------------------------------------------------
+#  GRAPH OVERWORLD
+#  World dicts are the usual {"name", "nodes": [{"pos", "level"}]}
+#  plus an optional "edges": [(i, j), ...]; without it nodes chain
+#  in list order, as on the original maps.
+#
+#  Per world: shortest-path next hops are precomputed per
+#  destination, and the static map (paths + nodes) is baked to one
+#  surface. A frame is one blit of the visible part of that layer
+#  plus the cursor, however many nodes the world has.
+# -------------------------------------------------------------
+class WorldGraph:
+    __slots__ = ("pos", "adj", "next_hop")
+
+    def __init__(s, world):
+        s.pos = [n["pos"] for n in world["nodes"]]
+        n = len(s.pos)
+        edges = world.get("edges") or [(i - 1, i) for i in range(1, n)]
+        s.adj = [[] for _ in range(n)]
+        for a, b in edges:
+            d = math.dist(s.pos[a], s.pos[b])
+            s.adj[a].append((b, d)); s.adj[b].append((a, d))
+        # next_hop[dst][src] = first node to visit from src towards dst; one
+        # Dijkstra tree rooted at dst, built the first time dst is a destination
+        s.next_hop = [None] * n
+
+    def _tree(s, root):
+        dist = [math.inf] * len(s.pos)
+        parent = array("i", range(len(s.pos)))
+        dist[root] = 0.0
+        heap = [(0.0, root)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, w in s.adj[u]:
+                if d + w < dist[v]:
+                    dist[v], parent[v] = d + w, u
+                    heapq.heappush(heap, (d + w, v))
+        return parent
+
+    def step(s, src, dst):
+        tree = s.next_hop[dst]
+        if tree is None:
+            tree = s.next_hop[dst] = s._tree(dst)
+        return tree[src]
+
+    def reachable(s, src, dst):
+        # _tree leaves parent[v] = v for nodes it never reached
+        return src == dst or s.step(src, dst) != src
+
+    def neighbour(s, i, dx, dy):
+        """Adjacent node lying most in direction (dx, dy), or i if there is none."""
+        (x, y), best, score = s.pos[i], i, 0.0
+        for j, d in s.adj[i]:
+            if d == 0:  # coincident nodes have no direction
+                continue
+            jx, jy = s.pos[j]
+            c = ((jx - x) * dx + (jy - y) * dy) / d
+            if c > score:
+                best, score = j, c
+        return best
+
+    def edges(s):
+        return [(a, b) for a in range(len(s.adj)) for b, _ in s.adj[a] if a < b]
+
+
+class Overworld:
+    __slots__ = ("smw_map", "world", "node", "dest", "cur", "speed", "view", "col",
+                 "graphs", "layers", "titles")
+
+    def __init__(s, smw_map, view, col, speed=240.0):
+        s.smw_map, s.view, s.col, s.speed = smw_map, view, col, speed
+        s.graphs, s.layers, s.titles = {}, {}, {}
+        s.world = 0
+        s.goto(0)
+
+    # ---------------------------------------------------------
+    #  NAVIGATION
+    # ---------------------------------------------------------
+    def graph(s, w=None):
+        w = s.world if w is None else w
+        g = s.graphs.get(w)
+        if g is None:
+            g = s.graphs[w] = WorldGraph(s.smw_map[w])
+        return g
+
+    def goto(s, node):
+        s.node = s.dest = node
+        s.cur = list(s.graph().pos[node])
+
+    @property
+    def traveling(s):
+        return s.node != s.dest
+
+    def move(s, dx, dy=0):
+        if not s.traveling:
+            s.dest = s.graph().neighbour(s.node, dx, dy)
+
+    def travel_to(s, node):
+        """Head for node; returns False (and stays put) if no path leads there."""
+        if not s.graph().reachable(s.node, node):
+            return False
+        s.dest = node
+        return True
+
+    def switch_world(s, d):
+        w = s.world + d
+        if 0 <= w < len(s.smw_map):
+            s.world = w
+            s.goto(0)
+
+    def update(s, dt):
+        if not s.traveling:
+            return
+        g = s.graph()
+        hop = g.step(s.node, s.dest)
+        tx, ty = g.pos[hop]
+        dx, dy = tx - s.cur[0], ty - s.cur[1]
+        d, step = math.hypot(dx, dy), s.speed * dt
+        if d <= step:
+            s.cur[0], s.cur[1] = tx, ty
+            s.node = hop
+        else:
+            s.cur[0] += dx * step / d; s.cur[1] += dy * step / d
+
+    def level(s, node=None):
+        return s.smw_map[s.world]["nodes"][s.node if node is None else node]["level"]
+
+    def nearby(s):
+        """Nodes the player may enter next: under the cursor, its destination, its neighbours."""
+        return list(dict.fromkeys([s.node, s.dest] + [j for j, _ in s.graph().adj[s.node]]))
+
+    # ---------------------------------------------------------
+    #  RENDERING
+    # ---------------------------------------------------------
+    def layer(s, w):
+        surf = s.layers.get(w)
+        if surf is None:
+            g = s.graph(w)
+            vw, vh = s.view
+            surf = pygame.Surface((max([vw] + [x + 40 for x, _ in g.pos]),
+                                   max([vh] + [y + 40 for _, y in g.pos])))
+            surf.fill(s.col["sky"])
+            for a, b in g.edges():
+                pygame.draw.line(surf, s.col["gray"], g.pos[a], g.pos[b], 5)
+            for p in g.pos:
+                pygame.draw.circle(surf, s.col["green"], p, 16)
+            if pygame.display.get_surface() is not None:
+                surf = surf.convert()
+            s.layers[w] = surf
+        return surf
+
+    def draw(s, surf, font):
+        layer = s.layer(s.world)
+        (vw, vh), (lw, lh) = s.view, layer.get_size()
+        cx = max(0, min(int(s.cur[0]) - vw // 2, lw - vw))
+        cy = max(0, min(int(s.cur[1]) - vh // 2, lh - vh))
+        surf.blit(layer, (0, 0), (cx, cy, vw, vh))
+        pygame.draw.circle(surf, s.col["red"], (int(s.cur[0]) - cx, int(s.cur[1]) - cy), 12)
+        title = s.titles.get((s.world, font))
+        if title is None:
+            title = s.titles[(s.world, font)] = font.render(s.smw_map[s.world]["name"], True, s.col["black"])
+        surf.blit(title, (vw // 2 - 80, 20))
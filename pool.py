@@ -0,0 +1,37 @@
+import threading
+from collections import defaultdict
+
+# -------------------------------------------------------------
+#  ENTITY POOL
+#  Free lists per entity class. acquire() re-runs __init__ on a
+#  recycled object instead of allocating a new one; release()
+#  hands objects back when their level is unloaded. Levels keep
+#  (object, spawn args) pairs, so a retry re-initializes every
+#  entity in place without touching the pool at all.
+# -------------------------------------------------------------
+class EntityPool:
+    def __init__(s):
+        s.free = defaultdict(list)
+        s.allocs = s.reuses = 0        # totals since start-up
+        s.lock = threading.Lock()      # levels are also built by the prefetch thread
+
+    def acquire(s, owner, cls, *args):
+        """Return a cls(*args), recycled when possible; fresh allocations are
+        tallied on owner.allocs as well as on the pool."""
+        with s.lock:
+            free = s.free[cls]
+            obj = free.pop() if free else None
+            if obj is None:
+                s.allocs += 1
+            else:
+                s.reuses += 1
+        if obj is None:
+            owner.allocs += 1
+            return cls(*args)
+        cls.__init__(obj, *args)
+        return obj
+
+    def release(s, objs):
+        with s.lock:
+            for obj in objs:
+                s.free[type(obj)].append(obj)
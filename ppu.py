@@ -0,0 +1,102 @@
+import pygame
+import numpy as np
+
+# -------------------------------------------------------------
+#  NES-STYLE PPU
+#  8-bit indexed framebuffer composed from a pattern table, a
+#  nametable and an OAM sprite list. Colours live only in the
+#  palette, so palette effects are a set_palette_at() away.
+# -------------------------------------------------------------
+SPR_PAL = 128                          # sprite sub-palettes start here: SPR_PAL + attr*4 + (1..3)
+OAM_SIZE = 64
+
+
+class PPU:
+    __slots__ = ("w", "h", "tile", "surf", "bg_patterns", "spr_patterns",
+                 "nametable", "oam", "oam_count", "scroll_x", "scroll_y", "_win")
+
+    def __init__(s, w, h, tile=16, palette=()):
+        s.w, s.h, s.tile = w, h, tile
+        s.surf = pygame.Surface((w, h), depth=8)
+        s.surf.set_palette([(0, 0, 0)] * 256)
+        for i, rgb in enumerate(palette):
+            s.surf.set_palette_at(i, rgb)
+        s.bg_patterns = np.zeros((1, tile, tile), np.uint8)   # [id, x, y]
+        s.spr_patterns = []                                    # [x, y] arrays, 0 = transparent
+        s.nametable = np.zeros((1, 1), np.uint8)               # [col, row]
+        s.oam = np.zeros((OAM_SIZE, 4), np.int32)              # x, y, pattern, attr
+        s.oam_count = 0
+        s.scroll_x = s.scroll_y = 0
+        s._win = np.zeros((w // tile + 2, h // tile + 2), np.uint8)
+
+    # ---------------------------------------------------------
+    #  PALETTE
+    # ---------------------------------------------------------
+    def set_color(s, i, rgb):
+        s.surf.set_palette_at(i, rgb)
+
+    def set_sprite_palette(s, attr, colors):
+        for i, rgb in enumerate(colors, 1):
+            s.surf.set_palette_at(SPR_PAL + attr * 4 + i, rgb)
+
+    # ---------------------------------------------------------
+    #  PATTERN TABLES & NAMETABLE
+    # ---------------------------------------------------------
+    def bake(s, painter, size):
+        """Run painter(surf) on an 8-bit surface; pygame colours are raw palette indices."""
+        surf = pygame.Surface(size, depth=8)
+        surf.set_palette(s.surf.get_palette())
+        surf.fill(0)
+        painter(surf)
+        return pygame.surfarray.array2d(surf).astype(np.uint8)
+
+    def load_bg_patterns(s, painters):
+        t = s.tile
+        s.bg_patterns = np.stack([s.bake(p, (t, t)) for p in painters])
+
+    def add_sprite_pattern(s, painter, size):
+        s.spr_patterns.append(s.bake(painter, size))
+        return len(s.spr_patterns) - 1
+
+    def load_nametable(s, rows):
+        s.nametable = np.array(rows, np.uint8).T.copy()
+
+    def set_tile(s, col, row, tile_id):
+        s.nametable[col, row] = tile_id
+
+    # ---------------------------------------------------------
+    #  OAM
+    # ---------------------------------------------------------
+    def clear_oam(s):
+        s.oam_count = 0
+
+    def push_sprite(s, x, y, pattern, attr=0):
+        if s.oam_count < OAM_SIZE:
+            s.oam[s.oam_count] = (x, y, pattern, attr)
+            s.oam_count += 1
+
+    # ---------------------------------------------------------
+    #  COMPOSITE
+    # ---------------------------------------------------------
+    def render(s, dest, pos=(0, 0)):
+        t, win = s.tile, s._win
+        c0, fx = divmod(s.scroll_x, t)
+        r0, fy = divmod(s.scroll_y, t)
+        win.fill(0)
+        part = s.nametable[c0:c0 + win.shape[0], r0:r0 + win.shape[1]]
+        win[:part.shape[0], :part.shape[1]] = part
+        cols, rows = win.shape
+        plane = s.bg_patterns[win].transpose(0, 2, 1, 3).reshape(cols * t, rows * t)
+
+        px = pygame.surfarray.pixels2d(s.surf)
+        px[:] = plane[fx:fx + s.w, fy:fy + s.h]
+        for x, y, pat, attr in s.oam[:s.oam_count]:
+            spr = s.spr_patterns[pat]
+            x0, y0 = max(0, x), max(0, y)
+            x1, y1 = min(s.w, x + spr.shape[0]), min(s.h, y + spr.shape[1])
+            if x0 >= x1 or y0 >= y1:
+                continue
+            src = spr[x0 - x:x1 - x, y0 - y:y1 - y]
+            np.copyto(px[x0:x1, y0:y1], src + np.uint8(SPR_PAL + attr * 4), where=src != 0)
+        del px                                 # unlock before blitting
+        dest.blit(s.surf, pos)
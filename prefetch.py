@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+
+# -------------------------------------------------------------
+#  SPECULATIVE LEVEL PREFETCH
+#  The overworld hints which levels the player may enter next;
+#  a daemon thread builds them and parks them in a small LRU.
+#  take() hands a ready level over (it is consumed -- levels are
+#  mutated by play) or builds it on the spot if it isn't ready.
+#  Levels the cache drops without handing over (LRU eviction,
+#  stale builds after invalidate()) go to discard, if given, so
+#  pooled resources they hold can be released.
+# -------------------------------------------------------------
+class Prefetcher:
+    def __init__(s, build, size=6, discard=None):
+        s.build, s.size, s.discard = build, size, discard
+        s.ready = OrderedDict()        # key -> built object
+        s.wanted = []                  # keys still to build, most urgent first
+        s.busy = None                  # key the worker is building right now
+        s.hits = s.misses = 0
+        s.gen = 0                      # bumped by invalidate(): builds from before are stale
+        s.cv = threading.Condition()
+        threading.Thread(target=s._worker, name="level-prefetch", daemon=True).start()
+
+    def hint(s, keys):
+        with s.cv:
+            s.wanted = [k for k in keys if k not in s.ready and k != s.busy][:s.size]
+            s.cv.notify()
+
+    def invalidate(s):
+        """The source data changed: discard every built level; the build in
+        flight is discarded by the worker when it finishes."""
+        with s.cv:
+            s.gen += 1
+            stale = list(s.ready.values())
+            s.ready.clear()
+        s._discard(stale)
+
+    def _discard(s, objs):
+        if s.discard is not None:      # outside the lock: release may take its own
+            for obj in objs:
+                s.discard(obj)
+
+    def take(s, key):
+        with s.cv:
+            while s.busy == key:       # almost done: wait rather than build twice
+                s.cv.wait()
+            obj = s.ready.pop(key, None)
+            if key in s.wanted:
+                s.wanted.remove(key)
+        if obj is None:
+            s.misses += 1
+            return s.build(key)
+        s.hits += 1
+        return obj
+
+    def _worker(s):
+        while True:
+            with s.cv:
+                while not s.wanted:
+                    s.cv.wait()
+                key = s.busy = s.wanted.pop(0)
+                gen = s.gen
+            try:
+                obj = s.build(key)
+            except Exception:
+                obj = None             # take() will rebuild and raise on the main thread
+            dropped = []
+            with s.cv:
+                s.busy = None
+                if obj is not None and gen != s.gen:
+                    dropped.append(obj)
+                elif obj is not None:
+                    s.ready[key] = obj
+                    s.ready.move_to_end(key)
+                    while len(s.ready) > s.size:
+                        dropped.append(s.ready.popitem(last=False)[1])
+                s.cv.notify_all()
+            s._discard(dropped)
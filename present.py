@@ -0,0 +1,120 @@
+import sys
+import atexit
+import time
+import pygame
+from postfx import PostFX
+from framegrab import FrameExport
+from capture import Capture
+
+# -------------------------------------------------------------
+#  PRESENTATION LAYER
+#  Games draw into a fixed native-resolution target; flip()
+#  nearest-neighbour scales it by an integer factor straight into
+#  a subsurface of the display (no per-frame allocation), or lets
+#  SDL's SCALED renderer do it on the GPU. The post-process grades
+#  the target into a second buffer (the display itself when it is
+#  native size), so the target always holds the ungraded frame.
+#
+#    --fullscreen   fill the desktop (4K kiosk) with the largest integer scale
+#    --scale N      windowed at N x native
+#    --scaled       hand scaling to SDL (pygame.SCALED); SDL scales
+#                   inside display.flip(), so that whole call is timed
+#    --fx NAME      start with a post-process LUT (see postfx.EFFECTS)
+#    --capture PATH record the native frames on a writer process
+#                   (PATH.cap: zlib stream, otherwise a PNG directory)
+#
+#  export_frames() grabs every frame (before post-processing) into
+#  a reused NumPy buffer for agents or analytics; see framegrab.py.
+# -------------------------------------------------------------
+class Presenter:
+    __slots__ = ("size", "window", "win_size", "target", "factor", "_dest", "_dest_size", "_graded",
+                 "post", "frames", "scale_s", "last_ms", "export", "capture")
+
+    def __init__(s, size, fullscreen=False, factor=1, scaled=False, fx="off"):
+        w, h = s.size = size
+        s.post = PostFX(fx)            # runs on the native target, before scaling
+        s.frames, s.scale_s, s.last_ms = 0, 0.0, 0.0
+        s.export = s.capture = None
+        flags = pygame.FULLSCREEN if fullscreen else 0
+        if scaled:
+            s.window = pygame.display.set_mode(size, flags | pygame.SCALED)
+            s.win_size = pygame.display.get_window_size()   # the real window, not the logical size
+            s.target, s._graded = pygame.Surface(size).convert(), s.window
+            s.factor, s._dest = 0, None
+            atexit.register(lambda: print(s.report()))
+            return
+        if fullscreen:
+            dw, dh = pygame.display.get_desktop_sizes()[0]
+            factor = max(1, min(dw // w, dh // h))
+            s.window = pygame.display.set_mode((dw, dh), flags)
+        else:
+            s.window = pygame.display.set_mode((w * factor, h * factor))
+        s.factor = factor
+        s.win_size = pygame.display.get_window_size()
+        s.target = pygame.Surface(size).convert()
+        if factor == 1 and not fullscreen:
+            s._graded, s._dest = s.window, None    # grade (or copy) straight onto the display
+            return
+        s._graded = pygame.Surface(size).convert()
+        s._dest_size = (w * factor, h * factor)
+        dw, dh = s.win_size
+        s._dest = s.window.subsurface(((dw - w * factor) // 2, (dh - h * factor) // 2) + s._dest_size)
+        atexit.register(lambda: print(s.report()))
+
+    @classmethod
+    def from_argv(cls, size, argv=None):
+        argv = sys.argv if argv is None else argv
+        factor = int(argv[argv.index("--scale") + 1]) if "--scale" in argv else 1
+        fx = argv[argv.index("--fx") + 1] if "--fx" in argv else "off"
+        p = cls(size, "--fullscreen" in argv, factor, "--scaled" in argv, fx)
+        if "--capture" in argv:
+            p.record(argv[argv.index("--capture") + 1])
+        return p
+
+    def record(s, path):
+        s.capture = Capture(s.target, path, "zlib" if path.endswith(".cap") else "png")
+        atexit.register(lambda: print(s.capture.close()))
+
+    def export_frames(s, factor=1, gray=False, stack=0):
+        s.export = FrameExport(s.target, factor, gray, stack)
+        return s.export
+
+    def flip(s):
+        if s.export is not None:
+            s.export.grab()
+        frame = s.post.apply(s.target, s._graded)
+        if s._dest is not None:
+            t0 = time.perf_counter()
+            pygame.transform.scale(frame, s._dest_size, s._dest)
+            dt = time.perf_counter() - t0
+            s.scale_s += dt; s.frames += 1
+            s.last_ms = dt * 1000.0
+        elif frame is s.target:
+            s.window.blit(frame, (0, 0))
+        if s.factor == 0:
+            t0 = time.perf_counter()
+            pygame.display.flip()
+            dt = time.perf_counter() - t0
+            s.scale_s += dt; s.frames += 1
+            s.last_ms = dt * 1000.0
+        else:
+            pygame.display.flip()
+        if s.capture is not None:
+            s.capture.grab()
+
+    def to_native(s, pos):
+        """Map a window pixel (e.g. a mouse event) back to target coordinates."""
+        if s._dest is None:
+            return pos
+        ox, oy = s._dest.get_abs_offset()
+        return ((pos[0] - ox) // s.factor, (pos[1] - oy) // s.factor)
+
+    def report(s):
+        avg = s.scale_s / s.frames * 1000.0 if s.frames else 0.0
+        if s.factor == 0:
+            return "present: %dx%d SDL SCALED -> %dx%d, flip (scale + present) %.3f ms/frame avg (%d frames)" % (
+                s.size + s.win_size + (avg, s.frames))
+        if s._dest is None:
+            return "present: native, no scaling"
+        return "present: %dx%d x%d -> %dx%d, scale %.3f ms/frame avg (%d frames)" % (
+            s.size + (s.factor,) + s.win_size + (avg, s.frames))
@@ -0,0 +1,98 @@
+import pygame
+
+# -------------------------------------------------------------
+#  BATCHED SOLID-COLOUR RECT RENDERER
+#  Static rects are grouped by colour and filled once into a
+#  cached, colour-keyed layer. Dynamic rects are blitted from
+#  single-colour sprites built once per (colour, w, h), all in one
+#  blits() call over a persistent list whose positions are updated
+#  in place. Positions are world space; draw() takes the camera
+#  offset and, optionally, the (culled) item indices to draw.
+# -------------------------------------------------------------
+KEY = (255, 0, 255)
+_SPRITES = {}                          # (colour, w, h) -> Surface, shared by every batch
+
+
+def solid_sprite(color, w, h):
+    key = (tuple(color), int(w), int(h))
+    surf = _SPRITES.get(key)
+    if surf is None:
+        surf = pygame.Surface(key[1:])
+        surf.fill(color)
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert()
+        _SPRITES[key] = surf
+    return surf
+
+
+class RectBatch:
+    __slots__ = ("size", "groups", "layer", "items")
+
+    def __init__(s, size):
+        s.size = size
+        s.groups = {}                  # colour -> [rect, ...] (static)
+        s.layer = None
+        s.items = []                   # [[sprite, [x, y]], ...] (dynamic), blitted in order
+
+    def add_static(s, color, rect):
+        s.groups.setdefault(tuple(color), []).append(pygame.Rect(rect))
+        s.layer = None
+
+    def replace_static(s, color, old=None, new=None):
+        """Swap one static rect for another (either may be None) and repaint
+        only the layer area the two cover. old is looked up in every colour
+        group (it may have been added under another colour); if no group
+        holds it there is nothing to remove."""
+        dirty = [pygame.Rect(r) for r in (old, new) if r is not None]
+        if old is not None:
+            for rects in s.groups.values():
+                if dirty[0] in rects:
+                    rects.remove(dirty[0])
+                    break
+        if new is not None:
+            s.groups.setdefault(tuple(color), []).append(dirty[-1])
+        if s.layer is not None:
+            for r in dirty:
+                s.repaint(r)
+
+    def repaint(s, area):
+        area = pygame.Rect(area).clip(s.layer.get_rect())
+        if not area:
+            return
+        s.layer.fill(KEY, area)
+        for color, rects in s.groups.items():
+            for r in rects:
+                if r.colliderect(area):
+                    s.layer.fill(color, r.clip(area))
+
+    def add_dynamic(s, color, w, h, x=0, y=0):
+        s.items.append([solid_sprite(color, w, h), [int(x), int(y)]])
+        return len(s.items) - 1
+
+    def move(s, i, x, y):
+        pos = s.items[i][1]
+        pos[0] = int(x); pos[1] = int(y)
+
+    def bake(s):
+        layer = pygame.Surface(s.size)
+        layer.fill(KEY)
+        for color, rects in s.groups.items():
+            for r in rects:
+                layer.fill(color, r)
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        layer.set_colorkey(KEY, pygame.RLEACCEL)
+        s.layer = layer
+
+    def draw(s, surf, ox=0, oy=0, ids=None):
+        if s.groups:
+            if s.layer is None:
+                s.bake()
+            surf.blit(s.layer, (0, 0), (ox, oy) + surf.get_size())
+        items = s.items
+        if ids is None:
+            if not (ox or oy):
+                surf.blits(items, False)
+                return
+            ids = range(len(items))
+        surf.blits([(items[i][0], (items[i][1][0] - ox, items[i][1][1] - oy)) for i in ids], False)
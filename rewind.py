@@ -0,0 +1,134 @@
+from array import array
+
+# -------------------------------------------------------------
+#  REWIND RING
+#  One save-state blob per frame (e.g. NesRun.save()) goes into a
+#  fixed-size byte ring: a full keyframe every `keyframe` frames,
+#  otherwise the XOR against the previous frame with its zero runs
+#  run-length coded -- a frame where only Mario moved costs a few
+#  bytes. pop() walks back one frame at a time: a delta is undone
+#  by XOR-ing it onto the current state, a keyframe by replaying
+#  the deltas after the keyframe before it. When the ring is full
+#  the oldest keyframe segment is dropped, so memory never grows.
+# -------------------------------------------------------------
+KEY, DELTA = 0, 1
+
+
+def xor(a, b):
+    n = len(a)
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(n, "little")
+
+
+def rle(d):
+    """Zero-run code: repeated (zeros u8, literals u8, literal bytes)."""
+    out, i, n = bytearray(), 0, len(d)
+    while i < n:
+        z = i
+        while z < n and z - i < 255 and d[z] == 0:
+            z += 1
+        j = z
+        while j < n and j - z < 255 and d[j] != 0:
+            j += 1
+        out.append(z - i); out.append(j - z); out += d[z:j]
+        i = j
+    return out
+
+
+def unrle(r, n):
+    out, i = bytearray(n), 0
+    o = 0
+    while i < len(r):
+        o += r[i]
+        lit = r[i + 1]
+        out[o:o + lit] = r[i + 2:i + 2 + lit]
+        o += lit; i += 2 + lit
+    return bytes(out)
+
+
+class Rewind:
+    __slots__ = ("buf", "keyframe", "head", "offs", "lens", "kinds", "first", "count", "cur", "since_key")
+
+    def __init__(s, budget=1 << 20, keyframe=60, records=None):
+        s.buf = bytearray(budget)
+        s.keyframe = keyframe
+        n = records or max(64, budget // 16)
+        s.offs = array("I", bytes(4 * n))     # record table, a ring of n (offset, length, kind):
+        s.lens = array("I", bytes(4 * n))     # preallocated so a push allocates nothing that
+        s.kinds = bytearray(n)                # outlives it (no per-frame tuple for the GC)
+        s.head = s.first = s.count = 0        # oldest record at first, count records
+        s.cur = None                   # newest pushed state
+        s.since_key = 0
+
+    def __len__(s):
+        return s.count
+
+    def clear(s):
+        s.head = s.first = s.count = 0
+        s.cur, s.since_key = None, 0
+
+    def push(s, state):
+        if s.cur is None or len(state) != len(s.cur) or s.since_key >= s.keyframe:
+            kind, payload = KEY, state
+        else:
+            kind, payload = DELTA, rle(xor(s.cur, state))
+        if len(state) > len(s.buf):
+            raise ValueError("state larger than the rewind budget")
+        if s.count == len(s.kinds):
+            s._drop()                  # record table full
+        s._make_room(len(payload))
+        if kind == DELTA and not s.count:  # its keyframe was just overwritten
+            kind, payload = KEY, state
+            s._make_room(len(payload))
+        n = len(payload)
+        s.buf[s.head:s.head + n] = payload
+        j = (s.first + s.count) % len(s.kinds)
+        s.offs[j], s.lens[j], s.kinds[j] = s.head, n, kind
+        s.count += 1
+        s.head += n
+        s.since_key = 1 if kind == KEY else s.since_key + 1
+        s.cur = state
+
+    def _make_room(s, n):
+        offs, lens = s.offs, s.lens
+        if s.head + n > len(s.buf):    # records never straddle the end
+            while s.count and offs[s.first] >= s.head:
+                s._drop()              # the tail gap holds the oldest records
+            s.head = 0
+        lo, hi = s.head, s.head + n
+        while s.count and offs[s.first] < hi and lo < offs[s.first] + lens[s.first]:
+            s._drop()
+
+    def _drop(s):
+        """Forget the oldest record and the deltas that depended on it."""
+        cap = len(s.kinds)
+        s.first = (s.first + 1) % cap
+        s.count -= 1
+        while s.count and s.kinds[s.first] != KEY:
+            s.first = (s.first + 1) % cap
+            s.count -= 1
+
+    def _record(s, i):
+        j = (s.first + i) % len(s.kinds)
+        return s.buf[s.offs[j]:s.offs[j] + s.lens[j]]
+
+    def pop(s):
+        """Step back one frame: returns the state before the newest, or None when
+        the ring has run out (the newest state is then the oldest kept)."""
+        if s.count < 2:
+            return None
+        s.count -= 1
+        j = (s.first + s.count) % len(s.kinds)
+        s.head = s.offs[j]
+        if s.kinds[j] == DELTA:
+            s.cur = xor(s.cur, unrle(s._record(s.count), len(s.cur)))
+            s.since_key -= 1
+        else:                          # rebuild from the keyframe before it
+            i = s.count - 1
+            while s.kinds[(s.first + i) % len(s.kinds)] != KEY:
+                i -= 1
+            state = bytes(s._record(i))
+            for k in range(i + 1, s.count):
+                state = xor(state, unrle(s._record(k), len(state)))
+            s.cur = state
+            s.since_key = s.count - i
+        return s.cur
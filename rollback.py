@@ -0,0 +1,186 @@
+import random
+import socket
+import struct
+from collections import deque
+
+# -------------------------------------------------------------
+#  ROLLBACK NETCODE (GGPO-style, two or more peers over UDP)
+#  Every peer runs the whole deterministic sim. Local input is
+#  scheduled `delay` frames ahead and sent straight away; remote
+#  input that hasn't arrived is predicted (= that player's previous
+#  input). The state before every frame is saved into a fixed ring,
+#  so when a late input contradicts a prediction we load the frame
+#  it belongs to and re-simulate up to now. Peers never run more
+#  than `window` frames past the last input they have confirmed.
+#
+#  The sim plugs in with: STATE_SIZE, save(buf, off), load(buf, off)
+#  and step(inputs) where inputs is a list of one int per player.
+#  Every packet acks, per player, the last frame the sender has
+#  confirmed, and every tick (stalled or not) each peer resends its
+#  local inputs from the oldest frame a peer hasn't acked -- so an
+#  outage of any length is caught up as soon as packets get through.
+#
+#    packet: PACKET, one "<i" ack per player, then count input bytes
+# -------------------------------------------------------------
+RING = 64                              # frames of saved state / inputs kept
+PACKET = struct.Struct("<BIB")         # player, frame of the first input, count
+
+
+class Rollback:
+    def __init__(s, sim, players, local, transport, delay=2, window=8):
+        s.sim, s.players, s.local, s.transport = sim, players, local, transport
+        s.delay, s.window = delay, window
+        s.frame = 0                                    # next frame to simulate
+        s.inputs = [[0] * players for _ in range(RING)]
+        s.confirmed = [delay - 1] * players            # per player: every input up to here is known
+        s.states = bytearray(RING * sim.STATE_SIZE)
+        s.rollback_to = None
+        s.rollbacks = s.resimulated = s.stalls = 0
+        s.acked = [delay - 1] * players                # per peer: our inputs it has confirmed
+        s._acks = struct.Struct("<%di" % players)
+        s._out = bytearray(PACKET.size + s._acks.size + RING)
+
+    # ---------------------------------------------------------
+    def add_local(s, bits):
+        """Schedule this tick's local input; it takes effect `delay` frames from now."""
+        f = s.frame + s.delay
+        if s.confirmed[s.local] < f:                   # else stalled last tick: already scheduled
+            s.inputs[f % RING][s.local] = bits
+            s.confirmed[s.local] = f
+        s._send()
+
+    def _send(s):
+        """Our inputs from the oldest one a peer still lacks, plus our acks."""
+        last = s.confirmed[s.local]
+        first = min(a for p, a in enumerate(s.acked) if p != s.local) + 1
+        first = max(first, last - RING + 1, 0)         # older frames are gone from the ring
+        n = max(0, last - first + 1)
+        out, off = s._out, PACKET.size + s._acks.size
+        PACKET.pack_into(out, 0, s.local, first, n)
+        s._acks.pack_into(out, PACKET.size, *s.confirmed)
+        for k in range(n):
+            out[off + k] = s.inputs[(first + k) % RING][s.local]
+        s.transport.send(memoryview(out)[:off + n])
+
+    def receive(s):
+        head = PACKET.size + s._acks.size
+        for data in s.transport.recv():
+            if len(data) < head:
+                continue
+            p, first, n = PACKET.unpack_from(data)
+            if p >= s.players or p == s.local or len(data) < head + n:
+                continue
+            s.acked[p] = max(s.acked[p], s._acks.unpack_from(data, PACKET.size)[s.local])
+            for k in range(n):
+                f = first + k
+                if f <= s.confirmed[p]:
+                    continue                           # a repeat we already have
+                if f >= s.frame + RING - s.window - 1:
+                    break                              # too far ahead for the ring
+                if f != s.confirmed[p] + 1:
+                    break                              # gap: wait for a packet that fills it
+                i, bits = f % RING, data[head + k]
+                if f < s.frame and s.inputs[i][p] != bits:   # mispredicted, already simulated
+                    s.rollback_to = f if s.rollback_to is None else min(s.rollback_to, f)
+                s.inputs[i][p] = bits
+                s.confirmed[p] = f
+
+    def advance(s):
+        """Simulate one frame (after any rollback). False = stalled waiting on a peer."""
+        if s.rollback_to is not None:
+            f0, s.rollback_to = s.rollback_to, None
+            s.sim.load(s.states, (f0 % RING) * s.sim.STATE_SIZE)
+            s.rollbacks += 1
+            for f in range(f0, s.frame):
+                s._simulate(f)
+                s.resimulated += 1
+        if s.frame - min(s.confirmed) > s.window:
+            s.stalls += 1
+            return False
+        s._simulate(s.frame)
+        s.frame += 1
+        return True
+
+    def _simulate(s, f):
+        i = f % RING
+        s.sim.save(s.states, i * s.sim.STATE_SIZE)   # state *before* frame f
+        row, prev, confirmed = s.inputs[i], s.inputs[(f - 1) % RING], s.confirmed
+        for p in range(s.players):
+            if f > confirmed[p]:
+                row[p] = prev[p]                       # predict: hold the last input
+        s.sim.step(row)
+
+
+# -------------------------------------------------------------
+#  TRANSPORTS
+# -------------------------------------------------------------
+class UdpTransport:
+    def __init__(s, bind, peers):
+        s.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.sock.bind(bind)
+        s.sock.setblocking(False)
+        s.peers = list(peers)
+
+    def send(s, data):
+        for addr in s.peers:
+            try:
+                s.sock.sendto(data, addr)
+            except OSError:
+                pass                                   # unreachable peer: prediction covers it
+
+    def recv(s):
+        while True:
+            try:
+                data, _ = s.sock.recvfrom(512)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                continue                               # e.g. ICMP port unreachable on Windows
+            yield data
+
+    def close(s):
+        s.sock.close()
+
+
+class LaggyTransport:
+    """Wraps a transport, holding outgoing datagrams back `latency` +- `jitter`
+    ticks and dropping a `loss` fraction -- a bad LAN on loopback."""
+
+    def __init__(s, inner, latency=3, jitter=2, loss=0.05, seed=0):
+        s.inner, s.latency, s.jitter, s.loss = inner, latency, jitter, loss
+        s.rng = random.Random(seed)
+        s.queue, s.tick = deque(), 0
+
+    def send(s, data):
+        if s.rng.random() >= s.loss:
+            due = s.tick + max(0, s.latency + s.rng.randint(-s.jitter, s.jitter))
+            s.queue.append((due, bytes(data)))
+
+    def pump(s):
+        s.tick += 1
+        for _ in range(len(s.queue)):
+            due, data = s.queue.popleft()
+            if due <= s.tick:
+                s.inner.send(data)
+            else:
+                s.queue.append((due, data))
+
+    def recv(s):
+        return s.inner.recv()
+
+
+class LoopbackPeer:
+    """Stand-in remote player in this process: its own sim and Rollback on a local
+    UDP port behind a LaggyTransport, driven by a scripted input function."""
+
+    def __init__(s, sim, players, local, port, peer_port, script, **lag):
+        s.net = LaggyTransport(UdpTransport(("127.0.0.1", port), [("127.0.0.1", peer_port)]), **lag)
+        s.session = Rollback(sim, players, local, s.net)
+        s.script = script
+
+    def pump(s):
+        r = s.session
+        r.receive()
+        r.add_local(s.script(r.frame))
+        r.advance()
+        s.net.pump()
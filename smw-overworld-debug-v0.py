@@ -1,10 +1,16 @@
-import pygame, sys, random
+import pygame, sys, os, random, struct
+from levelpack import LevelPack
+from overworld import Overworld
+from prefetch import Prefetcher
+from rectbatch import RectBatch
+from camera import Camera, XIndex
+from fixphys import FIX, to_fix, accelerate, fall, collide_y
+from rollback import Rollback, UdpTransport, LoopbackPeer
 
 # -------------------------------------------------------------
 #  CONSTANTS & GLOBALS (SNES‑style fixed‑point, no PNG assets)
 # -------------------------------------------------------------
-WIDTH, HEIGHT, TILE, FPS = 640, 400, 32, 60
-FIX = 256                              # 8‑bit fractional fixed‑point (1px = 256)
+WIDTH, HEIGHT, TILE, FPS = 640, 400, 32, 60  # FIX (1px = 256) lives in fixphys.py
 
 COL = dict(
     white=(255,255,255), black=(0,0,0), red=(220,50,50), green=(60,220,60), blue=(50,90,220), yellow=(240,220,70),
@@ -13,79 +19,11 @@ COL = dict(
 )
 
 # -------------------------------------------------------------
-#  MAP & LEVEL DATA  (unchanged from user source, rectangles only)
+#  MAP & LEVEL DATA  (levels/smw.json compiled to levels/smw.lvp,
+#  records decoded on first lookup -- see levelpack.py)
 # -------------------------------------------------------------
-SMW_MAP = [
-    {"name": "Yoshi's Island", "nodes": [
-        {"pos": (80, 220), "level": (1,1)},
-        {"pos": (180, 200), "level": (1,2)},
-        {"pos": (300, 220), "level": (1,3)},
-        {"pos": (420, 200), "level": (1,4)},
-        {"pos": (540, 220), "level": (1,5)},
-    ]},
-    {"name": "Donut Plains", "nodes": [
-        {"pos": (80, 100), "level": (2,1)},
-        {"pos": (180, 120), "level": (2,2)},
-        {"pos": (300, 90),  "level": (2,3)},
-        {"pos": (420, 110), "level": (2,4)},
-        {"pos": (540, 100), "level": (2,5)},
-    ]},
-]
-
-SMW_LEVELS = {
-    (1,1): {
-        "platforms": [(0, HEIGHT-40, WIDTH, 12), (120, 220, 80, 12), (320, 170, 80, 12)],
-        "enemies": [(260, HEIGHT-72, "goomba")],
-        "items": [(160, 160, "coin"), (190, 160, "powerup")],
-        "flag": (580, HEIGHT-72),
-        "pipes": [(300, HEIGHT-72, True)],
-        "switches": [(220, HEIGHT-52, "blue")],
-        "powerups": [(192, 156, "mushroom")],
-        "yoshi": (90, HEIGHT-72)
-    },
-    (1,2): {"platforms": [(0, HEIGHT-40, WIDTH, 12), (200, 160, 100, 12)],
-             "enemies": [(350, HEIGHT-72, "goomba"), (400, 140, "koopa")],
-             "items": [(240, 120, "coin")], "flag": (580, HEIGHT-72),
-             "pipes": [], "switches": [], "powerups": [], "yoshi": None
-    },
-    (1,3): {"platforms": [(0, HEIGHT-40, WIDTH, 12), (300, 120, 120, 12), (500, 70, 80, 12)],
-             "enemies": [(400, HEIGHT-72, "koopa")],
-             "items": [(320, 100, "powerup")], "flag": (580, HEIGHT-72),
-             "pipes": [], "switches": [], "powerups": [(325, 90, "mushroom")], "yoshi": None
-    },
-    (1,4): {"platforms": [(0, HEIGHT-40, WIDTH, 12), (220, 190, 80, 12), (400, 110, 70, 12)],
-             "enemies": [(420, HEIGHT-72, "goomba")],
-             "items": [(270, 170, "coin")], "flag": (580, HEIGHT-72),
-             "pipes": [], "switches": [], "powerups": [], "yoshi": (100, HEIGHT-72)
-    },
-    (1,5): {"platforms": [(0, HEIGHT-40, WIDTH, 12)],
-             "enemies": [(450, HEIGHT-72, "koopa")],
-             "items": [], "flag": (580, HEIGHT-72),
-             "pipes": [], "switches": [], "powerups": [], "yoshi": None
-    },
-    (2,1): {"platforms": [(0, HEIGHT-40, WIDTH, 12), (200, 130, 100, 12), (400, 80, 80, 12)],
-             "enemies": [(280, HEIGHT-72, "goomba")],
-             "items": [(210, 110, "coin")], "flag": (580, HEIGHT-72),
-             "pipes": [], "switches": [], "powerups": [], "yoshi": None
-    },
-    (2,2): {"platforms": [(0, HEIGHT-40, WIDTH, 12)],
-             "enemies": [(360, HEIGHT-72, "koopa")],
-             "items": [(230, 130, "coin")], "flag": (580, HEIGHT-72),
-             "pipes": [], "switches": [], "powerups": [], "yoshi": (100, HEIGHT-72)
-    },
-    (2,3): {"platforms": [(0, HEIGHT-40, WIDTH, 12), (400, 60, 100, 12)],
-             "enemies": [(420, 38, "goomba")], "items": [], "flag": (580, HEIGHT-72),
-             "pipes": [], "switches": [], "powerups": [], "yoshi": None
-    },
-    (2,4): {"platforms": [(0, HEIGHT-40, WIDTH, 12), (150, 110, 200, 12)],
-             "enemies": [], "items": [(180, 90, "powerup")], "flag": (580, HEIGHT-72),
-             "pipes": [], "switches": [(200, HEIGHT-52, "purple")], "powerups": [], "yoshi": None
-    },
-    (2,5): {"platforms": [(0, HEIGHT-40, WIDTH, 12)],
-             "enemies": [(560, HEIGHT-72, "koopa")], "items": [], "flag": (580, HEIGHT-72),
-             "pipes": [], "switches": [], "powerups": [], "yoshi": (90, HEIGHT-72)
-    }
-}
+LEVEL_PACK = LevelPack(os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels", "smw.lvp"))
+SMW_MAP, SMW_LEVELS = LEVEL_PACK.map, LEVEL_PACK
 
 # -------------------------------------------------------------
 #  CORE FIXED-POINT ENTITY & HELPERS
@@ -99,7 +37,7 @@ class Ent:
         s.col = col
         s.on_ground = False
     def R(s): return pygame.Rect(s.x // FIX, s.y // FIX, s.w, s.h)
-    def draw(s, surf): surf.fill(s.col, s.R())
+    def draw(s, surf, ox=0, oy=0): surf.fill(s.col, s.R().move(-ox, -oy))
 
 class RectEnt:
     __slots__ = ("_rect","col")
@@ -112,76 +50,119 @@ class RectEnt:
 # -------------------------------------------------------------
 #  ACTORS: Player, Enemy, etc.
 # -------------------------------------------------------------
+IN_LEFT, IN_RIGHT, IN_JUMP = 1, 2, 4    # one input byte per player per frame
+def input_bits(k): return IN_LEFT * k[pygame.K_LEFT] | IN_RIGHT * k[pygame.K_RIGHT] | IN_JUMP * k[pygame.K_SPACE]
+
 class Player(Ent):
-    __slots__ = Ent.__slots__ + ("lives","coins","accel","fric","max_vx","jump_v","grav")
+    __slots__ = Ent.__slots__ + ("lives","coins","wins","accel","fric","max_vx","jump_v","grav")
     def __init__(s, x, y):
         super().__init__(x, y, 24, 32, COL['red'])
-        s.lives, s.coins = 5, 0
-        s.accel = int(0.18 * FIX)
-        s.fric  = int(0.12 * FIX)
-        s.max_vx = int(2.4 * FIX)
-        s.jump_v = int(-7 * FIX)
-        s.grav   = int(0.27 * FIX)
-    def handle_input(s, k):
+        s.lives, s.coins, s.wins = 5, 0, 0
+        s.accel = to_fix(0.18)
+        s.fric  = to_fix(0.12)
+        s.max_vx = to_fix(2.4)
+        s.jump_v = to_fix(-7)
+        s.grav   = to_fix(0.27)
+    def handle_input(s, k): s.apply_input(input_bits(k))
+    def apply_input(s, bits):
         ax = 0
-        if k[pygame.K_LEFT]:  ax = -s.accel
-        if k[pygame.K_RIGHT]: ax = s.accel
-        s.vx += ax
-        if ax == 0:
-            if s.vx > 0: s.vx = max(0, s.vx - s.fric)
-            elif s.vx < 0: s.vx = min(0, s.vx + s.fric)
-        s.vx = max(-s.max_vx, min(s.max_vx, s.vx))
-        if k[pygame.K_SPACE] and s.on_ground: s.vy = s.jump_v
-    def physics(s, plats):
-        s.vy += s.grav
+        if bits & IN_LEFT:  ax = -s.accel
+        if bits & IN_RIGHT: ax = s.accel
+        s.vx = accelerate(s.vx, ax, s.fric, s.max_vx)
+        if bits & IN_JUMP and s.on_ground: s.vy = s.jump_v
+    def physics(s, solid, width=WIDTH):
+        # solid: (left, top, right, bottom) int boxes -- no Rects built per frame
+        s.vy = fall(s.vy, s.grav)
         s.x += s.vx; s.y += s.vy
         if s.x < 0: s.x = 0
-        if s.x > (WIDTH - s.w) * FIX: s.x = (WIDTH - s.w) * FIX
+        if s.x > (width - s.w) * FIX: s.x = (width - s.w) * FIX
         s.on_ground = False
-        Rct = s.R()
-        for p in plats:
-            pr = p.R()
-            if Rct.colliderect(pr):
-                if s.vy > 0 and Rct.bottom - pr.top < 16:
-                    s.y = (pr.top - s.h) * FIX
-                    s.vy = 0; s.on_ground = True
-                elif s.vy < 0 and pr.bottom - Rct.top < 16:
-                    s.y = pr.bottom * FIX; s.vy = 0
+        x0, y0 = s.x // FIX, s.y // FIX
+        x1, y1 = x0 + s.w, y0 + s.h
+        for l, t, r, b in solid:
+            if x0 < r and l < x1 and y0 < b and t < y1:
+                s.y, s.vy, landed = collide_y(s.y, s.vy, s.h, t, b, 16)
+                if landed: s.on_ground = True
+    def touches(s, box):
+        l, t, r, b = box
+        x0, y0 = s.x // FIX, s.y // FIX
+        return x0 < r and l < x0 + s.w and y0 < b and t < y0 + s.h
 
 class Enemy(RectEnt): pass
 
 # -------------------------------------------------------------
-#  OVERWORLD & LEVEL LOADER
+#  LEVEL LOADER  (overworld lives in overworld.py)
 # -------------------------------------------------------------
-class Overworld:
-    __slots__ = ("smw_map","world","node","move_delay","move_cooldown")
-    def __init__(s, smw_map):
-        s.smw_map = smw_map; s.world = 0; s.node = 0
-        s.move_delay = 0; s.move_cooldown = 0.15
-    def draw(s, surf, font):
-        nodes = s.smw_map[s.world]['nodes']
-        for i, n in enumerate(nodes):
-            pygame.draw.circle(surf, COL['green'], n['pos'], 16)
-            if i>0: pygame.draw.line(surf, COL['gray'], nodes[i-1]['pos'], n['pos'], 5)
-        pygame.draw.circle(surf, COL['red'], nodes[s.node]['pos'], 12)
-        surf.blit(font.render(s.smw_map[s.world]['name'], True, COL['black']), (WIDTH//2-80, 20))
-    def move(s, d):
-        if s.move_delay <=0:
-            s.node = max(0, min(len(s.smw_map[s.world]['nodes'])-1, s.node + d))
-            s.move_delay = s.move_cooldown
-    def switch_world(s, d):
-        w = s.world + d
-        if 0<=w<len(s.smw_map): s.world, s.node = w,0
-
 class Level:
-    __slots__ = ("plats","enemies","flag")
+    __slots__ = ("plats","enemies","flag","solid","goal","batch","index","width")
     def __init__(s, data):
         s.plats   = [RectEnt(*p, COL['brown']) for p in data['platforms']]
         s.enemies = [RectEnt(x,y,24,24,COL['brown']) for x,y,_ in data['enemies']]
         fx, fy = data['flag']; s.flag = RectEnt(fx, fy, 16, 32, COL['yellow'])
-    def draw(s, surf):
-        surf.blits([(e.col, e.R()) for e in s.plats+s.enemies])
-        s.flag.draw(surf)
+        s.solid = [(r.left, r.top, r.right, r.bottom) for r in (p._rect for p in s.plats if p._rect.w and p._rect.h)]
+        s.goal = (fx, fy, fx + 16, fy + 32)
+        dyn = s.enemies + [s.flag]
+        s.width = max([WIDTH] + [e._rect.right for e in s.plats + dyn])  # levels may span several screens
+        # platforms bake into one layer; enemies + flag go out in one blits() a frame
+        s.batch = RectBatch((s.width, HEIGHT))
+        for p in s.plats: s.batch.add_static(p.col, p._rect)
+        for e in dyn: s.batch.add_dynamic(e.col, e._rect.w, e._rect.h, e._rect.x, e._rect.y)
+        s.index = XIndex(range(len(dyn)), [e._rect.x for e in dyn], [e._rect.w for e in dyn])
+    def draw(s, surf, cam):
+        for i, e in enumerate(s.enemies): s.batch.move(i, e._rect.x, e._rect.y)
+        s.batch.draw(surf, cam.x, cam.y, sorted(s.index.visible(cam.x, cam.x + cam.w).tolist()))
+
+# -------------------------------------------------------------
+#  TWO-PLAYER MATCH (rollback.py runs it over UDP)
+#  A deterministic fixed-point sim: step() is integer maths on
+#  objects allocated up front, and the whole state is 40 bytes
+#  moved with one pack_into/unpack_from per player, so a dozen
+#  resimulated frames fit easily inside one 16 ms tick.
+# -------------------------------------------------------------
+SPAWNS = ((60, HEIGHT-72), (100, HEIGHT-72))
+
+class Match:
+    SLOT = struct.Struct("<iiiiBBH")      # x, y, vx, vy, on_ground, lives, wins
+    STATE_SIZE = SLOT.size * len(SPAWNS)
+    def __init__(s, level):
+        s.level = level
+        s.players = [Player(x, y) for x, y in SPAWNS]
+        s.players[1].col = COL['blue']
+    def step(s, inputs):
+        lv = s.level
+        for i in range(len(s.players)):
+            p = s.players[i]
+            p.apply_input(inputs[i])
+            p.physics(lv.solid, lv.width)
+            if p.y//FIX > HEIGHT:
+                p.x, p.y = SPAWNS[i][0]*FIX, SPAWNS[i][1]*FIX; p.lives -= 1
+                if p.lives<0: p.lives = 5
+            if p.touches(lv.goal):               # first to the flag scores; both respawn
+                p.wins += 1
+                for q, (x, y) in zip(s.players, SPAWNS):
+                    q.x, q.y, q.vx, q.vy = x*FIX, y*FIX, 0, 0
+    def save(s, buf, off):
+        for p in s.players:
+            s.SLOT.pack_into(buf, off, p.x, p.y, p.vx, p.vy, p.on_ground, p.lives, p.wins)
+            off += s.SLOT.size
+    def load(s, buf, off):
+        for p in s.players:
+            p.x, p.y, p.vx, p.vy, g, p.lives, p.wins = s.SLOT.unpack_from(buf, off)
+            p.on_ground = bool(g)
+            off += s.SLOT.size
+
+def net_session(argv, match):
+    """--loopback            race a scripted peer (laggy, lossy) in this process
+    --net PORT HOST:PORT P   LAN play: listen on PORT, peer at HOST:PORT, we are player P (0/1)"""
+    if "--loopback" in argv:
+        bot = lambda f: (IN_RIGHT if (f // 90) % 3 else IN_LEFT) | (IN_JUMP if f % 47 < 6 else 0)
+        mirror = Match(match.level)
+        peer = LoopbackPeer(mirror, 2, 1, 47001, 47000, bot)
+        return Rollback(match, 2, 0, UdpTransport(("127.0.0.1", 47000), [("127.0.0.1", 47001)])), peer
+    i = argv.index("--net")
+    host, port = argv[i+2].rsplit(":", 1)
+    net = UdpTransport(("0.0.0.0", int(argv[i+1])), [(host, int(port))])
+    return Rollback(match, 2, int(argv[i+3]), net), None
 
 # -------------------------------------------------------------
 #  GAME STATE & LOOP
@@ -193,9 +174,18 @@ def main():
     font = pygame.font.SysFont(None, 24)
 
     state = 'overworld'
-    ow = Overworld(SMW_MAP)
+    ow = Overworld(SMW_MAP, (WIDTH, HEIGHT), COL)
+    prefetch = Prefetcher(lambda key: Level(SMW_LEVELS[key]))
+    hinted = None
     player = Player(60, HEIGHT-72)
     level = None
+    cam = Camera((WIDTH, HEIGHT))
+    if "--loopback" in sys.argv or "--net" in sys.argv:
+        level = Level(SMW_LEVELS[(1, 1)])
+        match = Match(level)
+        session, peer = net_session(sys.argv, match)
+        cam.set_world(level.width, HEIGHT)
+        state = 'match'
 
     while True:
         for e in pygame.event.get():
@@ -203,31 +193,52 @@ def main():
         keys = pygame.key.get_pressed()
 
         if state == 'overworld':
-            if ow.move_delay>0: ow.move_delay -= clock.get_time()/1000.0
+            ow.update(clock.get_time()/1000.0)
+            if hinted != (ow.world, ow.node, ow.dest):  # prebuild what the cursor is near
+                hinted = (ow.world, ow.node, ow.dest)
+                prefetch.hint([ow.level(n) for n in ow.nearby()])
             if keys[pygame.K_UP]: ow.switch_world(-1)
             if keys[pygame.K_DOWN]: ow.switch_world(1)
             if keys[pygame.K_RIGHT]: ow.move(1)
             if keys[pygame.K_LEFT]: ow.move(-1)
-            if keys[pygame.K_RETURN]:
-                w,n = ow.smw_map[ow.world]['nodes'][ow.node]['level']
-                level = Level(SMW_LEVELS[(w,n)])
+            if keys[pygame.K_RETURN] and not ow.traveling:
+                w,n = ow.level()
+                level = prefetch.take((w,n)); hinted = None
+                cam.set_world(level.width, HEIGHT)
                 player.x, player.y = 60*FIX, (HEIGHT-72)*FIX
                 state = 'level'
 
         elif state == 'level':
             player.handle_input(keys)
-            player.physics(level.plats)
+            player.physics(level.solid, level.width)
             if player.y//FIX > HEIGHT:
                 player.x, player.y = 60*FIX, (HEIGHT-72)*FIX; player.lives -= 1
                 if player.lives<0: player.lives = 5
-            if player.R().colliderect(level.flag.R()): state = 'overworld'
+            cam.follow(player.x//FIX + player.w//2, player.y//FIX + player.h//2)
+            if player.touches(level.goal):
+                state = 'overworld'
+                ow.travel_to(min(ow.node+1, len(ow.graph().pos)-1))  # walk on to the next level
+
+        elif state == 'match':
+            session.receive()
+            session.add_local(input_bits(keys))
+            session.advance()
+            if peer: peer.pump()
+            me = match.players[session.local]
+            cam.follow(me.x//FIX + me.w//2, me.y//FIX + me.h//2)
 
         screen.fill(COL['sky'])
         if state == 'overworld':
             ow.draw(screen, font)
             screen.blit(font.render("World: ↑/↓ Node: ←/→ Enter=Play", True, COL['black']), (10,10))
+        elif state == 'match':
+            level.draw(screen, cam)
+            for p in match.players: p.draw(screen, cam.x, cam.y)
+            a, b = match.players
+            screen.blit(font.render(f"P1 {a.wins} : {b.wins} P2   frame {session.frame}  rollbacks {session.rollbacks}"
+                                    f"  resim {session.resimulated}  stalls {session.stalls}", True, COL['black']), (10,10))
         else:
-            level.draw(screen); player.draw(screen)
+            level.draw(screen, cam); player.draw(screen, cam.x, cam.y)
             screen.blit(font.render(f"Lives:{player.lives}", True, COL['black']), (10,10))
 
         pygame.display.flip()
@@ -1,4 +1,17 @@
-import pygame, random
+import pygame, os, random, struct
+import numpy as np
+from levelpack import LevelPack
+from hotreload import LevelWatcher
+from spritecache import SpriteCache, paint_rect, rect_size
+from overworld import Overworld
+from prefetch import Prefetcher
+from pool import EntityPool
+from rectbatch import RectBatch
+from camera import Camera, XIndex
+from fixphys import FIX, to_fix, px, accelerate, fall, collide_y
+from allocbudget import AllocBudget
+from ecs import (World, POS, VEL, COLLIDER, RENDER, AI, SOLID, TRIGGER, AI_NONE,
+                 AI_WALK_LEFT, AI_WALK_RIGHT, ai_system, movement_system, render_system)
 
 # --- CONSTANTS ---
 WIDTH, HEIGHT, TILE, FPS = 640, 400, 32, 60
@@ -8,146 +21,15 @@ COL = dict(
     darkgreen=(20,100,20), darkred=(150,20,30), purple=(120,60,180)
 )
 
-# --- MAP & LEVEL DATA ---
-SMW_MAP = [
-    {"name": "Yoshi's Island", "nodes": [
-        {"pos": (80, 220), "level": (1,1)},
-        {"pos": (180, 200), "level": (1,2)},
-        {"pos": (300, 220), "level": (1,3)},
-        {"pos": (420, 200), "level": (1,4)},
-        {"pos": (540, 220), "level": (1,5)},
-    ]},
-    {"name": "Donut Plains", "nodes": [
-        {"pos": (80, 100), "level": (2,1)},
-        {"pos": (180, 120), "level": (2,2)},
-        {"pos": (300, 90),  "level": (2,3)},
-        {"pos": (420, 110), "level": (2,4)},
-        {"pos": (540, 100), "level": (2,5)},
-    ]},
-]
+# --- MAP & LEVEL DATA (levels/smw.lvp, decoded lazily per level; see levelpack.py) ---
+LEVEL_PACK = LevelPack(os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels", "smw.lvp"))
+SMW_MAP, SMW_LEVELS = LEVEL_PACK.map, LEVEL_PACK
+HOT = LevelWatcher.from_argv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels", "smw.json"))
+if HOT: SMW_MAP, SMW_LEVELS = HOT.map, dict(HOT.levels)  # --hot [SRC.json]: play the source, reload on save
 
-SMW_LEVELS = {
-    (1,1): {
-        "platforms": [
-            (0, HEIGHT-40, WIDTH, 12), (120, 220, 80, 12), (320, 170, 80, 12)
-        ],
-        "enemies": [(260, HEIGHT-72, "goomba")],
-        "items": [(160, 160, "coin"), (190, 160, "powerup")],
-        "flag": (580, HEIGHT-72),
-        "pipes": [(300, HEIGHT-72, True)],
-        "switches": [(220, HEIGHT-52, "blue")],
-        "powerups": [(192, 156, "mushroom")],
-        "yoshi": (90, HEIGHT-72)
-    },
-    (1,2): {
-        "platforms": [
-            (0, HEIGHT-40, WIDTH, 12), (200, 160, 100, 12)
-        ],
-        "enemies": [(350, HEIGHT-72, "goomba"), (400, 140, "koopa")],
-        "items": [(240, 120, "coin")],
-        "flag": (580, HEIGHT-72),
-        "pipes": [],
-        "switches": [],
-        "powerups": [],
-        "yoshi": None
-    },
-    (1,3): {
-        "platforms": [
-            (0, HEIGHT-40, WIDTH, 12), (300, 120, 120, 12), (500, 70, 80, 12)
-        ],
-        "enemies": [(400, HEIGHT-72, "koopa")],
-        "items": [(320, 100, "powerup")],
-        "flag": (580, HEIGHT-72),
-        "pipes": [],
-        "switches": [],
-        "powerups": [(325, 90, "mushroom")],
-        "yoshi": None
-    },
-    (1,4): {
-        "platforms": [
-            (0, HEIGHT-40, WIDTH, 12), (220, 190, 80, 12), (400, 110, 70, 12)
-        ],
-        "enemies": [(420, HEIGHT-72, "goomba")],
-        "items": [(270, 170, "coin")],
-        "flag": (580, HEIGHT-72),
-        "pipes": [],
-        "switches": [],
-        "powerups": [],
-        "yoshi": (100, HEIGHT-72)
-    },
-    (1,5): {
-        "platforms": [
-            (0, HEIGHT-40, WIDTH, 12)
-        ],
-        "enemies": [(450, HEIGHT-72, "koopa")],
-        "items": [],
-        "flag": (580, HEIGHT-72),
-        "pipes": [],
-        "switches": [],
-        "powerups": [],
-        "yoshi": None
-    },
-    (2,1): {
-        "platforms": [
-            (0, HEIGHT-40, WIDTH, 12), (200, 130, 100, 12), (400, 80, 80, 12)
-        ],
-        "enemies": [(280, HEIGHT-72, "goomba")],
-        "items": [(210, 110, "coin")],
-        "flag": (580, HEIGHT-72),
-        "pipes": [],
-        "switches": [],
-        "powerups": [],
-        "yoshi": None
-    },
-    (2,2): {
-        "platforms": [
-            (0, HEIGHT-40, WIDTH, 12)
-        ],
-        "enemies": [(360, HEIGHT-72, "koopa")],
-        "items": [(230, 130, "coin")],
-        "flag": (580, HEIGHT-72),
-        "pipes": [],
-        "switches": [],
-        "powerups": [],
-        "yoshi": (100, HEIGHT-72)
-    },
-    (2,3): {
-        "platforms": [
-            (0, HEIGHT-40, WIDTH, 12), (400, 60, 100, 12)
-        ],
-        "enemies": [(420, 38, "goomba")],
-        "items": [],
-        "flag": (580, HEIGHT-72),
-        "pipes": [],
-        "switches": [],
-        "powerups": [],
-        "yoshi": None
-    },
-    (2,4): {
-        "platforms": [
-            (0, HEIGHT-40, WIDTH, 12), (150, 110, 200, 12)
-        ],
-        "enemies": [],
-        "items": [(180, 90, "powerup")],
-        "flag": (580, HEIGHT-72),
-        "pipes": [],
-        "switches": [(200, HEIGHT-52, "purple")],
-        "powerups": [],
-        "yoshi": None
-    },
-    (2,5): {
-        "platforms": [
-            (0, HEIGHT-40, WIDTH, 12)
-        ],
-        "enemies": [(560, HEIGHT-72, "koopa")],
-        "items": [],
-        "flag": (580, HEIGHT-72),
-        "pipes": [],
-        "switches": [],
-        "powerups": [],
-        "yoshi": (90, HEIGHT-72)
-    },
-}
+# --- SPRITES ---
+SPRITES = SpriteCache()
+SPRITES.register("rect", paint_rect, rect_size)
 
 # --- ENGINE CLASSES ---
 class Entity:
@@ -159,11 +41,12 @@ class Entity:
         self.active = True
     def rect(self): return pygame.Rect(int(self.x), int(self.y), int(self.w), int(self.h))
     def update(self, state): pass
-    def draw(self, surf): pygame.draw.rect(surf, self.color, self.rect())
+    def draw(self, surf, ox=0, oy=0): SPRITES.draw(surf, "rect", int(self.x)-ox, int(self.y)-oy, self.color, int(self.w), int(self.h))
 
 class Player(Entity):
+    # x/y/vx/vy are fixed-point (1px = FIX); rect() and draw() work in pixels
     def __init__(self, x, y):
-        super().__init__(x, y, 24, 32, COL["red"])
+        super().__init__(x * FIX, y * FIX, 24, 32, COL["red"])
         self.power = "small"
         self.lives, self.score, self.coins = 5, 0, 0
         self.yoshi = None
@@ -171,152 +54,237 @@ class Player(Entity):
         self.invincible = 0
         self.carrying = None
         self.keys = []
-        self.accel = 0.18
-        self.max_speed = 2.4
-        self.friction = 0.12
-        self.jump_power = -7
-        self.gravity = 0.27
+        self.accel = to_fix(0.18)
+        self.max_speed = to_fix(2.4)
+        self.friction = to_fix(0.12)
+        self.jump_power = to_fix(-7)
+        self.gravity = to_fix(0.27)
+    def rect(self): return pygame.Rect(px(self.x), px(self.y), self.w, self.h)
+    def draw(self, surf, ox=0, oy=0): SPRITES.draw(surf, "rect", px(self.x)-ox, px(self.y)-oy, self.color, self.w, self.h)
     def handle_input(self, keys):
-        if keys[pygame.K_LEFT]: self.vx -= self.accel
-        elif keys[pygame.K_RIGHT]: self.vx += self.accel
-        else:
-            if self.vx > 0:
-                self.vx -= self.friction
-                if self.vx < 0: self.vx = 0
-            elif self.vx < 0:
-                self.vx += self.friction
-                if self.vx > 0: self.vx = 0
-        if self.vx > self.max_speed: self.vx = self.max_speed
-        if self.vx < -self.max_speed: self.vx = -self.max_speed
+        ax = -self.accel if keys[pygame.K_LEFT] else self.accel if keys[pygame.K_RIGHT] else 0
+        self.vx = accelerate(self.vx, ax, self.friction, self.max_speed)
         if keys[pygame.K_SPACE] and self.on_ground:
             self.vy = self.jump_power
         if keys[pygame.K_LSHIFT]:
             self.state = "spin"
+    def respawn(self, x, y):
+        # Reset in place for retries; lives/coins/power carry over
+        self.x, self.y, self.vx, self.vy = x * FIX, y * FIX, 0, 0
+        self.on_ground = False
+        self.state, self.invincible, self.carrying = "idle", 0, None
     def update(self, state):
-        self.vy += self.gravity
+        self.vy = fall(self.vy, self.gravity)
         self.x += self.vx
         self.y += self.vy
+        right = (state.level.width - self.w) * FIX
         if self.x < 0: self.x = 0
-        if self.x > WIDTH-self.w: self.x = WIDTH-self.w
+        if self.x > right: self.x = right
         self.on_ground = False
-        rect = self.rect()
-        for plat in state.level.platforms:
-            if rect.colliderect(plat.rect()):
-                if self.vy > 0 and rect.bottom - plat.rect().top < 12:
-                    self.y = plat.rect().top - self.h
-                    self.vy = 0
-                    self.on_ground = True
-                elif self.vy < 0:
-                    self.vy = 0
-        if self.yoshi: self.yoshi.x, self.yoshi.y = self.x, self.y+24
+        ecs = state.level.ecs
+        for e in ecs.overlaps(SOLID, self.rect()).tolist():
+            top = int(ecs.pos[e, 1])
+            self.y, self.vy, landed = collide_y(self.y, self.vy, self.h, top, top + int(ecs.size[e, 1]), 12)
+            if landed: self.on_ground = True
+        if self.yoshi is not None: ecs.pos[self.yoshi] = (px(self.x), px(self.y)+24)
 
-class Yoshi(Entity):
-    def __init__(self, x, y): super().__init__(x, y, 36, 28, COL["green"])
-    def update(self, state): pass
+# --- PREFABS: level data -> components (behaviour lives in the ECS systems) ---
+def rect_sprite(color, w, h): return SPRITES.get("rect", color, int(w), int(h))[0]
 
-class Enemy(Entity):
-    def __init__(self, x, y, kind="goomba"):
-        color = COL["brown"] if kind=="goomba" else COL["green"]
-        super().__init__(x, y, 24, 24, color)
-        self.kind = kind
-    def update(self, state):
-        self.x += (-1 if self.kind=="goomba" else 1)
+def spawn_box(ecs, mask, x, y, w, h, color, **kw):
+    return ecs.spawn(mask | POS | COLLIDER | RENDER, (x, y), size=(w, h), sprite=rect_sprite(color, w, h), **kw)
 
-class Platform(Entity):
-    def __init__(self, x, y, w, h): super().__init__(x, y, w, h, COL["brown"])
-    def update(self, state): pass
+def spawn_platform(ecs, x, y, w, h): return spawn_box(ecs, SOLID, x, y, w, h, COL["brown"])
 
-class Block(Entity):
-    def __init__(self, x, y, block_type="coin"):
-        color = COL["gold"] if block_type=="coin" else COL["gray"]
-        super().__init__(x, y, TILE, TILE, color)
-        self.block_type = block_type
-    def update(self, state): pass
-
-class Pipe(Entity):
-    def __init__(self, x, y, vert=True): super().__init__(x, y, TILE, TILE*2 if vert else TILE, COL["green"])
-    def update(self, state): pass
+def spawn_enemy(ecs, x, y, kind="goomba"):
+    color = COL["brown"] if kind=="goomba" else COL["green"]
+    return spawn_box(ecs, VEL | AI, x, y, 24, 24, color, kind=kind,
+                     ai=AI_WALK_LEFT if kind=="goomba" else AI_WALK_RIGHT)
 
-class Switch(Entity):
-    def __init__(self, x, y, color): super().__init__(x, y, TILE, TILE/2, COL[color])
-    def update(self, state): pass
+def spawn_block(ecs, x, y, block_type="coin"):
+    return spawn_box(ecs, 0, x, y, TILE, TILE, COL["gold"] if block_type=="coin" else COL["gray"], kind=block_type)
 
-class PowerUp(Entity):
-    def __init__(self, x, y, ptype): super().__init__(x, y, 20, 20, COL["orange"])
-    def update(self, state): pass
+def spawn_pipe(ecs, x, y, vert=True): return spawn_box(ecs, 0, x, y, TILE, TILE*2 if vert else TILE, COL["green"])
+def spawn_switch(ecs, x, y, color): return spawn_box(ecs, 0, x, y, TILE, TILE/2, COL[color], kind=color)
+def spawn_powerup(ecs, x, y, ptype): return spawn_box(ecs, 0, x, y, 20, 20, COL["orange"], kind=ptype)
+def spawn_yoshi(ecs, x, y): return spawn_box(ecs, 0, x, y, 36, 28, COL["green"], kind="yoshi")
+def spawn_flag(ecs, x, y): return spawn_box(ecs, TRIGGER, x, y, 16, 32, COL["yellow"])
 
-class Flag(Entity):
-    def __init__(self, x, y): super().__init__(x, y, 16, 32, COL["yellow"])
-    def update(self, state): pass
+# level field -> prefab, in spawn (= draw) order
+PREFABS = dict(platforms=spawn_platform, enemies=spawn_enemy, items=spawn_block, pipes=spawn_pipe,
+               switches=spawn_switch, powerups=spawn_powerup, yoshi=spawn_yoshi, flag=spawn_flag)
 
-# --- OVERWORLD ---
-class Overworld:
-    def __init__(self, smw_map):
-        self.smw_map = smw_map
-        self.world = 0
-        self.node = 0
-        self.move_delay = 0
-        self.move_cooldown = 0.15
-    def draw(self, surf, font):
-        nodes = self.smw_map[self.world]["nodes"]
-        for i, node in enumerate(nodes):
-            pygame.draw.circle(surf, COL["green"], node["pos"], 16)
-            if i > 0:
-                pygame.draw.line(surf, COL["gray"], nodes[i-1]["pos"], node["pos"], 5)
-        pygame.draw.circle(surf, COL["red"], nodes[self.node]["pos"], 12)
-        txt = font.render(self.smw_map[self.world]["name"], True, COL["black"])
-        surf.blit(txt, (WIDTH//2-80, 20))
-    def move(self, d, dt):
-        if self.move_delay <= 0:
-            nodes = self.smw_map[self.world]["nodes"]
-            self.node = max(0, min(len(nodes)-1, self.node+d))
-            self.move_delay = self.move_cooldown
-    def switch_world(self, d):
-        w = self.world + d
-        if 0 <= w < len(self.smw_map):
-            self.world = w
-            self.node = 0
+def records(data, key):
+    # Every field as a list of spawn records (flag is one, yoshi none or one)
+    v = data[key]
+    return [v] if key == "flag" else ([] if v is None else [v]) if key == "yoshi" else v
 
 # --- LEVEL LOADER ---
+POOL = EntityPool()
+ENTITY_CAP = 256          # starting size; World.spawn grows past it
+
+def level_data(world, level):
+    data = SMW_LEVELS.get((world+1, level+1), None)
+    return data if data else SMW_LEVELS[next(iter(SMW_LEVELS))]
+
 class Level:
     def __init__(self, world, level):
-        data = SMW_LEVELS.get((world+1, level+1), None)
-        if not data: data = list(SMW_LEVELS.values())[0]
-        self.platforms = [Platform(*p) for p in data["platforms"]]
-        self.enemies = [Enemy(*e) for e in data["enemies"]]
-        self.items = [Block(*i) for i in data["items"]]
-        self.flag = Flag(*data["flag"])
-        self.pipes = [Pipe(*p) for p in data["pipes"]]
-        self.switches = [Switch(*s) for s in data["switches"]]
-        self.powerups = [PowerUp(*pu) for pu in data["powerups"]]
-        self.yoshi = Yoshi(*data["yoshi"]) if data["yoshi"] else None
-    def draw(self, surf):
-        for p in self.platforms: p.draw(surf)
-        for e in self.enemies: e.draw(surf)
-        for i in self.items: i.draw(surf)
-        for pi in self.pipes: pi.draw(surf)
-        for s in self.switches: s.draw(surf)
-        for pu in self.powerups: pu.draw(surf)
-        if self.yoshi: self.yoshi.draw(surf)
-        self.flag.draw(surf)
+        self.where = (world, level)
+        self.data = data = level_data(world, level)
+        self.allocs = 0  # component stores newly allocated (not recycled) for this load
+        self.ecs = ecs = POOL.acquire(self, World, ENTITY_CAP)
+        # Spawn in draw order; ids double as the painter's order
+        self.ids = {key: [PREFABS[key](ecs, *r) for r in records(data, key)] for key in PREFABS}
+        self.yoshi = self.ids["yoshi"][0] if self.ids["yoshi"] else None
+        ecs.snapshot()
+        live = ecs.query(POS | RENDER)
+        self.width = max(WIDTH, int((ecs.pos[live, 0] + ecs.size[live, 0]).max()))  # may span several screens
+        # Platforms never move: bake them into one layer, blit everything after them
+        self.batch = RectBatch((self.width, HEIGHT))
+        for p in data["platforms"]: self.batch.add_static(COL["brown"], p)
+        self.batch.bake()
+        self._cull()
+    def _cull(self):
+        # Cull the rest: fixed entities through a sorted x-index, movers with one vector test
+        ecs = self.ecs
+        live = np.array(sorted(e for key in PREFABS if key != "platforms" for e in self.ids[key]), np.int64)
+        moves = ((ecs.mask[live] & VEL) != 0) | (live == (-1 if self.yoshi is None else self.yoshi))
+        fixed = live[~moves]
+        self.index = XIndex(fixed, ecs.pos[fixed, 0], ecs.size[fixed, 0])
+        self.movers = live[moves]
+        self.shown = np.empty(len(live), np.int64)  # visible()'s output, reused every frame
+    def patch(self, data):
+        # Hot-reload: respawn only the entities whose record changed (an edit reuses
+        # the old id, so the painter's order holds), repaint only the platform layer
+        # under changed platforms; everything else keeps its live state
+        ecs, n = self.ecs, 0
+        for key in PREFABS:
+            old, new, ids = records(self.data, key), records(data, key), self.ids[key]
+            for i in range(max(len(old), len(new))):
+                a = old[i] if i < len(old) else None
+                b = new[i] if i < len(new) else None
+                if a == b: continue
+                n += 1
+                if a is not None: ecs.unspawn(ids[i])
+                if b is not None:
+                    e = PREFABS[key](ecs, *b)
+                    ecs.keep(e)
+                    if a is None: ids.append(e)
+                    else: ids[i] = e
+                if key == "platforms": self.batch.replace_static(COL["brown"], a, b)
+            del ids[len(new):]
+        self.data = data
+        self.yoshi = self.ids["yoshi"][0] if self.ids["yoshi"] else None
+        ids = [e for key in PREFABS for e in self.ids[key]]
+        width = max(WIDTH, int((ecs.spawn_pos(ids)[:, 0] + ecs.size[ids, 0]).max()))
+        if width != self.width:  # grew or shrank: rebake the whole layer at the new size
+            self.width, self.batch.size, self.batch.layer = width, (width, HEIGHT), None
+        self._cull()
+        return n
+    def update(self):
+        ai_system(self.ecs)
+        movement_system(self.ecs)
+    def at_flag(self, rect): return len(self.ecs.overlaps(TRIGGER, rect)) > 0
+    def reset(self):
+        # Rewind every entity to its spawn snapshot in place -- no allocation
+        self.ecs.reset()
+    def release(self):
+        POOL.release([self.ecs])
+    def visible(self, x0, x1):
+        # Fixed hits then movers into the reused buffer, sorted in place (ids are the painter's order)
+        ecs, m, out = self.ecs, self.movers, self.shown
+        fixed = self.index.visible(x0, x1)
+        k = len(fixed)
+        out[:k] = fixed
+        px = ecs.pos[m, 0]
+        m = m[(px < x1) & (px + ecs.size[m, 0] > x0)]
+        ids = out[:k + len(m)]
+        ids[k:] = m
+        ids.sort()
+        return ids
+    def draw(self, surf, cam):
+        self.batch.draw(surf, cam.x, cam.y)
+        render_system(self.ecs, surf, self.visible(cam.x, cam.x + cam.w), cam.x, cam.y)
 
 # --- GAME STATE ---
+# Save states: one header struct, then the level's ECS components (ecs.World.save)
+STATE_MAGIC, STATE_VERSION = b"SMWS", 1
+SCENES = ("overworld", "level")
+# magic, version, scene, world, level, ow world/node/dest, ow cursor x/y, camera x/y,
+# player x/y/vx/vy, on_ground, lives, score, coins, power, state, invincible, yoshi
+STATE = struct.Struct("<4sBBBBBHHddiiiiiiBiii8p8pih")
+
 class GameState:
     def __init__(self):
         self.scene = "overworld"
-        self.overworld = Overworld(SMW_MAP)
+        self.overworld = Overworld(SMW_MAP, (WIDTH, HEIGHT), COL)
         self.player = Player(60, HEIGHT-72)
         self.level = None
+        self.camera = Camera((WIDTH, HEIGHT))
         self.world = 0
         self.level_num = 0
+        self.prefetch = Prefetcher(lambda key: Level(*key), discard=Level.release)
+        self.hinted = None
+    def hint_levels(self):
+        # Build the highlighted level and its neighbours off-thread while the cursor hovers
+        ow = self.overworld
+        if self.hinted != (ow.world, ow.node, ow.dest):
+            self.hinted = (ow.world, ow.node, ow.dest)
+            self.prefetch.hint([(ow.world, n) for n in ow.nearby()])
     def switch_level(self):
         self.world = self.overworld.world
         self.level_num = self.overworld.node
-        self.level = Level(self.world, self.level_num)
-        self.player.x, self.player.y = 60, HEIGHT-72
+        if self.level: self.level.release()
+        self.level = self.prefetch.take((self.world, self.level_num))
+        self.hinted = None
+        self.player.respawn(60, HEIGHT-72)
+        self.camera.set_world(self.level.width, HEIGHT)
         self.scene = "level"
+    def save(self):
+        ow, p, cam = self.overworld, self.player, self.camera
+        head = STATE.pack(STATE_MAGIC, STATE_VERSION, SCENES.index(self.scene), self.world, self.level_num,
+                          ow.world, ow.node, ow.dest, ow.cur[0], ow.cur[1], cam.x, cam.y,
+                          p.x, p.y, p.vx, p.vy, p.on_ground, p.lives, p.score, p.coins,
+                          p.power.encode(), p.state.encode(), p.invincible, -1 if p.yoshi is None else p.yoshi)
+        return head + self.level.ecs.save() if self.level else head
+    def load(self, blob):
+        (magic, version, scene, world, level_num, ow_world, node, dest, cx, cy, cam_x, cam_y,
+         x, y, vx, vy, on_ground, lives, score, coins, power, pstate, invincible, yoshi) = STATE.unpack_from(blob)
+        if magic != STATE_MAGIC or version != STATE_VERSION:
+            raise ValueError("not a v%d SMW save state" % STATE_VERSION)
+        if len(blob) > STATE.size and (self.level is None or (self.world, self.level_num) != (world, level_num)):
+            if self.level: self.level.release()   # slow path: build the saved level first
+            self.level = self.prefetch.take((world, level_num))
+            self.camera.set_world(self.level.width, HEIGHT)
+        if len(blob) > STATE.size:
+            self.level.ecs.load(blob, STATE.size)
+        self.scene, self.world, self.level_num = SCENES[scene], world, level_num
+        ow, p = self.overworld, self.player
+        ow.world, ow.node, ow.dest, ow.cur = ow_world, node, dest, [cx, cy]
+        self.camera.x, self.camera.y = cam_x, cam_y
+        p.x, p.y, p.vx, p.vy, p.on_ground = x, y, vx, vy, bool(on_ground)
+        p.lives, p.score, p.coins, p.invincible = lives, score, coins, invincible
+        p.power, p.state = power.decode(), pstate.decode()
+        p.yoshi = None if yoshi < 0 else yoshi
+        self.hinted = None
+    def reload(self, levels):
+        # --hot: new level source; rebuild prefetched levels, patch the one being played
+        self.prefetch.invalidate()
+        SMW_LEVELS.update(levels)
+        for key in [k for k in SMW_LEVELS if k not in levels]: del SMW_LEVELS[key]
+        self.hinted = None
+        lv = self.level
+        if lv is None: return
+        data = level_data(*lv.where)
+        if data == lv.data: return
+        width = lv.width
+        n = lv.patch(data)
+        if lv.width != width: self.camera.set_world(lv.width, HEIGHT)
+        print("hot-reload: patched %d entities in the live level" % n)
     def back_to_overworld(self):
         self.scene = "overworld"
+        ow = self.overworld
+        ow.travel_to(min(ow.node+1, len(ow.graph().pos)-1))  # walk on to the next level
 
 # --- GAME LOOP ---
 def main():
@@ -325,48 +293,64 @@ def main():
     clock = pygame.time.Clock()
     font = pygame.font.SysFont(None, 24)
     state = GameState()
+    saved = None
+    help_text = font.render("World: ↑/↓ Node: ←/→ Enter=Play", True, COL["black"])
+    hud = None  # (lives, coins, power, rendered HUD text)
+    budget = AllocBudget.from_argv()  # --alloc: per-phase allocation accounting
     running = True
     while running:
         dt = clock.tick(FPS)/1000.0
+        budget.phase("input")
+        if HOT:
+            levels = HOT.poll()
+            if levels is not None: state.reload(levels)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:  # quick save / load
+                saved = state.save()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9 and saved:
+                state.load(saved)
         keys = pygame.key.get_pressed()
-        # --- Overworld move cooldown ---
+        budget.phase("update")
+        # --- Overworld cursor travel ---
         if state.scene == "overworld":
-            if state.overworld.move_delay > 0:
-                state.overworld.move_delay -= dt
-            else:
-                state.overworld.move_delay = 0
+            state.overworld.update(dt)
+            state.hint_levels()
         # --- SCENE SWITCH ---
         if state.scene == "overworld":
             if keys[pygame.K_UP]: state.overworld.switch_world(-1)
             if keys[pygame.K_DOWN]: state.overworld.switch_world(1)
-            if keys[pygame.K_RIGHT]: state.overworld.move(1, dt)
-            if keys[pygame.K_LEFT]: state.overworld.move(-1, dt)
-            if keys[pygame.K_RETURN]: state.switch_level()
+            if keys[pygame.K_RIGHT]: state.overworld.move(1)
+            if keys[pygame.K_LEFT]: state.overworld.move(-1)
+            if keys[pygame.K_RETURN] and not state.overworld.traveling: state.switch_level()
         elif state.scene == "level":
             state.player.handle_input(keys)
             state.player.update(state)
-            for e in state.level.enemies: e.update(state)
-            if state.level.yoshi: state.level.yoshi.update(state)
-            if state.player.rect().colliderect(state.level.flag.rect()):
+            state.level.update()
+            if state.level.at_flag(state.player.rect()):
                 state.back_to_overworld()
-            if state.player.y > HEIGHT:
+            if px(state.player.y) > HEIGHT:
                 state.player.lives -= 1
                 if state.player.lives <= 0: state.player.lives = 5
-                state.player.x, state.player.y = 60, HEIGHT-72
+                state.player.respawn(60, HEIGHT-72)
+                state.level.reset()
+            p = state.player
+            state.camera.follow(px(p.x) + p.w//2, px(p.y) + p.h//2)
         # --- DRAW ---
+        budget.phase("draw")
         screen.fill(COL["sky"])
         if state.scene == "overworld":
             state.overworld.draw(screen, font)
-            txt = font.render("World: ↑/↓ Node: ←/→ Enter=Play", True, COL["black"])
-            screen.blit(txt, (10, 10))
+            screen.blit(help_text, (10, 10))
         elif state.scene == "level":
-            state.level.draw(screen)
-            state.player.draw(screen)
-            txt = font.render(f"Lives: {state.player.lives} Coins: {state.player.coins} Power: {state.player.power}", True, COL["black"])
-            screen.blit(txt, (10, 10))
+            cam, p = state.camera, state.player
+            state.level.draw(screen, cam)
+            p.draw(screen, cam.x, cam.y)
+            if hud is None or hud[0] != p.lives or hud[1] != p.coins or hud[2] != p.power:
+                hud = (p.lives, p.coins, p.power, font.render(f"Lives: {p.lives} Coins: {p.coins} Power: {p.power}", True, COL["black"]))
+            screen.blit(hud[3], (10, 10))
+        budget.phase("present")
         pygame.display.flip()
     pygame.quit()
 
@@ -1,4 +1,6 @@
-import pygame, random
+import pygame, random, os
+from levelpack import LevelPack
+from fixphys import FIX, to_fix, px, accelerate, fall, collide_y
 
 # --- CORE CONSTANTS ---
 WIDTH, HEIGHT = 600, 400
@@ -26,8 +28,9 @@ class Entity:
     def draw(self, surf): pygame.draw.rect(surf, self.color, self.rect())
 
 class Player(Entity):
+    # x/y/vx/vy are fixed-point (1px = FIX); rect() and draw() work in pixels
     def __init__(self, x, y):
-        super().__init__(x, y, 24, 32, COL["red"])
+        super().__init__(x * FIX, y * FIX, 24, 32, COL["red"])
         self.power = "small" # 'small', 'big', 'cape', 'fire'
         self.lives, self.score, self.coins = 5, 0, 0
         self.yoshi = None
@@ -36,48 +39,34 @@ class Player(Entity):
         self.carrying = None
         self.keys = []
         # SNES-like movement
-        self.accel = 0.18   # acceleration
-        self.max_speed = 2.4  # top speed
-        self.friction = 0.12  # slide
-        self.jump_power = -7
-        self.gravity = 0.27
+        self.accel = to_fix(0.18)   # acceleration
+        self.max_speed = to_fix(2.4)  # top speed
+        self.friction = to_fix(0.12)  # slide
+        self.jump_power = to_fix(-7)
+        self.gravity = to_fix(0.27)
+    def rect(self): return pygame.Rect(px(self.x), px(self.y), self.w, self.h)
     def handle_input(self, keys):
-        # SNES: acceleration and friction
-        if keys[pygame.K_LEFT]:
-            self.vx -= self.accel
-        elif keys[pygame.K_RIGHT]:
-            self.vx += self.accel
-        else:
-            if self.vx > 0:
-                self.vx -= self.friction
-                if self.vx < 0: self.vx = 0
-            elif self.vx < 0:
-                self.vx += self.friction
-                if self.vx > 0: self.vx = 0
-        # Clamp speed
-        if self.vx > self.max_speed: self.vx = self.max_speed
-        if self.vx < -self.max_speed: self.vx = -self.max_speed
+        # SNES: acceleration and friction, clamped to top speed
+        ax = -self.accel if keys[pygame.K_LEFT] else self.accel if keys[pygame.K_RIGHT] else 0
+        self.vx = accelerate(self.vx, ax, self.friction, self.max_speed)
         if keys[pygame.K_SPACE] and self.on_ground:
             self.vy = self.jump_power
         if keys[pygame.K_LSHIFT]:
             self.state = "spin"
     def update(self, state):
-        self.vy += self.gravity
+        self.vy = fall(self.vy, self.gravity)
         self.x += self.vx
         self.y += self.vy
         if self.x < 0: self.x = 0
-        if self.x > WIDTH-self.w: self.x = WIDTH-self.w
+        if self.x > (WIDTH-self.w) * FIX: self.x = (WIDTH-self.w) * FIX
         self.on_ground = False
         rect = self.rect()
         for plat in state.level.platforms:
-            if rect.colliderect(plat.rect()):
-                if self.vy > 0 and rect.bottom - plat.rect().top < 12:
-                    self.y = plat.rect().top - self.h
-                    self.vy = 0
-                    self.on_ground = True
-                elif self.vy < 0:
-                    self.vy = 0
-        if self.yoshi: self.yoshi.x, self.yoshi.y = self.x, self.y+24
+            pr = plat.rect()
+            if rect.colliderect(pr):
+                self.y, self.vy, landed = collide_y(self.y, self.vy, self.h, pr.top, pr.bottom, 12)
+                self.on_ground |= landed
+        if self.yoshi: self.yoshi.x, self.yoshi.y = px(self.x), px(self.y)+24
 
 class Yoshi(Entity):
     def __init__(self, x, y): super().__init__(x, y, 36, 28, COL["green"])
@@ -141,17 +130,20 @@ class Overworld:
         # dt will be decremented in game loop
 
 # --- LEVEL GENERATOR STUB ---
+# One layout (levels/smw-v0.lvp, see levelpack.py) for every map node; Yoshi shows up half the time
+LEVEL_PACK = LevelPack(os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels", "smw-v0.lvp"))
+
 class Level:
     def __init__(self, world=1, level=1):
-        self.platforms = [Platform(x*TILE, HEIGHT-40, TILE, 12) for x in range(20)]
-        self.platforms += [Platform(120, 220, 80, 12), Platform(320, 170, 80, 12)]
-        self.enemies = [Enemy(260, HEIGHT-72)]
-        self.items = [Block(160, 160), Block(190, 160, "powerup")]
-        self.flag = Flag(540, HEIGHT-72)
-        self.pipes = [Pipe(300, HEIGHT-72)]
-        self.switches = [Switch(220, HEIGHT-52, "blue")]
-        self.powerups = [PowerUp(192, 156, "mushroom")]
-        self.yoshi = Yoshi(90, HEIGHT-72) if random.random() < 0.5 else None
+        d = LEVEL_PACK[(1, 1)]
+        self.platforms = [Platform(*p) for p in d["platforms"]]
+        self.enemies = [Enemy(*e) for e in d["enemies"]]
+        self.items = [Block(*i) for i in d["items"]]
+        self.flag = Flag(*d["flag"])
+        self.pipes = [Pipe(*p) for p in d["pipes"]]
+        self.switches = [Switch(*s) for s in d["switches"]]
+        self.powerups = [PowerUp(*p) for p in d["powerups"]]
+        self.yoshi = Yoshi(*d["yoshi"]) if d["yoshi"] and random.random() < 0.5 else None
 
     def draw(self, surf):
         for p in self.platforms: p.draw(surf)
@@ -172,7 +164,7 @@ class GameState:
         self.player = Player(60, HEIGHT-72)
     def switch_level(self):
         self.level = Level()
-        self.player.x, self.player.y = 60, HEIGHT-72
+        self.player.x, self.player.y = 60 * FIX, (HEIGHT-72) * FIX
         self.scene = "level"
     def back_to_overworld(self):
         self.scene = "overworld"
@@ -211,11 +203,11 @@ def main():
             # Finish/Death
             if state.player.rect().colliderect(state.level.flag.rect()):
                 state.back_to_overworld()
-            if state.player.y > HEIGHT:
+            if state.player.y > HEIGHT * FIX:
                 state.player.lives -= 1
                 if state.player.lives <= 0:
                     state.player.lives = 5
-                state.player.x, state.player.y = 60, HEIGHT-72
+                state.player.x, state.player.y = 60 * FIX, (HEIGHT-72) * FIX
         # --- DRAW ---
         screen.fill(COL["sky"])
         if state.scene == "overworld":
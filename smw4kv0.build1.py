@@ -1,10 +1,13 @@
 import pygame
 import sys
+import os
 import random
+from levelpack import LevelPack
+from fixphys import FIX, to_fix, accelerate, fall, collide_y  # FIX: 1px = 256
+from allocbudget import AllocBudget
 
 # Constants
 WIDTH, HEIGHT, TILE, FPS = 640, 400, 32, 60
-FIX = 256  # fixed-point multiplier (1px = 256)
 
 COLORS = {
     'WHITE': (255, 255, 255),
@@ -20,58 +23,13 @@ COLORS = {
     'PURPLE': (120, 60, 180)
 }
 
-# Overworld map: worlds and node positions
-SMW_MAP = [
-    {
-        'name': "Yoshi's Island",
-        'nodes': [
-            {'pos': (80, 220), 'level': (1, 1)},
-            {'pos': (180, 200), 'level': (1, 2)},
-            {'pos': (300, 220), 'level': (1, 3)},
-            {'pos': (420, 200), 'level': (1, 4)},
-            {'pos': (540, 220), 'level': (1, 5)},
-        ]
-    },
-    {
-        'name': 'Donut Plains',
-        'nodes': [
-            {'pos': (80, 100), 'level': (2, 1)},
-            {'pos': (180, 120), 'level': (2, 2)},
-            {'pos': (300, 90),  'level': (2, 3)},
-            {'pos': (420, 110), 'level': (2, 4)},
-            {'pos': (540, 100), 'level': (2, 5)},
-        ]
-    }
-]
-
-# Level layouts: platforms, enemies, items, flags, etc.
-SMW_LEVELS = {
-    (1, 1): {
-        'platforms': [(0, HEIGHT-40, WIDTH, 12), (120, 220, 80, 12), (320, 170, 80, 12), (220, 100, 60, 12)],
-        'enemies': [(260, HEIGHT-72, 'goomba'), (150, 208, 'goomba')],
-        'items': [(160, 160, 'coin'), (200, 208, 'coin'), (340, 148, 'coin')],
-        'flag': (580, HEIGHT-72),
-        'pipes': [(300, HEIGHT-72, True)],
-        'switches': [(220, HEIGHT-52, 'blue')],
-        'powerups': [(192, 156, 'mushroom')],
-        'yoshi': (90, HEIGHT-72)
-    },
-    (1, 2): {
-        'platforms': [(0, HEIGHT-40, WIDTH, 12), (120, 300, 80, 12), (300, 230, 140, 12), (440, 140, 100, 12), (220, 100, 40, 12)],
-        'enemies': [(350, HEIGHT-72, 'goomba'), (400, 140, 'koopa'), (210, 290, 'goomba')],
-        'items': [(240, 120, 'coin'), (325, 220, 'coin'), (450, 120, 'coin')],
-        'flag': (580, HEIGHT-72),
-        'pipes': [],
-        'switches': [],
-        'powerups': [(350, 218, 'mushroom')],
-        'yoshi': None
-    },
-    # ... remaining levels identical in structure ...
-}
+# Overworld map and level layouts (levels/smw-build1.lvp, decoded lazily; see levelpack.py)
+LEVEL_PACK = LevelPack(os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels", "smw-build1.lvp"))
+SMW_MAP, SMW_LEVELS = LEVEL_PACK.map, LEVEL_PACK
 
 # Entity base class (fixed-point physics)
 class Entity:
-    __slots__ = ('x', 'y', 'w', 'h', 'vx', 'vy', 'color', 'on_ground')
+    __slots__ = ('x', 'y', 'w', 'h', 'vx', 'vy', 'color', 'on_ground', 'box')
 
     def __init__(self, x, y, w, h, color):
         self.x = x * FIX
@@ -82,9 +40,12 @@ class Entity:
         self.h = h
         self.color = color
         self.on_ground = False
+        self.box = pygame.Rect(0, 0, w, h)
 
     def rect(self):
-        return pygame.Rect(self.x // FIX, self.y // FIX, self.w, self.h)
+        # One Rect per entity, moved in place (no per-frame allocation)
+        self.box.x, self.box.y = self.x // FIX, self.y // FIX
+        return self.box
 
     def draw(self, surface):
         pygame.draw.rect(surface, self.color, self.rect())
@@ -100,26 +61,28 @@ class Player(Entity):
         super().__init__(x, y, 24, 32, COLORS['RED'])
         self.lives = 5
         self.coins = 0
-        self.accel = int(0.18 * FIX)
-        self.fric = int(0.12 * FIX)
-        self.max_vx = int(2.4 * FIX)
-        self.jump_v = int(-7 * FIX)
-        self.gravity = int(0.27 * FIX)
+        self.accel = to_fix(0.18)
+        self.fric = to_fix(0.12)
+        self.max_vx = to_fix(2.4)
+        self.jump_v = to_fix(-7)
+        self.gravity = to_fix(0.27)
 
     def handle_input(self, keys):
         ax = 0
         if keys[pygame.K_LEFT]: ax = -self.accel
         if keys[pygame.K_RIGHT]: ax = self.accel
-        self.vx += ax
-        if ax == 0:
-            if self.vx > 0: self.vx = max(0, self.vx - self.fric)
-            else: self.vx = min(0, self.vx + self.fric)
-        self.vx = max(-self.max_vx, min(self.max_vx, self.vx))
+        self.vx = accelerate(self.vx, ax, self.fric, self.max_vx)
         if keys[pygame.K_SPACE] and self.on_ground:
             self.vy = self.jump_v
 
+    def respawn(self, x, y):
+        # Reset in place instead of building a new Player on every death
+        self.x, self.y = x * FIX, y * FIX
+        self.vx = self.vy = 0
+        self.on_ground = False
+
     def update_physics(self, platforms):
-        self.vy += self.gravity
+        self.vy = fall(self.vy, self.gravity)
         self.x += self.vx
         self.y += self.vy
         self.on_ground = False
@@ -127,13 +90,8 @@ class Player(Entity):
         for p in platforms:
             pr = p.rect()
             if rect.colliderect(pr):
-                if self.vy > 0 and rect.bottom - pr.top < FIX:
-                    self.y = (pr.top - self.h) * FIX
-                    self.vy = 0
-                    self.on_ground = True
-                elif self.vy < 0 and pr.bottom - rect.top < FIX:
-                    self.y = pr.bottom * FIX
-                    self.vy = 0
+                self.y, self.vy, landed = collide_y(self.y, self.vy, self.h, pr.top, pr.bottom, FIX)
+                if landed: self.on_ground = True
 
 # Overworld navigation
 class Overworld:
@@ -143,6 +101,7 @@ class Overworld:
         self.node = 0
         self.delay = 0
         self.cooldown = 0.15
+        self.title = None  # (world, rendered name)
 
     def draw(self, surface, font):
         nodes = self.map_data[self.world]['nodes']
@@ -152,8 +111,9 @@ class Overworld:
             pygame.draw.circle(surface, color, n['pos'], radius)
             if i > 0:
                 pygame.draw.line(surface, COLORS['GRAY'], nodes[i-1]['pos'], n['pos'], 5)
-        name = self.map_data[self.world]['name']
-        surface.blit(font.render(name, True, COLORS['BLACK']), (WIDTH//2 - 80, 20))
+        if self.title is None or self.title[0] != self.world:
+            self.title = (self.world, font.render(self.map_data[self.world]['name'], True, COLORS['BLACK']))
+        surface.blit(self.title[1], (WIDTH//2 - 80, 20))
 
     def move_node(self, d):
         if self.delay <= 0:
@@ -178,30 +138,45 @@ class Level:
         self.flag = RectEntity(fx, fy, 16, 32, COLORS['YELLOW'])
 
     def draw(self, surface):
-        for e in self.platforms + self.enemies:
+        for e in self.platforms:
+            e.draw(surface)
+        for e in self.enemies:
             e.draw(surface)
         self.flag.draw(surface)
 
+# Out of lives: show it, then back to the map with a fresh stock
+def game_over_screen(screen, font):
+    screen.fill(COLORS['BLACK'])
+    msg = font.render("GAME OVER", True, COLORS['RED'])
+    screen.blit(msg, (WIDTH//2 - msg.get_width()//2, HEIGHT//2 - 20))
+    pygame.display.flip()
+    pygame.time.wait(1500)
+
 # Main game loop
 def main():
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     clock = pygame.time.Clock()
     font = pygame.font.Font(None, 24)
+    bigfont = pygame.font.Font(None, 48)
 
     overworld = Overworld(SMW_MAP)
     player = Player(60, HEIGHT - 72)
     current_level = None
     state = 'overworld'
+    lives_text = None  # (lives, rendered HUD text)
+    budget = AllocBudget.from_argv()  # --alloc: per-phase allocation accounting
 
     while True:
         dt = clock.tick(FPS) / 1000.0
+        budget.phase("input")
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
 
         keys = pygame.key.get_pressed()
+        budget.phase("update")
         if state == 'overworld':
             overworld.delay = max(0, overworld.delay - dt)
             if keys[pygame.K_UP]: overworld.switch_world(-1)
@@ -211,25 +186,34 @@ def main():
             if keys[pygame.K_RETURN]:
                 w, n = overworld.map_data[overworld.world]['nodes'][overworld.node]['level']
                 current_level = Level(SMW_LEVELS[(w, n)])
-                player = Player(60, HEIGHT - 72)
+                player.respawn(60, HEIGHT - 72)
                 state = 'level'
         else:
             player.handle_input(keys)
             player.update_physics(current_level.platforms)
             if player.rect().top > HEIGHT:
-                player.lives = max(0, player.lives - 1)
-                player = Player(60, HEIGHT - 72)
+                player.lives -= 1
+                player.respawn(60, HEIGHT - 72)
+                if player.lives <= 0:
+                    game_over_screen(screen, bigfont)
+                    player.lives = 5
+                    state = 'overworld'
+                    continue
             if player.rect().colliderect(current_level.flag.rect()):
                 state = 'overworld'
 
+        budget.phase("draw")
         screen.fill(COLORS['SKY'])
         if state == 'overworld':
             overworld.draw(screen, font)
         else:
             current_level.draw(screen)
             player.draw(screen)
-            screen.blit(font.render(f"Lives: {player.lives}", True, COLORS['BLACK']), (10, 10))
+            if lives_text is None or lives_text[0] != player.lives:
+                lives_text = (player.lives, font.render(f"Lives: {player.lives}", True, COLORS['BLACK']))
+            screen.blit(lives_text[1], (10, 10))
 
+        budget.phase("present")
         pygame.display.flip()
 
 if __name__ == '__main__':
@@ -0,0 +1,107 @@
+import threading
+import pygame
+from collections import OrderedDict
+
+# -------------------------------------------------------------
+#  PRE-BAKED SPRITE CACHE
+#  Procedural sprites are rasterized once per (name, variant) onto
+#  a transparent per-pixel-alpha surface and blitted from then on.
+#  Sprites that come out fully opaque drop the alpha channel, so
+#  solid rects keep the fast plain blit.
+# -------------------------------------------------------------
+CLEAR = (0, 0, 0, 0)
+
+
+class SpriteCache:
+    __slots__ = ("painters", "cache", "maxsize", "lock", "_atlas", "_areas")
+
+    def __init__(s, maxsize=256):
+        s.painters = {}                # name -> (painter, size_fn, anchor)
+        s.cache = OrderedDict()        # (name, *args) -> (surface, (ox, oy))
+        s.maxsize = maxsize
+        s.lock = threading.RLock()     # levels may be built on a prefetch thread
+        s._atlas = None
+        s._areas = {}
+
+    def register(s, name, painter, size, anchor=(0, 0)):
+        """painter(surf, *args) draws the sprite with its anchor at `anchor`;
+        size is (w, h) or a callable(*args) -> (w, h)."""
+        s.painters[name] = (painter, size if callable(size) else (lambda *a: size), anchor)
+
+    def get(s, name, *args):
+        key = (name,) + args
+        with s.lock:
+            hit = s.cache.get(key)
+            if hit is not None:
+                s.cache.move_to_end(key)
+                return hit
+            painter, size_fn, (ax, ay) = s.painters[name]
+            surf = pygame.Surface(size_fn(*args), pygame.SRCALPHA)
+            surf.fill(CLEAR)
+            painter(surf, *args)
+            if pygame.display.get_surface() is not None:
+                w, h = surf.get_size()
+                opaque = pygame.mask.from_surface(surf, 254).count() == w * h
+                surf = surf.convert() if opaque else surf.convert_alpha()
+            hit = s.cache[key] = (surf, (-ax, -ay))
+            if len(s.cache) > s.maxsize:
+                s.cache.popitem(last=False)
+            s._atlas = None
+            return hit
+
+    def draw(s, dest, name, x, y, *args):
+        surf, (ox, oy) = s.get(name, *args)
+        dest.blit(surf, (x + ox, y + oy))
+
+    # ---------------------------------------------------------
+    #  ATLAS: every cached sprite packed on one surface (shelf packing);
+    #  sprites wider than the atlas stay out and are blitted on their own
+    # ---------------------------------------------------------
+    def atlas(s, width=512):
+        with s.lock:
+            if s._atlas is not None:
+                return s._atlas, s._areas
+            areas, x, y, shelf = {}, 0, 0, 0
+            for key, (surf, _) in s.cache.items():
+                w, h = surf.get_size()
+                if w > width:
+                    continue
+                if x + w > width:
+                    x, y, shelf = 0, y + shelf, 0
+                areas[key] = pygame.Rect(x, y, w, h)
+                x += w; shelf = max(shelf, h)
+            atlas = pygame.Surface((width, max(1, y + shelf)), pygame.SRCALPHA)
+            atlas.fill(CLEAR)
+            for key, area in areas.items():
+                atlas.blit(s.cache[key][0], area, special_flags=pygame.BLEND_RGBA_MAX)   # exact copy
+            if pygame.display.get_surface() is not None:
+                atlas = atlas.convert_alpha()
+            s._atlas, s._areas = atlas, areas
+            return atlas, areas
+
+    def batch(s, dest, items):
+        """Draw [(name, x, y, *args), ...] with a single dest.blits() call. Each sprite
+        is resolved once; one this batch evicted from the cache (more distinct sprites
+        than maxsize), or too wide for the atlas, is blitted from its own surface."""
+        with s.lock:
+            hits = [((name, *args), s.get(name, *args), x, y) for name, x, y, *args in items]
+            atlas, areas = s.atlas()
+        seq = []
+        for key, (surf, (ox, oy)), x, y in hits:
+            area = areas.get(key)
+            if area is None:
+                seq.append((surf, (x + ox, y + oy)))
+            else:
+                seq.append((atlas, (x + ox, y + oy), area))
+        dest.blits(seq, False)
+
+
+# -------------------------------------------------------------
+#  SHARED PAINTERS
+# -------------------------------------------------------------
+def paint_rect(surf, color, w, h):
+    surf.fill(color)
+
+
+def rect_size(color, w, h):
+    return (w, h)
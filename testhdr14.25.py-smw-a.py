@@ -1,8 +1,10 @@
 import pygame
 import sys
+import os
+from levelpack import LevelPack
+from fixphys import FIX, to_fix, accelerate, fall, collide_y  # FIX: 1px = 256
 
 WIDTH, HEIGHT, TILE, FPS = 640, 400, 32, 60
-FIX = 256
 
 COLORS = {
     'WHITE': (255, 255, 255),
@@ -18,62 +20,9 @@ COLORS = {
     'PURPLE': (120, 60, 180)
 }
 
-SMW_MAP = [
-    {
-        'name': "Yoshi's Island",
-        'nodes': [
-            {'pos': (80, 220), 'level': (1, 1), 'label': "YI 1"},
-            {'pos': (180, 200), 'level': (1, 2), 'label': "YI 2"},
-            {'pos': (300, 220), 'level': (1, 3), 'label': "YI 3"},
-            {'pos': (420, 200), 'level': (1, 4), 'label': "YI 4"},
-            {'pos': (540, 220), 'level': (1, 5), 'label': "Castle"},
-        ]
-    },
-    {
-        'name': 'Donut Plains',
-        'nodes': [
-            {'pos': (80, 100), 'level': (2, 1), 'label': "DP 1"},
-            {'pos': (180, 120), 'level': (2, 2), 'label': "DP 2"},
-            {'pos': (300, 90),  'level': (2, 3), 'label': "DP 3"},
-            {'pos': (420, 110), 'level': (2, 4), 'label': "DP 4"},
-            {'pos': (540, 100), 'level': (2, 5), 'label': "Castle"},
-        ]
-    }
-]
-
-def simple_level():
-    return {
-        'platforms': [(0, HEIGHT-40, WIDTH, 12)],
-        'enemies': [],
-        'items': [],
-        'flag': (580, HEIGHT-72),
-        'pipes': [],
-        'switches': [],
-        'powerups': [],
-        'yoshi': None
-    }
-
-SMW_LEVELS = {
-    (1, 1): {
-        'platforms': [(0, HEIGHT-40, WIDTH, 12), (120, 220, 80, 12)],
-        'enemies': [(260, HEIGHT-72, 'goomba')],
-        'items': [(160, 160, 'coin')],
-        'flag': (580, HEIGHT-72),
-        'pipes': [],
-        'switches': [],
-        'powerups': [],
-        'yoshi': None
-    },
-    (1, 2): simple_level(),
-    (1, 3): simple_level(),
-    (1, 4): simple_level(),
-    (1, 5): simple_level(),  # Castle
-    (2, 1): simple_level(),
-    (2, 2): simple_level(),
-    (2, 3): simple_level(),
-    (2, 4): simple_level(),
-    (2, 5): simple_level(),  # Castle
-}
+# Overworld map (labelled nodes) and level layouts: levels/smw-snes.lvp, see levelpack.py
+LEVEL_PACK = LevelPack(os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels", "smw-snes.lvp"))
+SMW_MAP, SMW_LEVELS = LEVEL_PACK.map, LEVEL_PACK
 
 class Entity:
     __slots__ = ('x', 'y', 'w', 'h', 'vx', 'vy', 'color', 'on_ground')
@@ -100,24 +49,20 @@ class Player(Entity):
         super().__init__(x, y, 24, 32, COLORS['RED'])
         self.lives = 5
         self.coins = 0
-        self.accel = int(0.18 * FIX)
-        self.fric = int(0.12 * FIX)
-        self.max_vx = int(2.4 * FIX)
-        self.jump_v = int(-7 * FIX)
-        self.gravity = int(0.27 * FIX)
+        self.accel = to_fix(0.18)
+        self.fric = to_fix(0.12)
+        self.max_vx = to_fix(2.4)
+        self.jump_v = to_fix(-7)
+        self.gravity = to_fix(0.27)
     def handle_input(self, keys):
         ax = 0
         if keys[pygame.K_LEFT]: ax = -self.accel
         if keys[pygame.K_RIGHT]: ax = self.accel
-        self.vx += ax
-        if ax == 0:
-            if self.vx > 0: self.vx = max(0, self.vx - self.fric)
-            else: self.vx = min(0, self.vx + self.fric)
-        self.vx = max(-self.max_vx, min(self.max_vx, self.vx))
+        self.vx = accelerate(self.vx, ax, self.fric, self.max_vx)
         if keys[pygame.K_SPACE] and self.on_ground:
             self.vy = self.jump_v
     def update_physics(self, platforms):
-        self.vy += self.gravity
+        self.vy = fall(self.vy, self.gravity)
         self.x += self.vx
         self.y += self.vy
         self.on_ground = False
@@ -125,13 +70,8 @@ class Player(Entity):
         for p in platforms:
             pr = p.rect()
             if rect.colliderect(pr):
-                if self.vy > 0 and rect.bottom - pr.top < FIX:
-                    self.y = (pr.top - self.h) * FIX
-                    self.vy = 0
-                    self.on_ground = True
-                elif self.vy < 0 and pr.bottom - rect.top < FIX:
-                    self.y = pr.bottom * FIX
-                    self.vy = 0
+                self.y, self.vy, landed = collide_y(self.y, self.vy, self.h, pr.top, pr.bottom, FIX)
+                if landed: self.on_ground = True
 
 class Overworld:
     def __init__(self, map_data):
@@ -0,0 +1,240 @@
+import os
+import sys
+import queue
+import random
+import traceback
+import struct
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from neslevel import make_level, Collectibles, NesRun, COIN
+
+# -------------------------------------------------------------
+#  TOURNAMENT HOST: MANY RACERS, ONE LEVEL IN SHARED MEMORY
+#  The host builds the seeded level once and publishes the grid
+#  in a shared-memory block; worker processes map it read-only and
+#  race SMB1FAKEPPU's level loop (neslevel.NesRun) on it. Nothing a
+#  player does touches the block: coin pickups go to a per-player
+#  dirty-tile overlay (copy-on-write), so a racer costs its NesRun
+#  scalars plus the tiles it changed. Results come back on a queue
+#  and the host ranks them.
+#
+#    shm: HEADER, then rows * cols tile bytes (row-major, read-only)
+#
+#  python tournament.py [PLAYERS] [LEVEL] [SEED] [-j WORKERS] [--local]
+#    --local builds a private make_level() per racer, as the games
+#    do, to compare the per-racer level footprint
+# -------------------------------------------------------------
+WIDTH, HEIGHT, TILE = 600, 400, 16     # SMB1FAKEPPU geometry
+ROWS, COLS = HEIGHT // TILE, WIDTH // TILE * 3
+FRAMES = 60 * 60                       # race cut-off
+MAGIC = b"TRN1"
+HEADER = struct.Struct("<4sHHHB4iH")   # magic, rows, cols, tile, level, flag x, y, w, h, coins
+
+
+def publish(level_idx):
+    """Build the level once; returns the shared-memory block holding it."""
+    level, items = make_level(level_idx, COLS, ROWS, TILE)
+    shm = shared_memory.SharedMemory(create=True, size=HEADER.size + ROWS * COLS)
+    HEADER.pack_into(shm.buf, 0, MAGIC, ROWS, COLS, TILE, level_idx, *items.flag, items.coins_left)
+    shm.buf[HEADER.size:] = bytes(t for row in level for t in row)
+    return shm
+
+
+# -------------------------------------------------------------
+#  COPY-ON-WRITE VIEW (what NesRun and Collectibles see)
+# -------------------------------------------------------------
+class SharedLevel:
+    """The shared grid, indexed level[y][x] like make_level()'s lists;
+    writes land in `dirty` (tile index -> tile) and shadow the block."""
+    __slots__ = ("base", "dirty", "rows")
+
+    def __init__(s, base, rows, cols):
+        s.base, s.dirty = base, {}
+        s.rows = [CowRow(base, s.dirty, y * cols) for y in range(rows)]
+
+    def __getitem__(s, y):
+        return s.rows[y]
+
+    def __len__(s):
+        return len(s.rows)
+
+    def tile(s, i):
+        t = s.dirty.get(i)
+        return s.base[i] if t is None else t
+
+
+class CowRow:
+    __slots__ = ("base", "dirty", "off")     # no link back to the level: a cycle would keep
+                                              # the shared view alive past shm.close()
+
+    def __init__(s, base, dirty, off):
+        s.base, s.dirty, s.off = base, dirty, off
+
+    def __getitem__(s, x):
+        t = s.dirty.get(s.off + x)
+        return s.base[s.off + x] if t is None else t
+
+    def __setitem__(s, x, t):
+        s.dirty[s.off + x] = t
+
+
+class CoinView:
+    """Collectibles.coins over the grid: 1 wherever the overlay still shows a coin."""
+    __slots__ = ("level",)
+
+    def __init__(s, level):
+        s.level = level
+
+    def __getitem__(s, i):
+        if i >= len(s.level.base):
+            raise IndexError(i)
+        return 1 if s.level.tile(i) == COIN else 0
+
+    def __setitem__(s, i, v):
+        s.level.dirty[i] = COIN if v else 0
+
+
+class SharedCollectibles(Collectibles):
+    __slots__ = ()
+
+    def __init__(s, level, tile, rows, cols, flag, coins_left):
+        s.tile, s.rows, s.cols = tile, rows, cols
+        s.coins, s.coins_left, s.flag = CoinView(level), coins_left, flag
+
+
+def join(tiles, head):
+    """A NesRun on the shared grid: tiles is the read-only view of the block."""
+    magic, rows, cols, tile, level_idx, fx, fy, fw, fh, coins = head
+    if magic != MAGIC:
+        raise ValueError("not a tournament level block")
+    level = SharedLevel(tiles, rows, cols)
+    items = SharedCollectibles(level, tile, rows, cols, (fx, fy, fw, fh), coins)
+    return NesRun(level_idx, cols, rows, tile, shared=(level, items))
+
+
+def level_bytes(run):
+    """Per-racer level footprint: the grid and coin table a racer holds itself."""
+    if isinstance(run.level, SharedLevel):
+        lv = run.level
+        return (sys.getsizeof(lv.dirty) + sys.getsizeof(lv.rows) +
+                sum(sys.getsizeof(r) for r in lv.rows) + sys.getsizeof(run.items.coins))
+    return (sys.getsizeof(run.level) + sum(sys.getsizeof(r) for r in run.level) +
+            sys.getsizeof(run.items.coins))
+
+
+# -------------------------------------------------------------
+#  RACERS (worker processes)
+# -------------------------------------------------------------
+def race(run, rng, frames=FRAMES):
+    """Bot input: hold right, jump at random and whenever stuck. Returns
+    (outcome, frame, furthest x): the winning frame, else when it got furthest."""
+    best, at, last = run.mx, 0, -1
+    for f in range(1, frames + 1):
+        stuck = run.mx == last
+        last = run.mx
+        outcome = run.step(False, True, stuck or rng.random() < 0.05)
+        if run.mx > best:
+            best, at = run.mx, f
+        if outcome == "win":
+            return outcome, f, best
+        if outcome == "gameover":
+            return outcome, at, best
+    return "timeout", at, best
+
+
+def _racers(shm_name, level_idx, players, seed, local, results):
+    shm = shared_memory.SharedMemory(name=shm_name)   # spawned: the host's resource tracker
+    head = HEADER.unpack_from(shm.buf)
+    tiles = shm.buf[HEADER.size:].toreadonly()
+    for p in players:
+        try:
+            run = NesRun(level_idx, COLS, ROWS, TILE) if local else join(tiles, head)
+            outcome, frame, best = race(run, random.Random(seed * 1000 + p))
+            dirty = 0 if local else len(run.level.dirty)
+            results.put((p, outcome, frame, run.coins, best, dirty, level_bytes(run), os.getpid()))
+        except Exception:
+            results.put((p, "error", traceback.format_exc()))   # the host raises it
+        run = None
+    del tiles                                  # release the view before unmapping
+    shm.close()
+
+
+# -------------------------------------------------------------
+#  HOST
+# -------------------------------------------------------------
+def host(players, level_idx, seed=0, workers=None, local=False):
+    """Race `players` bots on one level; returns their results, best first."""
+    workers = max(1, min(workers or os.cpu_count() or 1, players))
+    shm = publish(level_idx)
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_racers, args=(shm.name, level_idx, list(range(w, players, workers)),
+                                               seed, local, results)) for w in range(workers)]
+    try:
+        for p in procs:
+            p.start()
+        out = []
+        while len(out) < players:
+            try:
+                r = results.get(timeout=1.0)
+            except queue.Empty:
+                # a racer that died outright (signal, OOM) never reports back
+                dead = [p.exitcode for p in procs if p.exitcode is not None]
+                if any(dead) or len(dead) == len(procs):
+                    raise RuntimeError("racer process exited (codes %s) with %d of %d results in"
+                                       % (dead, len(out), players))
+                continue
+            if r[1] == "error":
+                raise RuntimeError("racer %d failed:\n%s" % (r[0], r[2]))
+            out.append(r)
+        for p in procs:
+            p.join()
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        shm.close()
+        shm.unlink()
+    # winners by finishing frame, the rest by distance, then when they got there, then coins
+    out.sort(key=lambda r: (r[1] != "win", r[2] if r[1] == "win" else -r[4], r[2], -r[3]))
+    return out
+
+
+def report(out, level_idx, local):
+    lines = ["level %d, %d racers (%s level):" % (level_idx, len(out), "private" if local else "shared"),
+             "  rank  player  result    frame  coins  best x  dirty tiles"]
+    for rank, (p, outcome, frame, coins, best, dirty, _, _) in enumerate(out, 1):
+        lines.append("  %4d  %6d  %-8s %6d  %5d  %6d  %11d" % (rank, p, outcome, frame, coins, best, dirty))
+    wins = sum(r[1] == "win" for r in out)
+    per = sum(r[6] for r in out) / len(out)
+    lines.append("  %d finished, %.1f coins avg; level footprint %.0f B per racer%s" % (
+        wins, sum(r[3] for r in out) / len(out), per,
+        "" if local else " + one %d B shared block" % (HEADER.size + ROWS * COLS)))
+    return "\n".join(lines)
+
+
+def main(argv):
+    args = list(argv[1:])
+    workers, local = None, "--local" in args
+    if local:
+        args.remove("--local")
+    if "-j" in args:
+        i = args.index("-j")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    if any(not a.isdigit() for a in args):
+        print("usage: tournament.py [PLAYERS] [LEVEL] [SEED] [-j WORKERS] [--local]")
+        return 2
+    players = int(args[0]) if len(args) > 0 else 32
+    level_idx = int(args[1]) if len(args) > 1 else 0
+    seed = int(args[2]) if len(args) > 2 else 0
+    if players < 1:
+        print("tournament.py: PLAYERS must be at least 1")
+        return 2
+    print(report(host(players, level_idx, seed, workers, local), level_idx, local))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))